@@ -1,5 +1,6 @@
 -- Phase 05 · Step 02 · Task 02
 -- M1 – Weighted author leaderboard matching the pandas core metric.
+-- Aggregates on the integer author_id from the book_authors bridge; names come from authors.
 -- Run inside psql: \i sql/analysis/20_top_authors_weighted_rating.sql
 
 WITH params AS (
@@ -19,23 +20,23 @@ books_base AS (
 ),
 author_rollup AS (
     SELECT
-        a.author_name,
+        ba.author_id,
         SUM(b.average_rating * b.ratings_count) AS weighted_rating_sum,
         SUM(b.ratings_count) AS total_ratings,
         COUNT(DISTINCT b.canonical_book_id) AS book_count
-    FROM book_authors_stage AS a
+    FROM book_authors AS ba
     JOIN books_base AS b
-        ON a.book_id = b.book_id
-    WHERE
-        a.author_name IS NOT NULL
-    GROUP BY a.author_name
+        ON ba.book_id = b.book_id
+    GROUP BY ba.author_id
 )
 SELECT
-    author_name,
-    ROUND((weighted_rating_sum / NULLIF(total_ratings, 0))::numeric, 4) AS weighted_average_rating,
-    total_ratings,
-    book_count
-FROM author_rollup
-WHERE total_ratings >= (SELECT min_total_ratings FROM params)
-ORDER BY weighted_average_rating DESC, total_ratings DESC
+    a.author_name,
+    ROUND((r.weighted_rating_sum / NULLIF(r.total_ratings, 0))::numeric, 4) AS weighted_average_rating,
+    r.total_ratings,
+    r.book_count
+FROM author_rollup AS r
+JOIN authors AS a
+    ON a.author_id = r.author_id
+WHERE r.total_ratings >= (SELECT min_total_ratings FROM params)
+ORDER BY weighted_average_rating DESC, r.total_ratings DESC
 LIMIT (SELECT top_n FROM params);
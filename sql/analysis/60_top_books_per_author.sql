@@ -1,5 +1,6 @@
 -- Phase 05 · Step 02 · Task 03
 -- Advanced pattern: author-level top-N ranking using ROW_NUMBER over canonical books.
+-- Authors are ranked on the integer author_id from book_authors; names are joined once per author.
 -- Run inside psql: \i sql/analysis/60_top_books_per_author.sql
 
 WITH params AS (
@@ -55,37 +56,39 @@ canonical_rollup AS (
 ),
 author_books AS (
     SELECT
-        a.author_name,
+        ba.author_id,
         c.canonical_book_id,
         c.title,
         c.average_rating,
         c.language_code,
         c.ratings_count_capped,
         c.text_reviews_capped
-    FROM book_authors_stage AS a
+    FROM book_authors AS ba
     JOIN canonical_rollup AS c
-        ON a.book_id = c.representative_book_id
-    WHERE a.author_name IS NOT NULL
+        ON ba.book_id = c.representative_book_id
 ),
 author_totals AS (
     SELECT
-        author_name,
+        author_id,
         SUM(ratings_count_capped) AS total_ratings
     FROM author_books
-    GROUP BY author_name
+    GROUP BY author_id
 ),
 author_leaders AS (
     SELECT
-        author_name,
-        total_ratings,
+        t.author_id,
+        a.author_name,
+        t.total_ratings,
         ROW_NUMBER() OVER (
-            ORDER BY total_ratings DESC, author_name
+            ORDER BY t.total_ratings DESC, a.author_name
         ) AS author_leaderboard_rank
-    FROM author_totals
+    FROM author_totals AS t
+    JOIN authors AS a
+        ON a.author_id = t.author_id
 ),
 ranked AS (
     SELECT
-        ab.author_name,
+        al.author_name,
         ab.canonical_book_id,
         ab.title,
         ab.average_rating,
@@ -94,12 +97,12 @@ ranked AS (
         ab.text_reviews_capped,
         al.total_ratings,
         ROW_NUMBER() OVER (
-            PARTITION BY ab.author_name
+            PARTITION BY ab.author_id
             ORDER BY ab.ratings_count_capped DESC, ab.average_rating DESC, ab.canonical_book_id
         ) AS author_rank,
         al.author_leaderboard_rank
     FROM author_books AS ab
-    JOIN author_leaders AS al USING (author_name)
+    JOIN author_leaders AS al USING (author_id)
     CROSS JOIN params
     WHERE al.total_ratings >= params.min_total_ratings
 )
@@ -12,6 +12,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.metrics.selection import top_n_rows
+
 EXTRA_CHARTS = [
     {
         "csv": "M2_author_engagement_index.csv",
@@ -20,7 +22,7 @@ EXTRA_CHARTS = [
         "type": "barh",
         "x": "engagement_index",
         "y": "author_name",
-        "filter": lambda df: df.sort_values("engagement_index", ascending=False).head(15),
+        "filter": lambda df: top_n_rows(df, "engagement_index", 15),
         "filename": "M2_author_engagement_index.png"
     },
     {
@@ -30,7 +32,7 @@ EXTRA_CHARTS = [
         "type": "barh",
         "x": "median_ratings_count_capped",
         "y": "publisher",
-        "filter": lambda df: df.sort_values("median_ratings_count_capped", ascending=False).head(15),
+        "filter": lambda df: top_n_rows(df, "median_ratings_count_capped", 15),
         "filename": "M10_publisher_engagement.png"
     },
     {
@@ -60,7 +62,7 @@ EXTRA_CHARTS = [
         "type": "bar",
         "x": "publisher",
         "y": "average_rating",
-        "filter": lambda df: df.sort_values("average_rating", ascending=False).head(15),
+        "filter": lambda df: top_n_rows(df, "average_rating", 15),
         "filename": "M13_publisher_language_rankings.png"
     },
     {
@@ -8,10 +8,14 @@ Usage (from repo root):
 """
 import os
 import argparse
+from pathlib import Path
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.metrics.cache import DEFAULT_MAX_ENTRIES, MetricCache, code_version, file_fingerprint
+
 # Chart definitions (mapping from plan)
 CHARTS = [
     {
@@ -166,55 +170,75 @@ def plot_pie(df, x, y, title, caption, out_path):
     plt.close()
     print(f"Saved: {out_path}\nCaption: {caption}")
 
-def main(input_dir, output_dir):
+def render_chart(chart, df, out_path):
+    """Draw ``chart`` from ``df`` into ``out_path``; return False when the data does not fit."""
+    # Special-case: duplicate share CSV contains totals; build pie data
+    if chart["csv"] == "M11_duplicate_share.csv":
+        # expect columns: total_rows, duplicate_rows, duplicate_share_pct
+        if {"total_rows", "duplicate_rows"}.issubset(df.columns):
+            total = int(df.loc[0, "total_rows"])
+            dup = int(df.loc[0, "duplicate_rows"])
+            labels = ["Canonical", "Duplicate"]
+            values = [total - dup, dup]
+            pie_df = pd.DataFrame({"label": labels, "value": values})
+            plot_pie(pie_df, "label", "value", chart["title"], chart["caption"], out_path)
+            return True
+        print(f"M11 CSV missing expected columns: {chart['csv']}")
+        return False
+
+    x = chart.get("x_col")
+    y = chart.get("y_col")
+    # Validate columns exist
+    if x not in df.columns or y not in df.columns:
+        print(f"Missing expected columns for {chart['csv']}: {x} or {y} not in {list(df.columns)}")
+        return False
+
+    if chart["type"] == "barh":
+        # ensure categorical y ordering preserved
+        plot_barh(df, x, y, chart["title"], chart["caption"], out_path)
+    elif chart["type"] == "bar":
+        plot_bar(df, x, y, chart["title"], chart["caption"], out_path)
+    elif chart["type"] == "box":
+        plot_box(df, x, y, chart["title"], chart["caption"], out_path)
+    elif chart["type"] == "line":
+        plot_line(df, x, y, chart["title"], chart["caption"], out_path)
+    elif chart["type"] == "pie":
+        plot_pie(df, x, y, chart["title"], chart["caption"], out_path)
+    else:
+        print(f"Unknown chart type: {chart['type']}")
+        return False
+    return True
+
+def main(input_dir, output_dir, cache=None):
     os.makedirs(output_dir, exist_ok=True)
     for chart in CHARTS:
         csv_path = os.path.join(input_dir, chart["csv"])
         if not os.path.exists(csv_path):
             print(f"Missing CSV: {csv_path}")
             continue
+        out_path = os.path.join(output_dir, chart["filename"])
+        if cache is not None:
+            # Key on the CSV contents, the chart spec, and this script's code.
+            spec = {k: v for k, v in chart.items() if k != "filter"}
+            key = cache.key(chart["filename"], spec, file_fingerprint(Path(csv_path)), code_version(__name__))
+            png = cache.get(key, chart["filename"])
+            if png is not None:
+                Path(out_path).write_bytes(png)
+                print(f"Saved (cached): {out_path}\nCaption: {chart['caption']}")
+                continue
         df = pd.read_csv(csv_path)
         if chart["filter"]:
             df = chart["filter"](df)
-        out_path = os.path.join(output_dir, chart["filename"])
-        # Special-case: duplicate share CSV contains totals; build pie data
-        if chart["csv"] == "M11_duplicate_share.csv":
-            # expect columns: total_rows, duplicate_rows, duplicate_share_pct
-            if {"total_rows", "duplicate_rows"}.issubset(df.columns):
-                total = int(df.loc[0, "total_rows"])
-                dup = int(df.loc[0, "duplicate_rows"])
-                labels = ["Canonical", "Duplicate"]
-                values = [total - dup, dup]
-                pie_df = pd.DataFrame({"label": labels, "value": values})
-                plot_pie(pie_df, "label", "value", chart["title"], chart["caption"], out_path)
-            else:
-                print(f"M11 CSV missing expected columns: {csv_path}")
-            continue
-
-        x = chart.get("x_col")
-        y = chart.get("y_col")
-        # Validate columns exist
-        if x not in df.columns or y not in df.columns:
-            print(f"Missing expected columns for {chart['csv']}: {x} or {y} not in {list(df.columns)}")
-            continue
-
-        if chart["type"] == "barh":
-            # ensure categorical y ordering preserved
-            plot_barh(df, x, y, chart["title"], chart["caption"], out_path)
-        elif chart["type"] == "bar":
-            plot_bar(df, x, y, chart["title"], chart["caption"], out_path)
-        elif chart["type"] == "box":
-            plot_box(df, x, y, chart["title"], chart["caption"], out_path)
-        elif chart["type"] == "line":
-            plot_line(df, x, y, chart["title"], chart["caption"], out_path)
-        elif chart["type"] == "pie":
-            plot_pie(df, x, y, chart["title"], chart["caption"], out_path)
-        else:
-            print(f"Unknown chart type: {chart['type']}")
+        if render_chart(chart, df, out_path) and cache is not None:
+            cache.put(key, Path(out_path).read_bytes())
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Phase 04 Portfolio Visualization Script")
     parser.add_argument("--input-dir", type=str, default="outputs/phase04_core_metrics", help="Directory with metric CSVs")
     parser.add_argument("--output-dir", type=str, default="outputs/phase04_visualizations", help="Directory to save figures")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Directory for cached figures; enables the chart cache")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES, help="LRU cache size")
+    parser.add_argument("--force", action="store_true", help="Re-render every chart and refresh the cache")
     args = parser.parse_args()
-    main(args.input_dir, args.output_dir)
+    cache = MetricCache(Path(args.cache_dir), max_entries=args.cache_max_entries, force=args.force) if args.cache_dir else None
+    main(args.input_dir, args.output_dir, cache)
@@ -4,16 +4,50 @@ Running this CLI keeps the demonstration inside the Python/Docker workflow,
 reads ``books_clean.csv``, computes the marquee KPI set (M1, M3, M4, M5, M7,
 M8, M9, M11), and saves the CSV artifacts recruiters review. It is wired into
 `make core-metrics` and the FAQ so reviewers can rerun the exact same exports.
+
+Each metric is registered as a node with its shared prerequisites (canonical
+rollup, book × author incidence), so ``--metrics M1,M9`` only builds what those
+tables need. ``--workers N`` computes and writes the selected tables on a
+thread pool that shares the loaded frame; its string group keys are
+dictionary-encoded once up front (``src.metrics.keys``).
+``--rolling-windows 3,5,10`` emits M14 rolling columns for every listed size
+from one pass over the yearly prefix sums. ``--state PATH`` switches to
+incremental mode: the mergeable aggregate state is loaded (or built once from
+``--books-csv``), ``--delta-csv`` rows are upserted into it,
+``--delta-removed-ids`` books are dropped from it, and the tables are derived
+from the state instead of the full catalogue; a state built with other
+``--quantiles``/``--relative-accuracy`` settings is rejected. ``--quantiles approx``
+answers the median/p75 columns (M5, M6, M8, M9, M10, M12, M13) from mergeable
+log-bucket sketches that stay within ``--relative-accuracy`` of the exact
+values; in incremental mode it also keeps the state's histograms as sketches.
+``--cube PATH`` answers M5, M7, M8, M9, M10, M13 and M14 by slicing a
+precomputed year × language × page bucket × publisher cube, rebuilt when
+``--books-csv`` is newer than the cube file or the file was built with other
+``--quantiles``/``--relative-accuracy`` settings; the CSV is read only if another
+selected metric still needs it. ``--pushdown`` runs every aggregation inside
+PostgreSQL against the loaded ``books_clean`` tables and only downloads the
+result rows. ``--cache-dir DIR`` reuses tables computed
+earlier for the same CSV contents, metric parameters, and metric code
+(``--force`` recomputes and refreshes them).
 """
 from __future__ import annotations
 
 import argparse
 import logging
+import math
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Callable, Iterator, Sequence
 
 import pandas as pd
+from sqlalchemy.engine import Engine
 
+from src.db_config import get_engine
 from src.metrics.core_metrics import (
+    canonical_rollup,
     compute_average_rating_by_publication_year,
     compute_duplicate_share,
     compute_language_rating_summary,
@@ -22,17 +56,264 @@ from src.metrics.core_metrics import (
     compute_top_authors_by_weighted_rating,
     compute_top_books_by_ratings_count,
     compute_top_books_by_text_reviews,
-        compute_author_engagement_index,
-        compute_publisher_engagement,
-        compute_page_length_engagement_delta,
-        compute_engagement_uplift_canonical,
-        compute_publisher_language_rankings,
-        compute_publication_year_rolling_stats,
+    compute_author_engagement_index,
+    compute_publisher_engagement,
+    compute_page_length_engagement_delta,
+    compute_engagement_uplift_canonical,
+    compute_publisher_language_rankings,
+    compute_publication_year_rolling_stats,
 )
+from src.metrics import cube as metrics_cube
+from src.metrics.cache import DEFAULT_MAX_ENTRIES, MetricCache, code_version, file_fingerprint
+from src.metrics import incremental
+from src.metrics.cube import MetricsCube
+from src.metrics.incidence import AuthorIncidence
+from src.metrics.incremental import CoreMetricsState
+from src.metrics.keys import encode_keys
+from src.metrics.quantiles import DEFAULT_RELATIVE_ACCURACY, QUANTILE_MODES
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_BOOKS_CSV = Path("data/derived/books_clean.csv")
 DEFAULT_OUTPUT_DIR = Path("outputs/phase04_core_metrics")
+# Modules whose source is folded into the cache key of every metric table.
+CACHE_CODE_MODULES = (
+    "src.cleaning",
+    "src.metrics.core_metrics",
+    "src.metrics.incidence",
+    "src.metrics.keys",
+    "src.metrics.quantiles",
+    "src.metrics.selection",
+    "src.metrics.timeseries",
+)
+QUANTILE_PARAMS = ("quantiles", "relative_accuracy")
+
+
+@dataclass(frozen=True, slots=True)
+class MetricNode:
+    """A metric table plus the shared intermediates and CLI options it needs."""
+
+    name: str
+    compute: Callable[..., pd.DataFrame]
+    requires: tuple[str, ...] = ()
+    params: tuple[str, ...] = ()
+
+    @property
+    def metric_id(self) -> str:
+        return self.name.split("_", 1)[0]
+
+
+def _quantile_options(args: argparse.Namespace) -> dict[str, object]:
+    return {
+        "quantile_mode": getattr(args, "quantiles", "exact"),
+        "relative_accuracy": getattr(args, "relative_accuracy", DEFAULT_RELATIVE_ACCURACY),
+    }
+
+
+def _rolling_window(args: argparse.Namespace) -> int | list[int]:
+    # One size keeps the unsuffixed M14 columns; several add a column pair per size.
+    windows = getattr(args, "rolling_windows", None) or [3]
+    return windows[0] if len(windows) == 1 else windows
+
+
+# Intermediate nodes shared by several metrics. Each is built at most once per
+# run and released as soon as no pending metric depends on it. The frame they
+# receive already carries dictionary-encoded keys (see ``run_metric_nodes``),
+# which the canonical rollup inherits. The authors are a sparse book × author
+# incidence over the rows of that same frame.
+PREREQUISITES: dict[str, Callable[[pd.DataFrame], pd.DataFrame | AuthorIncidence]] = {
+    "canonical": canonical_rollup,
+    "authors": AuthorIncidence.from_books,
+}
+
+METRIC_NODES: list[MetricNode] = [
+    MetricNode(
+        "M1_top_authors_by_weighted_rating",
+        lambda df, args, authors: compute_top_authors_by_weighted_rating(
+            df,
+            min_ratings=args.author_min_ratings,
+            top_n=args.author_top_n,
+            authors=authors,
+        ),
+        requires=("authors",),
+        params=("author_min_ratings", "author_top_n"),
+    ),
+    MetricNode(
+        "M3_top_books_by_ratings_count",
+        lambda df, args, canonical: compute_top_books_by_ratings_count(
+            df,
+            top_n=args.books_top_n,
+            canonical=canonical,
+        ),
+        requires=("canonical",),
+        params=("books_top_n",),
+    ),
+    MetricNode(
+        "M4_top_books_by_text_reviews",
+        lambda df, args, canonical: compute_top_books_by_text_reviews(
+            df,
+            top_n=args.books_top_n,
+            canonical=canonical,
+        ),
+        requires=("canonical",),
+        params=("books_top_n",),
+    ),
+    MetricNode(
+        "M5_median_rating_by_page_length",
+        lambda df, args, canonical: compute_median_rating_by_page_bucket(
+            df,
+            canonical=canonical,
+            **_quantile_options(args),
+        ),
+        requires=("canonical",),
+        params=QUANTILE_PARAMS,
+    ),
+    MetricNode(
+        "M7_average_rating_by_year",
+        lambda df, args, canonical: compute_average_rating_by_publication_year(
+            df,
+            min_year=args.min_year,
+            canonical=canonical,
+        ),
+        requires=("canonical",),
+        params=("min_year",),
+    ),
+    MetricNode(
+        "M8_median_ratings_count_by_year",
+        lambda df, args, canonical: compute_median_ratings_count_by_publication_year(
+            df,
+            min_year=args.min_year,
+            canonical=canonical,
+            **_quantile_options(args),
+        ),
+        requires=("canonical",),
+        params=("min_year", *QUANTILE_PARAMS),
+    ),
+    MetricNode(
+        "M9_language_rating_summary",
+        lambda df, args, canonical: compute_language_rating_summary(
+            df,
+            min_books=args.language_min_books,
+            canonical=canonical,
+            **_quantile_options(args),
+        ),
+        requires=("canonical",),
+        params=("language_min_books", *QUANTILE_PARAMS),
+    ),
+    MetricNode("M11_duplicate_share", lambda df, args: compute_duplicate_share(df)),
+    # Optional / extras metrics
+    MetricNode(
+        "M2_author_engagement_index",
+        lambda df, args, authors: compute_author_engagement_index(df, authors=authors),
+        requires=("authors",),
+    ),
+    MetricNode(
+        "M6_page_length_engagement_delta",
+        lambda df, args, canonical: compute_page_length_engagement_delta(
+            df,
+            canonical=canonical,
+            **_quantile_options(args),
+        ),
+        requires=("canonical",),
+        params=QUANTILE_PARAMS,
+    ),
+    MetricNode(
+        "M10_publisher_engagement",
+        lambda df, args: compute_publisher_engagement(df, **_quantile_options(args)),
+        params=QUANTILE_PARAMS,
+    ),
+    MetricNode(
+        "M12_engagement_uplift_canonical",
+        lambda df, args: compute_engagement_uplift_canonical(df, **_quantile_options(args)),
+        params=QUANTILE_PARAMS,
+    ),
+    MetricNode(
+        "M13_publisher_language_rankings",
+        lambda df, args: compute_publisher_language_rankings(df, **_quantile_options(args)),
+        params=QUANTILE_PARAMS,
+    ),
+    MetricNode(
+        "M14_publication_year_rolling_stats",
+        lambda df, args, canonical: compute_publication_year_rolling_stats(
+            df,
+            _rolling_window(args),
+            canonical=canonical,
+        ),
+        requires=("canonical",),
+        params=("rolling_windows",),
+    ),
+]
+METRIC_IDS = [node.metric_id for node in METRIC_NODES]
+
+# Incremental-mode counterparts, keyed by metric id.
+STATE_DERIVATIONS: dict[str, Callable[[CoreMetricsState, argparse.Namespace], pd.DataFrame]] = {
+    "M1": lambda state, args: incremental.state_top_authors_by_weighted_rating(
+        state,
+        min_ratings=args.author_min_ratings,
+        top_n=args.author_top_n,
+    ),
+    "M3": lambda state, args: incremental.state_top_books_by_ratings_count(state, top_n=args.books_top_n),
+    "M4": lambda state, args: incremental.state_top_books_by_text_reviews(state, top_n=args.books_top_n),
+    "M5": lambda state, args: incremental.state_median_rating_by_page_bucket(state),
+    "M7": lambda state, args: incremental.state_average_rating_by_publication_year(state, min_year=args.min_year),
+    "M8": lambda state, args: incremental.state_median_ratings_count_by_publication_year(
+        state,
+        min_year=args.min_year,
+    ),
+    "M9": lambda state, args: incremental.state_language_rating_summary(state, min_books=args.language_min_books),
+    "M11": lambda state, args: incremental.state_duplicate_share(state),
+    "M2": lambda state, args: incremental.state_author_engagement_index(state),
+    "M6": lambda state, args: incremental.state_page_length_engagement_delta(state),
+    "M10": lambda state, args: incremental.state_publisher_engagement(state),
+    "M12": lambda state, args: incremental.state_engagement_uplift_canonical(state),
+    "M13": lambda state, args: incremental.state_publisher_language_rankings(state),
+    "M14": lambda state, args: incremental.state_publication_year_rolling_stats(state, _rolling_window(args)),
+}
+
+# Metrics that can be answered by slicing the precomputed cube.
+CUBE_DERIVATIONS: dict[str, Callable[[MetricsCube, argparse.Namespace], pd.DataFrame]] = {
+    "M5": lambda cube, args: metrics_cube.cube_median_rating_by_page_bucket(cube),
+    "M7": lambda cube, args: metrics_cube.cube_average_rating_by_publication_year(cube, min_year=args.min_year),
+    "M8": lambda cube, args: metrics_cube.cube_median_ratings_count_by_publication_year(
+        cube,
+        min_year=args.min_year,
+    ),
+    "M9": lambda cube, args: metrics_cube.cube_language_rating_summary(cube, min_books=args.language_min_books),
+    "M10": lambda cube, args: metrics_cube.cube_publisher_engagement(cube),
+    "M13": lambda cube, args: metrics_cube.cube_publisher_language_rankings(cube),
+    "M14": lambda cube, args: metrics_cube.cube_publication_year_rolling_stats(cube, _rolling_window(args)),
+}
+
+
+# Pushdown-mode counterparts: every metric is aggregated inside PostgreSQL.
+PUSHDOWN_DERIVATIONS: dict[str, Callable[[Engine, argparse.Namespace], pd.DataFrame]] = {
+    "M1": lambda engine, args: compute_top_authors_by_weighted_rating(
+        None,
+        min_ratings=args.author_min_ratings,
+        top_n=args.author_top_n,
+        engine=engine,
+    ),
+    "M3": lambda engine, args: compute_top_books_by_ratings_count(None, top_n=args.books_top_n, engine=engine),
+    "M4": lambda engine, args: compute_top_books_by_text_reviews(None, top_n=args.books_top_n, engine=engine),
+    "M5": lambda engine, args: compute_median_rating_by_page_bucket(None, engine=engine),
+    "M7": lambda engine, args: compute_average_rating_by_publication_year(
+        None,
+        min_year=args.min_year,
+        engine=engine,
+    ),
+    "M8": lambda engine, args: compute_median_ratings_count_by_publication_year(
+        None,
+        min_year=args.min_year,
+        engine=engine,
+    ),
+    "M9": lambda engine, args: compute_language_rating_summary(None, min_books=args.language_min_books, engine=engine),
+    "M11": lambda engine, args: compute_duplicate_share(None, engine=engine),
+    "M2": lambda engine, args: compute_author_engagement_index(None, engine=engine),
+    "M6": lambda engine, args: compute_page_length_engagement_delta(None, engine=engine),
+    "M10": lambda engine, args: compute_publisher_engagement(None, engine=engine),
+    "M12": lambda engine, args: compute_engagement_uplift_canonical(None, engine=engine),
+    "M13": lambda engine, args: compute_publisher_language_rankings(None, engine=engine),
+    "M14": lambda engine, args: compute_publication_year_rolling_stats(None, _rolling_window(args), engine=engine),
+}
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -77,6 +358,79 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Optional publication_year lower bound for time-series metrics",
     )
+    parser.add_argument(
+        "--rolling-windows",
+        type=_parse_windows,
+        default=[3],
+        help="Comma-separated M14 rolling window sizes in years, e.g. 3,5,10 (default: 3)",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=_parse_metric_ids,
+        default=None,
+        help="Comma-separated metric IDs to compute, e.g. M1,M9 (default: all)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="Number of threads computing and writing metric tables (default: 1)",
+    )
+    parser.add_argument(
+        "--quantiles",
+        choices=QUANTILE_MODES,
+        default="exact",
+        help="Compute median/p75 columns exactly or from mergeable sketches (default: exact)",
+    )
+    parser.add_argument(
+        "--relative-accuracy",
+        type=_fraction,
+        default=DEFAULT_RELATIVE_ACCURACY,
+        help=f"Relative error bound for --quantiles approx (default: {DEFAULT_RELATIVE_ACCURACY})",
+    )
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--state",
+        default=None,
+        help="Path to the incremental metrics state (.pkl); enables incremental mode",
+    )
+    modes.add_argument(
+        "--cube",
+        default=None,
+        help="Path to the precomputed metrics cube (.npz); built from --books-csv when missing or stale",
+    )
+    modes.add_argument(
+        "--pushdown",
+        action="store_true",
+        help="Aggregate every metric inside PostgreSQL (DATABASE_URL / POSTGRES_* env) instead of reading the CSV",
+    )
+    parser.add_argument(
+        "--delta-csv",
+        default=None,
+        help="Cleaned CSV of new or changed books to merge into --state",
+    )
+    parser.add_argument(
+        "--delta-removed-ids",
+        type=_parse_book_ids,
+        default=None,
+        help="Comma-separated book_id values to remove from --state",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cached metric tables; enables the result cache",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=_positive_int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Least recently used cache entries beyond this count are evicted (default: {DEFAULT_MAX_ENTRIES})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore cached tables and recompute (the cache is refreshed)",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -85,6 +439,44 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+def _parse_metric_ids(value: str) -> list[str]:
+    requested = [token.strip().upper() for token in value.split(",") if token.strip()]
+    unknown = sorted(set(requested) - set(METRIC_IDS))
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"Unknown metric id(s) {unknown}; choose from {', '.join(METRIC_IDS)}"
+        )
+    return requested
+
+
+def _parse_windows(value: str) -> list[int]:
+    windows = [_positive_int(token.strip()) for token in value.split(",") if token.strip()]
+    if not windows:
+        raise argparse.ArgumentTypeError("Expected at least one window size")
+    return sorted(set(windows))
+
+
+def _parse_book_ids(value: str) -> list[int]:
+    try:
+        return sorted({int(token) for token in value.split(",") if token.strip()})
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated book ids, got {value!r}") from exc
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"Expected a positive integer, got {value}")
+    return number
+
+
+def _fraction(value: str) -> float:
+    number = float(value)
+    if not 0 < number < 1:
+        raise argparse.ArgumentTypeError(f"Expected a value between 0 and 1, got {value}")
+    return number
+
+
 def configure_logging(level: str) -> None:
     logging.basicConfig(
         level=getattr(logging, level.upper(), logging.INFO),
@@ -109,56 +501,293 @@ def persist_table(df: pd.DataFrame, output_dir: Path, name: str) -> Path:
     return path
 
 
+def select_metric_nodes(metric_ids: Sequence[str] | None = None) -> list[MetricNode]:
+    """Return the registered nodes for ``metric_ids`` in suite order (default: all)."""
+
+    if not metric_ids:
+        return list(METRIC_NODES)
+    wanted = set(metric_ids)
+    return [node for node in METRIC_NODES if node.metric_id in wanted]
+
+
+def iter_metric_tables(
+    df: pd.DataFrame,
+    args: argparse.Namespace,
+    nodes: Sequence[MetricNode],
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    """Lazily evaluate ``nodes``, sharing and freeing intermediates as they go."""
+
+    pending = Counter(dep for node in nodes for dep in node.requires)
+    intermediates: dict[str, pd.DataFrame] = {}
+
+    for node in nodes:
+        deps: dict[str, pd.DataFrame] = {}
+        for dep in node.requires:
+            if dep not in intermediates:
+                LOGGER.debug("Building intermediate %s", dep)
+                intermediates[dep] = PREREQUISITES[dep](df)
+            deps[dep] = intermediates[dep]
+
+        table = node.compute(df, args, **deps)
+        del deps
+
+        for dep in node.requires:
+            pending[dep] -= 1
+            if pending[dep] == 0:
+                LOGGER.debug("Releasing intermediate %s", dep)
+                del intermediates[dep]
+
+        yield node.name, table
+
+
+def _emit_table(metric_name: str, table: pd.DataFrame | None, output_dir: Path) -> bool:
+    if table is None or table.empty:
+        LOGGER.warning("Metric %s produced an empty table", metric_name)
+        return False
+    persist_table(table, output_dir, metric_name)
+    LOGGER.debug("%s head:\n%s", metric_name, table.head().to_string(index=False))
+    return True
+
+
+def _run_metric_nodes_parallel(
+    df: pd.DataFrame,
+    args: argparse.Namespace,
+    nodes: Sequence[MetricNode],
+    output_dir: Path,
+    workers: int,
+) -> int:
+    # Threads share ``df`` and the intermediates in-process, so nothing is
+    # copied or serialized per worker. Intermediates are submitted first so the
+    # FIFO queue starts them before any metric can block waiting on them.
+    pending = Counter(dep for node in nodes for dep in node.requires)
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metrics") as pool:
+        intermediates: dict[str, Future[pd.DataFrame]] = {
+            dep: pool.submit(PREREQUISITES[dep], df) for dep in pending
+        }
+
+        def compute_and_persist(node: MetricNode) -> bool:
+            with lock:
+                futures = {dep: intermediates[dep] for dep in node.requires}
+            table = node.compute(df, args, **{dep: future.result() for dep, future in futures.items()})
+            del futures
+            with lock:
+                for dep in node.requires:
+                    pending[dep] -= 1
+                    if pending[dep] == 0:
+                        LOGGER.debug("Releasing intermediate %s", dep)
+                        del intermediates[dep]
+            return _emit_table(node.name, table, output_dir)
+
+        results = [pool.submit(compute_and_persist, node) for node in nodes]
+        return sum(future.result() for future in results)
+
+
+def run_metric_nodes(
+    df: pd.DataFrame,
+    args: argparse.Namespace,
+    nodes: Sequence[MetricNode],
+    output_dir: Path,
+    *,
+    workers: int = 1,
+) -> int:
+    """Compute and persist ``nodes``; return the number of non-empty tables written."""
+
+    # Factorize the string group keys once for every metric and intermediate.
+    df = encode_keys(df)
+    if workers <= 1 or len(nodes) <= 1:
+        return sum(
+            _emit_table(metric_name, table, output_dir)
+            for metric_name, table in iter_metric_tables(df, args, nodes)
+        )
+    return _run_metric_nodes_parallel(df, args, nodes, output_dir, workers)
+
+
+def apply_metric_cache(
+    nodes: Sequence[MetricNode],
+    args: argparse.Namespace,
+    cache: MetricCache,
+    books_csv: Path,
+    output_dir: Path,
+) -> tuple[list[MetricNode], int]:
+    """Emit cached tables and return the remaining nodes, wrapped to store their results.
+
+    Also returns the number of non-empty tables served from the cache.
+    """
+
+    fingerprint = file_fingerprint(books_csv)
+    version = code_version(*CACHE_CODE_MODULES, __name__)
+    remaining: list[MetricNode] = []
+    served = 0
+    for node in nodes:
+        params = {name: getattr(args, name, None) for name in node.params}
+        key = cache.key(node.name, params, fingerprint, version)
+        table = cache.get(key, node.name)
+        if table is not None:
+            served += _emit_table(node.name, table, output_dir)
+            continue
+
+        def compute_and_store(df, args, *, _compute=node.compute, _key=key, **deps):
+            table = _compute(df, args, **deps)
+            cache.put(_key, table)
+            return table
+
+        remaining.append(replace(node, compute=compute_and_store))
+    return remaining, served
+
+
+def _requested_accuracy(args: argparse.Namespace) -> float | None:
+    options = _quantile_options(args)
+    return options["relative_accuracy"] if options["quantile_mode"] == "approx" else None
+
+
+def _same_quantiles(stored: float | None, requested: float | None) -> bool:
+    if stored is None or requested is None:
+        return stored is requested
+    return math.isclose(stored, requested)
+
+
+def prepare_metrics_state(args: argparse.Namespace) -> CoreMetricsState:
+    """Load (or build) the incremental state, merge the delta, and save it.
+
+    A stored state built with other quantile settings is rejected rather than
+    rebuilt: it may hold deltas that ``--books-csv`` does not.
+    """
+
+    state_path = Path(args.state)
+    relative_accuracy = _requested_accuracy(args)
+    if state_path.exists():
+        state = incremental.load_state(state_path)
+        if not _same_quantiles(state.relative_accuracy, relative_accuracy):
+            held = state.quantile_mode + (
+                f" (relative accuracy {state.relative_accuracy})" if state.relative_accuracy is not None else ""
+            )
+            raise ValueError(
+                f"Metrics state {state_path} holds {held} quantiles; rerun with matching "
+                "--quantiles/--relative-accuracy or delete it to rebuild from --books-csv"
+            )
+        LOGGER.info("Loaded metrics state for %s books from %s", f"{len(state.books):,}", state_path)
+        if state.relative_accuracy is not None:
+            LOGGER.info("State keeps quantile sketches (relative accuracy %s)", state.relative_accuracy)
+    else:
+        LOGGER.info("No metrics state at %s; building it from the full catalogue", state_path)
+        state = incremental.build_state(
+            load_cleaned_books(Path(args.books_csv)),
+            relative_accuracy=relative_accuracy,
+        )
+
+    removed = getattr(args, "delta_removed_ids", None) or []
+    if args.delta_csv or removed:
+        delta = load_cleaned_books(Path(args.delta_csv)) if args.delta_csv else state.books.iloc[0:0]
+        state = incremental.apply_delta(state, delta, removed)
+        LOGGER.info(
+            "Merged %s changed and removed %s book(s) in the metrics state", f"{len(delta):,}", f"{len(removed):,}"
+        )
+
+    incremental.save_state(state, state_path)
+    LOGGER.info("Saved metrics state to %s", state_path)
+    return state
+
+
+def _stale_cube_reason(cube_path: Path, books_path: Path, relative_accuracy: float | None) -> str | None:
+    """Why the cube at ``cube_path`` cannot serve this run (``None`` when it can)."""
+
+    if not cube_path.exists():
+        return "it does not exist yet"
+    metadata = metrics_cube.cube_metadata(cube_path)
+    if metadata["format"] != metrics_cube.CUBE_FORMAT or metadata["version"] != metrics_cube.CUBE_VERSION:
+        return f"it has format {metadata['format']!r} version {metadata['version']}"
+    stored = metadata["relative_accuracy"]
+    if not _same_quantiles(stored, relative_accuracy):
+        return (
+            f"it holds {metadata['quantile_mode']} quantiles"
+            + (f" (relative accuracy {stored})" if stored is not None else "")
+        )
+    if books_path.exists() and cube_path.stat().st_mtime < books_path.stat().st_mtime:
+        return f"{books_path} is newer"
+    return None
+
+
+def prepare_metrics_cube(args: argparse.Namespace) -> MetricsCube:
+    """Load the cube, rebuilding it when stale or built with other quantile settings."""
+
+    cube_path = Path(args.cube)
+    books_path = Path(args.books_csv)
+    relative_accuracy = _requested_accuracy(args)
+    reason = _stale_cube_reason(cube_path, books_path, relative_accuracy)
+    if reason is None:
+        cube = metrics_cube.load_cube(cube_path)
+        LOGGER.info("Loaded metrics cube (%s cells) from %s", f"{len(cube.editions):,}", cube_path)
+        return cube
+
+    if not books_path.exists():
+        raise FileNotFoundError(f"Cannot rebuild metrics cube {cube_path} ({reason}): {books_path} is missing")
+    LOGGER.info("Building metrics cube from %s because %s", books_path, reason)
+    cube = metrics_cube.build_cube(load_cleaned_books(books_path), relative_accuracy=relative_accuracy)
+    metrics_cube.save_cube(cube, cube_path)
+    LOGGER.info("Saved metrics cube to %s", cube_path)
+    return cube
+
+
 def run(args: argparse.Namespace) -> None:
     configure_logging(args.log_level)
-    df_clean = load_cleaned_books(Path(args.books_csv))
-    min_year = args.min_year
+    nodes = select_metric_nodes(getattr(args, "metrics", None))
+    output_dir = Path(args.output_dir)
 
-    tables = {
-        "M1_top_authors_by_weighted_rating": compute_top_authors_by_weighted_rating(
-            df_clean,
-            min_ratings=args.author_min_ratings,
-            top_n=args.author_top_n,
-        ),
-        "M3_top_books_by_ratings_count": compute_top_books_by_ratings_count(
-            df_clean,
-            top_n=args.books_top_n,
-        ),
-        "M4_top_books_by_text_reviews": compute_top_books_by_text_reviews(
-            df_clean,
-            top_n=args.books_top_n,
-        ),
-        "M5_median_rating_by_page_length": compute_median_rating_by_page_bucket(df_clean),
-        "M7_average_rating_by_year": compute_average_rating_by_publication_year(
-            df_clean,
-            min_year=min_year,
-        ),
-        "M8_median_ratings_count_by_year": compute_median_ratings_count_by_publication_year(
-            df_clean,
-            min_year=min_year,
-        ),
-        "M9_language_rating_summary": compute_language_rating_summary(
-            df_clean,
-            min_books=args.language_min_books,
-        ),
-            "M11_duplicate_share": compute_duplicate_share(df_clean),
-            # Optional / extras metrics
-            "M2_author_engagement_index": compute_author_engagement_index(df_clean),
-            "M6_page_length_engagement_delta": compute_page_length_engagement_delta(df_clean),
-            "M10_publisher_engagement": compute_publisher_engagement(df_clean),
-            "M12_engagement_uplift_canonical": compute_engagement_uplift_canonical(df_clean),
-            "M13_publisher_language_rankings": compute_publisher_language_rankings(df_clean),
-            "M14_publication_year_rolling_stats": compute_publication_year_rolling_stats(df_clean),
-    }
+    if getattr(args, "state", None):
+        state = prepare_metrics_state(args)
+        generated = sum(
+            _emit_table(node.name, STATE_DERIVATIONS[node.metric_id](state, args), output_dir)
+            for node in nodes
+        )
+        LOGGER.info("Generated %d metric tables from incremental state", generated)
+        return
 
-    for metric_name, table in tables.items():
-        if table is None or table.empty:
-            LOGGER.warning("Metric %s produced an empty table", metric_name)
-            continue
-        persist_table(table, Path(args.output_dir), metric_name)
-        LOGGER.debug("%s head:\n%s", metric_name, table.head().to_string(index=False))
+    if getattr(args, "pushdown", False):
+        engine = get_engine()
+        generated = sum(
+            _emit_table(node.name, PUSHDOWN_DERIVATIONS[node.metric_id](engine, args), output_dir)
+            for node in nodes
+        )
+        LOGGER.info("Generated %d metric tables from PostgreSQL", generated)
+        return
+
+    if getattr(args, "cube", None):
+        cube = prepare_metrics_cube(args)
+        sliced = [node for node in nodes if node.metric_id in CUBE_DERIVATIONS]
+        generated = sum(
+            _emit_table(node.name, CUBE_DERIVATIONS[node.metric_id](cube, args), output_dir)
+            for node in sliced
+        )
+        LOGGER.info("Generated %d metric tables from the metrics cube", generated)
+        nodes = [node for node in nodes if node.metric_id not in CUBE_DERIVATIONS]
+        if not nodes:
+            return
+
+    cached = 0
+    if getattr(args, "cache_dir", None):
+        cache = MetricCache(
+            Path(args.cache_dir),
+            max_entries=getattr(args, "cache_max_entries", DEFAULT_MAX_ENTRIES),
+            force=getattr(args, "force", False),
+        )
+        nodes, cached = apply_metric_cache(nodes, args, cache, Path(args.books_csv), output_dir)
+        if not nodes:
+            LOGGER.info("Generated %d metric tables (all from cache)", cached)
+            return
+
+    df_clean = load_cleaned_books(Path(args.books_csv))
+    workers = getattr(args, "workers", 1)
+    LOGGER.info(
+        "Computing %d metric table(s) with %d worker(s): %s",
+        len(nodes),
+        workers,
+        ", ".join(n.metric_id for n in nodes),
+    )
 
-    LOGGER.info("Generated %d metric tables", len([t for t in tables.values() if not t.empty]))
+    generated = run_metric_nodes(df_clean, args, nodes, output_dir, workers=workers) + cached
+    LOGGER.info("Generated %d metric tables", generated)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -5,10 +5,19 @@ queries from ``sql/analysis/`` via PostgreSQL, loads the pandas metrics produced
 by ``p03_core_metrics_suite.py``, and diff-checks every column. The resulting
 summary under ``outputs/phase05_step03_task01/`` powers the README visuals and
 gives reviewers confidence that SQL matches the Python implementation.
+
+``--cache-dir`` reuses SQL results while the query text and the relations it
+reads are unchanged: each table's or materialized view's storage file
+(``relfilenode``) and its insert/update/delete counters. Writes to tables a
+query does not read leave its cached result valid; ``--force`` reruns every
+query. When ``src.materialized_views`` has installed a query as a
+materialized view, its precomputed rows are read instead of rerunning the
+query; ``--no-views`` always runs the SQL files.
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
 import logging
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -18,7 +27,11 @@ import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from src.db_config import build_database_url_from_env
+from src.db_config import get_engine
+from src.materialized_views import installed_views, view_for_sql_file
+from src.metrics.cache import DEFAULT_MAX_ENTRIES, MetricCache
+from src.metrics.selection import top_n_rows
+from src.sql_stream import read_query
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_OUTPUT_DIR = Path("outputs/phase05_step03_task01")
@@ -38,6 +51,8 @@ class ComparisonCase:
     metric_filter: str | None = None
     pandas_min_year: int | None = None
     rounding: dict[str, int] = field(default_factory=dict)
+    # Leaderboard order of the SQL query (column -> ascending); the pandas rows are cut to the same top N.
+    top_n_order: dict[str, bool] = field(default_factory=dict)
 
 
 @dataclass(slots=True)
@@ -61,6 +76,7 @@ COMPARISON_CASES: list[ComparisonCase] = [
         compare_columns=("weighted_average_rating", "total_ratings", "book_count"),
         numeric_columns=("weighted_average_rating", "total_ratings", "book_count"),
         rounding={"weighted_average_rating": 4},
+        top_n_order={"weighted_average_rating": False, "total_ratings": False},
     ),
     ComparisonCase(
         name="M3_top_books_by_ratings_count",
@@ -77,6 +93,7 @@ COMPARISON_CASES: list[ComparisonCase] = [
         numeric_columns=("average_rating", "ratings_count", "ratings_count_capped"),
         metric_filter="ratings_count",
         rounding={"average_rating": 4},
+        top_n_order={"ratings_count_capped": False, "ratings_count": False, "canonical_book_id": True},
     ),
     ComparisonCase(
         name="M4_top_books_by_text_reviews",
@@ -93,6 +110,7 @@ COMPARISON_CASES: list[ComparisonCase] = [
         numeric_columns=("average_rating", "text_reviews_count", "text_reviews_count_capped"),
         metric_filter="text_reviews",
         rounding={"average_rating": 4},
+        top_n_order={"text_reviews_count_capped": False, "text_reviews_count": False, "canonical_book_id": True},
     ),
     ComparisonCase(
         name="M7_average_rating_by_year",
@@ -149,6 +167,28 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=str(DEFAULT_OUTPUT_DIR),
         help="Directory for comparison summaries (default: outputs/phase05_step03_task01)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cached SQL results; enables the query cache",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Least recently used cache entries beyond this count are evicted (default: {DEFAULT_MAX_ENTRIES})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore cached SQL results and rerun every query",
+    )
+    parser.add_argument(
+        "--no-views",
+        dest="use_views",
+        action="store_false",
+        help="Run the SQL files even when their materialized views are installed",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -164,20 +204,76 @@ def configure_logging(level: str) -> None:
     )
 
 
-def create_engine_from_env() -> Engine:
-    database_url = build_database_url_from_env()
-    LOGGER.debug("Connecting to %s", database_url)
-    from sqlalchemy import create_engine
-
-    return create_engine(database_url)
+def resolve_query(engine: Engine, sql_path: Path, *, use_views: bool = True) -> str:
+    """The SQL file's query, or a select from its materialized view when installed."""
 
-
-def run_sql_file(engine: Engine, sql_path: Path) -> pd.DataFrame:
     if not sql_path.exists():
         raise FileNotFoundError(f"SQL file not found: {sql_path}")
-    query = sql_path.read_text(encoding="utf-8")
+    view = view_for_sql_file(sql_path) if use_views else None
+    if view is not None and view in installed_views(engine):
+        LOGGER.info("Reading %s from materialized view %s", sql_path, view.name)
+        return view.select_sql()
+    return sql_path.read_text(encoding="utf-8")
+
+
+def run_sql_file(engine: Engine, sql_path: Path, *, use_views: bool = True) -> pd.DataFrame:
+    """Run the SQL file (or its view) through a server-side cursor (see ``read_query``)."""
+
+    return read_query(engine, resolve_query(engine, sql_path, use_views=use_views))
+
+
+def _plan_relations(plan: dict) -> set[tuple[str, str]]:
+    relations = {(plan["Schema"], plan["Relation Name"])} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        relations |= _plan_relations(child)
+    return relations
+
+
+def query_fingerprint(engine: Engine, query: str) -> str:
+    """Change token for ``query``: the storage file and write counters of every relation it reads.
+
+    The relations come from the query plan, so plain views resolve to their
+    base tables and a materialized view to itself. ``relfilenode`` changes
+    when a table is truncated, rewritten or swapped in by a rename, or a view
+    is refreshed; the ``pg_stat_user_tables`` counters move with row writes.
+    """
+
+    counters_sql = text(
+        """
+        SELECT n.nspname, c.relname, c.relfilenode, s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+        FROM pg_class AS c
+        JOIN pg_namespace AS n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+        WHERE (n.nspname::text, c.relname::text) IN (
+            SELECT * FROM unnest(CAST(:schemas AS text[]), CAST(:names AS text[]))
+        )
+        ORDER BY n.nspname, c.relname
+        """
+    )
     with engine.connect() as conn:
-        return pd.read_sql_query(text(query), conn)
+        plan = conn.execute(text(f"EXPLAIN (VERBOSE, FORMAT JSON)\n{query}")).scalar_one()
+        relations = sorted(_plan_relations(plan[0]["Plan"]))
+        params = {"schemas": [schema for schema, _ in relations], "names": [name for _, name in relations]}
+        rows = [tuple(row) for row in conn.execute(counters_sql, params)]
+    return hashlib.blake2b(repr((relations, rows)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def run_sql_file_cached(
+    engine: Engine,
+    sql_path: Path,
+    cache: MetricCache | None,
+    *,
+    use_views: bool = True,
+) -> pd.DataFrame:
+    if cache is None:
+        return run_sql_file(engine, sql_path, use_views=use_views)
+    query = resolve_query(engine, sql_path, use_views=use_views)
+    params = {
+        "sql": query,
+        "database": engine.url.render_as_string(hide_password=True),
+    }
+    fingerprint = query_fingerprint(engine, query)
+    return cache.get_or_compute(str(sql_path), params, fingerprint, "sql", lambda: read_query(engine, query))
 
 
 def load_pandas_table(csv_path: Path) -> pd.DataFrame:
@@ -205,6 +301,12 @@ def apply_case_adjustments(case: ComparisonCase, df_sql: pd.DataFrame, df_pandas
     if "canonical_book_count" in sql_df.columns and "book_count" not in sql_df.columns:
         sql_df = sql_df.rename(columns={"canonical_book_count": "book_count"})
 
+    if case.top_n_order:
+        # The pandas leaderboard may be longer (--books-top-n); rank it like the SQL with the shared selector.
+        pandas_df = top_n_rows(
+            pandas_df, list(case.top_n_order), len(sql_df), ascending=list(case.top_n_order.values())
+        )
+
     return sql_df, pandas_df
 
 
@@ -232,9 +334,12 @@ def compare_case(
     engine: Engine,
     output_dir: Path,
     numeric_tolerance: float = DEFAULT_NUMERIC_TOLERANCE,
+    *,
+    cache: MetricCache | None = None,
+    use_views: bool = True,
 ) -> ComparisonResult:
     LOGGER.info("Running SQL for %s", case.name)
-    df_sql_raw = run_sql_file(engine, case.sql_file)
+    df_sql_raw = run_sql_file_cached(engine, case.sql_file, cache, use_views=use_views)
     df_pandas_raw = load_pandas_table(case.pandas_csv)
     df_sql, df_pandas = apply_case_adjustments(case, df_sql_raw, df_pandas_raw)
 
@@ -353,10 +458,20 @@ def run(args: argparse.Namespace) -> None:
     except KeyError as exc:  # pragma: no cover - safeguarded by argparse choices
         raise ValueError(f"Unknown case requested: {exc}") from exc
 
-    engine = create_engine_from_env()
+    engine = get_engine()
+    cache: MetricCache | None = None
+    if args.cache_dir:
+        cache = MetricCache(Path(args.cache_dir), max_entries=args.cache_max_entries, force=args.force)
+
     results: list[ComparisonResult] = []
     for case in selected_cases:
-        result = compare_case(case, engine, output_dir)
+        result = compare_case(
+            case,
+            engine,
+            output_dir,
+            cache=cache,
+            use_views=args.use_views,
+        )
         results.append(result)
 
     persist_summary(results, output_dir)
@@ -13,10 +13,10 @@ from pathlib import Path
 from typing import Final
 
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from src.db_config import build_database_url_from_env
+from src.db_config import get_engine
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_CSV_PATH = Path("data/books.csv")
@@ -110,12 +110,6 @@ def compute_csv_metrics(csv_path: Path) -> dict[str, object]:
     return metrics
 
 
-def create_engine_from_env() -> Engine:
-    database_url = build_database_url_from_env()
-    LOGGER.debug("Connecting to %s", database_url)
-    return create_engine(database_url)
-
-
 def fetch_postgres_metrics(engine: Engine, schema: str, table: str) -> dict[str, object]:
     sql = text(
         f"""
@@ -236,7 +230,7 @@ def run(args: argparse.Namespace) -> None:
     table = validate_identifier(args.table, "Table")
 
     csv_metrics = compute_csv_metrics(csv_path)
-    engine = create_engine_from_env()
+    engine = get_engine()
     pg_metrics = fetch_postgres_metrics(engine, schema, table)
 
     records = build_comparison_records(csv_metrics, pg_metrics)
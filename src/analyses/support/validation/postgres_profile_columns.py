@@ -12,10 +12,11 @@ from pathlib import Path
 from typing import Final
 
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from src.db_config import build_database_url_from_env
+from src.db_config import get_engine
+from src.sql_stream import export_query_csv
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_SCHEMA: Final[str] = "public"
@@ -77,12 +78,6 @@ def validate_identifier(value: str, label: str) -> str:
     return value
 
 
-def create_db_engine() -> Engine:
-    database_url = build_database_url_from_env()
-    LOGGER.debug("Connecting to %s", database_url)
-    return create_engine(database_url)
-
-
 def fetch_null_and_distinct_counts(engine: Engine, schema: str, table: str) -> pd.DataFrame:
     rows = []
     with engine.connect() as conn:
@@ -122,22 +117,24 @@ def fetch_numeric_ranges(engine: Engine, schema: str, table: str) -> pd.DataFram
     return df
 
 
-def fetch_top_categories(engine: Engine, schema: str, table: str, top_n: int) -> dict[str, pd.DataFrame]:
-    outputs: dict[str, pd.DataFrame] = {}
-    with engine.connect() as conn:
-        for label, column in CATEGORY_QUERIES.items():
-            sql = text(
-                f"""
-                SELECT {column} AS value, COUNT(*) AS row_count
-                FROM {schema}.{table}
-                GROUP BY {column}
-                ORDER BY row_count DESC, value
-                LIMIT :top_n
-                """
-            )
-            df = pd.read_sql(sql, conn, params={"top_n": top_n})
-            outputs[label] = df
-            LOGGER.info("Computed top %d distribution for %s", top_n, column)
+def export_top_categories(engine: Engine, schema: str, table: str, top_n: int, output_dir: Path) -> dict[str, Path]:
+    """Stream each top-N distribution straight into ``books_top_<label>.csv``."""
+
+    outputs: dict[str, Path] = {}
+    for label, column in CATEGORY_QUERIES.items():
+        sql = text(
+            f"""
+            SELECT {column} AS value, COUNT(*) AS row_count
+            FROM {schema}.{table}
+            GROUP BY {column}
+            ORDER BY row_count DESC, value
+            LIMIT :top_n
+            """
+        )
+        csv_path = output_dir / f"books_top_{label}.csv"
+        export_query_csv(engine, sql, csv_path, params={"top_n": top_n})
+        outputs[label] = csv_path
+        LOGGER.info("Computed top %d distribution for %s", top_n, column)
     return outputs
 
 
@@ -162,22 +159,18 @@ def run(args: argparse.Namespace) -> None:
     table = validate_identifier(args.table, "Table")
     top_n = args.top_n
 
-    engine = create_db_engine()
+    engine = get_engine()
     output_dir = Path(args.output_dir)
 
     nulls_df = fetch_null_and_distinct_counts(engine, schema, table)
     ranges_df = fetch_numeric_ranges(engine, schema, table)
-    category_tables = fetch_top_categories(engine, schema, table, top_n)
+    category_tables = export_top_categories(engine, schema, table, top_n, output_dir)
 
     persist_dataframe(nulls_df, output_dir / "books_null_distinct_summary.csv")
     persist_dataframe(ranges_df, output_dir / "books_numeric_ranges.csv")
     persist_markdown(nulls_df, output_dir / "books_null_distinct_summary.md")
     persist_markdown(ranges_df, output_dir / "books_numeric_ranges.md")
 
-    for label, df in category_tables.items():
-        csv_path = output_dir / f"books_top_{label}.csv"
-        persist_dataframe(df, csv_path)
-
     LOGGER.info(
         "Profiling complete – %d columns analyzed, category tables: %s",
         len(nulls_df),
@@ -12,10 +12,11 @@ from pathlib import Path
 from typing import Final
 
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from src.db_config import build_database_url_from_env
+from src.db_config import get_engine
+from src.sql_stream import export_query_csv
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_TABLE: Final[str] = "books"
@@ -68,12 +69,6 @@ def configure_logging(level: str) -> None:
     )
 
 
-def create_db_engine() -> Engine:
-    database_url = build_database_url_from_env()
-    LOGGER.debug("Connecting to PostgreSQL at %s", database_url)
-    return create_engine(database_url)
-
-
 def validate_identifier(value: str, label: str) -> str:
     if not value.replace("_", "").isalnum():
         raise ValueError(f"{label} must be alphanumeric with optional underscores. Got: {value}")
@@ -105,14 +100,15 @@ def fetch_row_count(engine: Engine, schema: str, table: str) -> int:
     return int(count)
 
 
-def fetch_sample(engine: Engine, schema: str, table: str, order_column: str, limit: int) -> pd.DataFrame:
+def export_sample(engine: Engine, schema: str, table: str, order_column: str, limit: int, output_path: Path) -> int:
+    """Stream the preview rows into ``output_path`` a chunk at a time, formatted by pandas."""
+
     stmt = text(
         f"SELECT * FROM {schema}.{table} ORDER BY {order_column} LIMIT :limit"
     )
-    with engine.connect() as conn:
-        df_sample = pd.read_sql(stmt, conn, params={"limit": limit})
-    LOGGER.info("Retrieved %d preview rows from %s.%s", len(df_sample), schema, table)
-    return df_sample
+    rows = export_query_csv(engine, stmt, output_path, params={"limit": limit})
+    LOGGER.info("Retrieved %d preview rows from %s.%s", rows, schema, table)
+    return rows
 
 
 def persist_dataframe(df: pd.DataFrame, output_path: Path) -> Path:
@@ -128,15 +124,14 @@ def run(args: argparse.Namespace) -> None:
     table = validate_identifier(args.table, "Table")
     order_column = validate_identifier(args.order_column, "Order column")
 
-    engine = create_db_engine()
+    engine = get_engine()
 
     columns_df = fetch_columns(engine, schema, table)
     row_count = fetch_row_count(engine, schema, table)
-    sample_df = fetch_sample(engine, schema, table, order_column, args.sample_limit)
 
     output_dir = Path(args.output_dir)
     persist_dataframe(columns_df, output_dir / f"{table}_schema_snapshot.csv")
-    persist_dataframe(sample_df, output_dir / f"{table}_sample_preview.csv")
+    export_sample(engine, schema, table, order_column, args.sample_limit, output_dir / f"{table}_sample_preview.csv")
 
     LOGGER.info(
         "Validation summary – table: %s.%s, columns: %d, rows: %s, sample saved to %s",
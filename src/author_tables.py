@@ -0,0 +1,166 @@
+"""Normalized author tables: an ``authors`` dimension and a ``book_authors`` bridge.
+
+``explode_authors`` yields one row per (book, author) link that repeats the
+author name and the full raw author string. The loaders store each distinct
+name once in ``authors`` (``author_id``, ``author_name``) and the links as
+integers in ``book_authors`` (``book_id``, ``author_id``, ``author_order``),
+so SQL author aggregations join and group on integer keys.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, SmallInteger, Text, text
+from sqlalchemy.engine import Connection, Engine
+
+from .bulk_load import copy_frame_into, stage_frame, write_frame
+from .cleaning import explode_authors
+from .schema import ensure_authors_schema, ensure_book_authors_schema
+
+LOGGER = logging.getLogger(__name__)
+AUTHORS_TABLE = "authors"
+BOOK_AUTHORS_TABLE = "book_authors"
+LINK_COLUMNS = ["book_id", "author_order", "author_name", "raw_authors"]
+
+AUTHORS_DTYPES = {"author_id": Integer(), "author_name": Text()}
+BOOK_AUTHORS_DTYPES = {"book_id": Integer(), "author_id": Integer(), "author_order": SmallInteger()}
+
+
+@dataclass(frozen=True)
+class AuthorTables:
+    """Rows for the ``authors`` dimension and the ``book_authors`` bridge."""
+
+    authors: pd.DataFrame
+    book_authors: pd.DataFrame
+
+
+def author_links(df: pd.DataFrame) -> pd.DataFrame:
+    """Explode ``df`` into one row per (book, author) link (columns kept even when empty)."""
+
+    subset = df[["book_id", "authors_clean", "authors_raw"]].copy()
+    return explode_authors(subset).reindex(columns=LINK_COLUMNS)
+
+
+def build_author_tables(
+    links: pd.DataFrame,
+    known: pd.DataFrame | None = None,
+    *,
+    first_id: int | None = None,
+) -> AuthorTables:
+    """Number the distinct author names of ``links`` and map the links onto the ids.
+
+    New names are numbered in sorted order from ``first_id`` (default: one
+    past the largest id in ``known``, else 1). Names found in ``known`` (stored
+    ``authors`` rows) keep their ids and are left out of the returned
+    dimension, so it only holds the rows still to be inserted.
+    """
+
+    names = links["author_name"].astype("str")
+    existing = pd.Series(dtype="int64")
+    if known is not None and not known.empty:
+        existing = pd.Series(known["author_id"].to_numpy(dtype="int64"), index=known["author_name"].astype("str"))
+    if first_id is None:
+        first_id = int(existing.max()) + 1 if len(existing) else 1
+
+    new_names = pd.Index(names.unique(), dtype="str").difference(existing.index).sort_values()
+    new_ids = np.arange(first_id, first_id + len(new_names), dtype="int64")
+    authors = pd.DataFrame({"author_id": new_ids, "author_name": new_names.to_numpy()})
+    ids = pd.concat([existing, pd.Series(new_ids, index=new_names)])
+    book_authors = pd.DataFrame(
+        {
+            "book_id": links["book_id"].to_numpy(dtype="int64"),
+            "author_id": ids.reindex(names).to_numpy(dtype="int64"),
+            "author_order": links["author_order"].to_numpy(dtype="int64"),
+        }
+    )
+    return AuthorTables(authors, book_authors)
+
+
+def ensure_author_tables_schema(engine: Engine, *, concurrently: bool = False) -> None:
+    ensure_authors_schema(engine, AUTHORS_TABLE, concurrently=concurrently)
+    ensure_book_authors_schema(engine, BOOK_AUTHORS_TABLE, concurrently=concurrently)
+
+
+def write_author_tables(df: pd.DataFrame, connection: Connection, *, method: str = "copy") -> AuthorTables:
+    """Replace ``authors`` and ``book_authors`` with the links of ``df`` inside the caller's transaction."""
+
+    tables = build_author_tables(author_links(df))
+    LOGGER.info(
+        "Writing %d authors and %d book-author links",
+        len(tables.authors),
+        len(tables.book_authors),
+    )
+    write_frame(tables.authors, AUTHORS_TABLE, connection, dtype=AUTHORS_DTYPES, method=method)
+    write_frame(tables.book_authors, BOOK_AUTHORS_TABLE, connection, dtype=BOOK_AUTHORS_DTYPES, method=method)
+    return tables
+
+
+def load_author_tables(df: pd.DataFrame, engine: Engine, *, method: str = "copy") -> AuthorTables:
+    """Replace ``authors`` and ``book_authors`` with the links of ``df`` (indexed on PostgreSQL)."""
+
+    with engine.begin() as connection:
+        tables = write_author_tables(df, connection, method=method)
+    if engine.dialect.name == "postgresql":
+        ensure_author_tables_schema(engine)
+    return tables
+
+
+def stage_author_tables(df: pd.DataFrame, engine: Engine, *, method: str = "copy") -> None:
+    """Stage and index both author tables for a swap load (see ``bulk_load.stage_frame``)."""
+
+    tables = build_author_tables(author_links(df))
+    LOGGER.info("Staging %d authors and %d book-author links", len(tables.authors), len(tables.book_authors))
+    stage_frame(tables.authors, AUTHORS_TABLE, engine, dtype=AUTHORS_DTYPES, method=method, prepare=ensure_authors_schema)
+    stage_frame(
+        tables.book_authors,
+        BOOK_AUTHORS_TABLE,
+        engine,
+        dtype=BOOK_AUTHORS_DTYPES,
+        method=method,
+        prepare=ensure_book_authors_schema,
+    )
+
+
+def refresh_book_author_links(df: pd.DataFrame, book_ids: list, connection: Connection) -> None:
+    """Re-link only ``book_ids`` inside the caller's transaction.
+
+    Unseen names get new ids, and authors whose last link was rewritten away
+    are deleted from ``authors``.
+    """
+
+    if not book_ids:
+        return
+    unlinked = connection.execute(
+        text(f"DELETE FROM {BOOK_AUTHORS_TABLE} WHERE book_id = ANY(:book_ids) RETURNING author_id"),
+        {"book_ids": [int(book_id) for book_id in book_ids]},
+    ).scalars().all()
+    links = author_links(df.loc[df["book_id"].isin(book_ids)])
+    known = pd.read_sql_query(
+        text(f"SELECT author_id, author_name FROM {AUTHORS_TABLE} WHERE author_name = ANY(:names)"),
+        connection,
+        params={"names": links["author_name"].unique().tolist()},
+    )
+    first_id = connection.execute(text(f"SELECT COALESCE(MAX(author_id), 0) + 1 FROM {AUTHORS_TABLE}")).scalar_one()
+    tables = build_author_tables(links, known, first_id=int(first_id))
+    copy_frame_into(tables.authors, AUTHORS_TABLE, connection)
+    copy_frame_into(tables.book_authors, BOOK_AUTHORS_TABLE, connection)
+    orphaned = connection.execute(
+        text(
+            f"""
+            DELETE FROM {AUTHORS_TABLE} AS a
+            WHERE a.author_id = ANY(:author_ids)
+              AND NOT EXISTS (SELECT 1 FROM {BOOK_AUTHORS_TABLE} AS ba WHERE ba.author_id = a.author_id)
+            """
+        ),
+        {"author_ids": sorted(set(unlinked))},
+    ).rowcount
+    LOGGER.info(
+        "Refreshed %s author links (%d new, %d orphaned authors removed) for %d changed book(s)",
+        f"{len(tables.book_authors):,}",
+        len(tables.authors),
+        orphaned,
+        len(book_ids),
+    )
@@ -0,0 +1,283 @@
+"""Bulk-load DataFrames into PostgreSQL with ``COPY ... FROM STDIN``.
+
+``DataFrame.to_sql`` defaults to batched INSERT statements. :func:`write_frame`
+keeps ``to_sql`` for table creation (so ``if_exists`` and the loaders'
+``DTYPE_MAP`` behave as before) but hands every chunk of rows to
+:func:`copy_rows`, which streams it through psycopg2's ``copy_expert``. Only
+one chunk is rendered as CSV at a time, so memory stays bounded however large
+the frame is. Non-PostgreSQL connections (e.g. the SQLite stand-in used by the
+benchmarks) fall back to INSERTs.
+
+:func:`write_frame_via_swap` reloads a live table without taking it away from
+readers: the rows go into an UNLOGGED staging table, which is indexed and
+analyzed before it replaces the live table in one rename transaction.
+:func:`stage_frame` stops before that rename, so several tables can be staged
+in parallel and published together.
+:func:`merge_frame` applies changes in place instead. Given a delta (the
+upserted rows plus the deleted keys) it ships only those rows; given a full
+snapshot it copies the snapshot into a temporary table and diffs it there,
+so only inserted, changed or vanished keys touch the live table.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.types import TypeEngine
+
+from .schema import (
+    _validate_identifier,
+    create_unlogged_staging_table,
+    publish_staging_tables,
+    seal_staging_table,
+    staging_table_name,
+)
+
+LOGGER = logging.getLogger(__name__)
+LOAD_METHODS = ("copy", "insert")
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+@dataclass(frozen=True)
+class MergeStats:
+    """Keys a :func:`merge_frame` call inserted or updated, and keys it deleted."""
+
+    table: str
+    upserted: list
+    deleted: list
+
+    @property
+    def changed(self) -> list:
+        return [*self.upserted, *self.deleted]
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    """Rows written to one table and how long it took."""
+
+    table: str
+    rows: int
+    seconds: float
+    method: str
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+
+def _csv_field(value: object) -> str:
+    # An unquoted empty field is NULL in COPY's CSV format; every value is
+    # quoted so empty strings stay distinct from missing values.
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_chunk(connection: Connection, name: str, keys: Sequence[str], data_iter: Iterable[tuple]) -> int:
+    buffer = io.StringIO()
+    rows = 0
+    for row in data_iter:
+        buffer.write(",".join(map(_csv_field, row)))
+        buffer.write("\n")
+        rows += 1
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{key}"' for key in keys)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    return rows
+
+
+def copy_rows(table, connection: Connection, keys: list[str], data_iter: Iterable[tuple]) -> int:
+    """``to_sql(method=...)`` hook: write one chunk of rows with ``COPY ... FROM STDIN``."""
+
+    name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    return _copy_chunk(connection, name, keys, data_iter)
+
+
+def copy_frame_into(
+    frame: pd.DataFrame,
+    table_name: str,
+    connection: Connection,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """COPY ``frame`` into an existing (possibly temporary) table, one chunk at a time."""
+
+    rows = 0
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start : start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        rows += _copy_chunk(connection, f'"{table_name}"', list(frame.columns), chunk.itertuples(index=False, name=None))
+    return rows
+
+
+def write_frame(
+    frame: pd.DataFrame,
+    table_name: str,
+    connection: Connection,
+    *,
+    if_exists: str = "replace",
+    dtype: Mapping[str, TypeEngine] | None = None,
+    method: str = "copy",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> LoadStats:
+    """Write ``frame`` to ``table_name`` and log the achieved rows/s."""
+
+    if method not in LOAD_METHODS:
+        raise ValueError(f"method must be one of {LOAD_METHODS}; got {method!r}")
+    if method == "copy" and connection.dialect.name != "postgresql":
+        LOGGER.info("COPY needs PostgreSQL (got %s); writing %s with INSERTs", connection.dialect.name, table_name)
+        method = "insert"
+
+    start = time.perf_counter()
+    frame.to_sql(
+        table_name,
+        connection,
+        if_exists=if_exists,
+        index=False,
+        dtype=dtype,
+        method=copy_rows if method == "copy" else None,
+        chunksize=chunk_rows,
+    )
+    stats = LoadStats(table_name, len(frame), time.perf_counter() - start, method)
+    LOGGER.info(
+        "Wrote %s rows to %s via %s in %.2fs (%s rows/s)",
+        f"{stats.rows:,}",
+        table_name,
+        method,
+        stats.seconds,
+        f"{stats.rows_per_second:,.0f}",
+    )
+    return stats
+
+
+def stage_frame(
+    frame: pd.DataFrame,
+    table_name: str,
+    engine: Engine,
+    *,
+    dtype: Mapping[str, TypeEngine] | None = None,
+    method: str = "copy",
+    prepare: Callable[[Engine, str], None] | None = None,
+) -> LoadStats:
+    """Load ``frame`` into the UNLOGGED staging table for ``table_name``, then seal it.
+
+    ``prepare(engine, staging_name)`` runs once the table is sealed, e.g.
+    ``ensure_books_clean_schema`` to build the primary key and indexes on the
+    staging table rather than maintaining them during the insert; like the
+    ``ensure_*_schema`` helpers it is expected to finish with ANALYZE. Sealing
+    first means ``SET LOGGED`` copies only the heap and the indexes are built
+    (and WAL-logged) once. Nothing is published; pass the staging name to
+    ``publish_staging_tables``.
+    """
+
+    if engine.dialect.name != "postgresql":
+        raise ValueError(f"Swap loads need PostgreSQL; got {engine.dialect.name}")
+    staging = staging_table_name(table_name)
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{staging}"'))
+        frame.head(0).to_sql(staging, connection, index=False, dtype=dtype)
+    create_unlogged_staging_table(engine, staging)
+
+    with engine.begin() as connection:
+        stats = write_frame(frame, staging, connection, if_exists="append", dtype=dtype, method=method)
+    seal_staging_table(engine, staging, analyze=prepare is None)
+    if prepare is not None:
+        prepare(engine, staging)
+    return LoadStats(table_name, stats.rows, stats.seconds, stats.method)
+
+
+def write_frame_via_swap(
+    frame: pd.DataFrame,
+    table_name: str,
+    engine: Engine,
+    *,
+    dtype: Mapping[str, TypeEngine] | None = None,
+    method: str = "copy",
+    prepare: Callable[[Engine, str], None] | None = None,
+) -> LoadStats:
+    """Load ``frame`` through :func:`stage_frame` and atomically swap it in."""
+
+    stats = stage_frame(frame, table_name, engine, dtype=dtype, method=method, prepare=prepare)
+    staging = staging_table_name(table_name)
+    with engine.begin() as connection:
+        publish_staging_tables(connection, {staging: table_name})
+    LOGGER.info("Swapped %s into %s", staging, table_name)
+    return stats
+
+
+def merge_frame(
+    frame: pd.DataFrame,
+    table_name: str,
+    connection: Connection,
+    *,
+    key: str,
+    deleted_keys: Iterable | None = None,
+) -> MergeStats:
+    """Upsert ``frame`` into ``table_name`` by ``key`` (PostgreSQL only).
+
+    With ``deleted_keys`` the call applies a delta: ``frame`` holds only the
+    new or changed rows and ``deleted_keys`` the keys to remove, so the
+    transfer is proportional to the change. Without it ``frame`` is a full
+    snapshot, used when the caller has no change log (e.g. a re-exported
+    CSV): every row is shipped, diffed server-side, and keys absent from it
+    are deleted.
+
+    The rows are COPYed into a temporary table shaped like the target, then a
+    single ``INSERT ... ON CONFLICT (key) DO UPDATE`` writes only the rows
+    that are new or differ from the stored ones. ``key`` needs a unique
+    constraint on the target, and every statement runs in the caller's
+    transaction.
+    """
+
+    table = _validate_identifier(table_name)
+    temp = _validate_identifier(f"{table}_merge")
+    columns = [f'"{column}"' for column in frame.columns]
+    updates = [column for column in columns if column != f'"{key}"']
+    connection.execute(text(f'CREATE TEMP TABLE "{temp}" (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DROP'))
+    copy_frame_into(frame, temp, connection)
+
+    conflict = "DO NOTHING"
+    if updates:
+        conflict = f"""DO UPDATE
+        SET {", ".join(f"{column} = EXCLUDED.{column}" for column in updates)}
+        WHERE ({", ".join(f'"{table}".{column}' for column in updates)})
+            IS DISTINCT FROM ({", ".join(f"EXCLUDED.{column}" for column in updates)})"""
+    upsert = text(
+        f"""
+        INSERT INTO "{table}" ({", ".join(columns)})
+        SELECT {", ".join(columns)} FROM "{temp}"
+        ON CONFLICT ("{key}") {conflict}
+        RETURNING "{key}"
+        """
+    )
+    upserted = connection.execute(upsert).scalars().all()
+    if deleted_keys is not None:
+        delete = text(f'DELETE FROM "{table}" WHERE "{key}" = ANY(:keys) RETURNING "{key}"')
+        deleted = connection.execute(delete, {"keys": list(deleted_keys)}).scalars().all()
+    else:
+        delete = text(
+            f"""
+            DELETE FROM "{table}" AS target
+            WHERE NOT EXISTS (SELECT 1 FROM "{temp}" AS snapshot WHERE snapshot."{key}" = target."{key}")
+            RETURNING target."{key}"
+            """
+        )
+        deleted = connection.execute(delete).scalars().all()
+    connection.execute(text(f'DROP TABLE "{temp}"'))
+    LOGGER.info(
+        "Merged %s %s rows into %s: %d inserted or updated, %d deleted",
+        f"{len(frame):,}",
+        "snapshot" if deleted_keys is None else "delta",
+        table,
+        len(upserted),
+        len(deleted),
+    )
+    return MergeStats(table, upserted, deleted)
@@ -6,18 +6,32 @@ para SQLAlchemy.
 
 Se integra con la configuración basada en Docker descrita en
 ``docker-compose.postgresql.yml`` y en el archivo ``.env``.
+
+``get_engine`` es la única fábrica de ``Engine`` del proyecto: devuelve un
+engine compartido (uno por URL y opciones) para que los loaders, los
+validadores y ``run_full_pipeline`` reutilicen el mismo pool de conexiones
+dentro de un proceso.
 """
 from __future__ import annotations
 
 import os
+import threading
 from typing import Final
 
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+
 
 DEFAULT_DB_NAME: Final[str] = "goodreads"
 DEFAULT_DB_USER: Final[str] = "goodreads_user"
 DEFAULT_DB_PASSWORD: Final[str] = ""
 DEFAULT_DB_HOST: Final[str] = "localhost"
 DEFAULT_DB_PORT: Final[str] = "5432"
+DEFAULT_POOL_SIZE: Final[int] = 5
+DEFAULT_MAX_OVERFLOW: Final[int] = 10
+
+_ENGINES: dict[tuple, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
 
 
 def build_database_url_from_env() -> str:
@@ -53,3 +67,66 @@ def build_database_url_from_env() -> str:
         )
 
     return f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+
+def _int_from_env(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def get_engine(
+    database_url: str | None = None,
+    *,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    pool_pre_ping: bool = True,
+    statement_timeout_ms: int | None = None,
+) -> Engine:
+    """Devuelve un ``Engine`` compartido para ``database_url`` (por defecto, el del entorno).
+
+    Los engines se guardan en caché por URL y opciones, de modo que todas las
+    llamadas de un mismo proceso comparten un único pool. Las opciones no
+    indicadas se leen de ``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW`` y
+    ``DB_STATEMENT_TIMEOUT_MS``; ``pool_pre_ping`` descarta conexiones caídas
+    antes de usarlas. El tamaño de pool y el ``statement_timeout`` solo se
+    aplican a PostgreSQL.
+    """
+
+    url = database_url or build_database_url_from_env()
+    options = (
+        url,
+        pool_size if pool_size is not None else _int_from_env("DB_POOL_SIZE", DEFAULT_POOL_SIZE),
+        max_overflow if max_overflow is not None else _int_from_env("DB_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW),
+        pool_pre_ping,
+        statement_timeout_ms if statement_timeout_ms is not None else _int_from_env("DB_STATEMENT_TIMEOUT_MS", None),
+    )
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(options)
+        if engine is None:
+            engine = _ENGINES[options] = _create_engine(*options)
+        return engine
+
+
+def _create_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_pre_ping: bool,
+    statement_timeout_ms: int | None,
+) -> Engine:
+    kwargs: dict[str, object] = {"pool_pre_ping": pool_pre_ping}
+    if make_url(url).get_backend_name() == "postgresql":
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow)
+        if statement_timeout_ms:
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout_ms)}"}
+    return create_engine(url, **kwargs)
+
+
+def dispose_engines() -> None:
+    """Cierra los pools de todos los engines en caché y vacía la caché."""
+
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for engine in engines:
+        engine.dispose()
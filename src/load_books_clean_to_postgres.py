@@ -3,20 +3,35 @@ from __future__ import annotations
 
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
-from sqlalchemy import Boolean, Date, Integer, Numeric, String, Text, create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy import Boolean, Date, Integer, Numeric, String, Text, inspect, text
+from sqlalchemy.engine import Connection, Engine
 
-from .cleaning import explode_authors
-from .db_config import build_database_url_from_env
-from .schema import ensure_books_clean_schema
+from .author_tables import (
+    AUTHORS_TABLE,
+    BOOK_AUTHORS_TABLE,
+    ensure_author_tables_schema,
+    refresh_book_author_links,
+    stage_author_tables,
+    write_author_tables,
+)
+from .bulk_load import LOAD_METHODS, merge_frame, stage_frame, write_frame
+from .db_config import get_engine
+from .materialized_views import maintained_views, rebuilt_views
+from .schema import (
+    create_year_partitioned_table,
+    ensure_books_clean_schema,
+    is_partitioned,
+    publish_staging_tables,
+    staging_table_name,
+)
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_CSV = Path("data/derived/books_clean.csv")
 DEFAULT_TABLE = "books_clean"
-AUTHOR_STAGE_TABLE = "book_authors_stage"
 
 INT_COLUMNS = [
     "book_id",
@@ -64,11 +79,6 @@ DTYPE_MAP = {
 }
 
 
-def get_engine() -> Engine:
-    database_url = build_database_url_from_env()
-    return create_engine(database_url)
-
-
 def read_books_clean(csv_path: Path) -> pd.DataFrame:
     LOGGER.info("Reading cleaned dataset from %s", csv_path)
     df = pd.read_csv(
@@ -90,32 +100,226 @@ def read_books_clean(csv_path: Path) -> pd.DataFrame:
     return df
 
 
-def write_author_stage(df: pd.DataFrame, engine: Engine) -> None:
-    subset = df[["book_id", "authors_clean", "authors_raw"]].copy()
-    authors_stage = explode_authors(subset)
+def create_partitioned_books_clean(df: pd.DataFrame, engine: Engine, table_name: str) -> None:
+    """Recreate ``table_name`` empty, range-partitioned by decade of ``publication_year``."""
+
+    with engine.connect() as connection:
+        create_sql = pd.io.sql.get_schema(df, table_name, con=connection, dtype=DTYPE_MAP)
+    partitions = create_year_partitioned_table(engine, table_name, create_sql, df["publication_year"].dropna())
+    LOGGER.info("Created %s with %d year partitions", table_name, len(partitions))
+
+
+def append_books_clean(df: pd.DataFrame, engine: Engine, table_name: str, method: str = "copy") -> None:
+    """Append ``df`` and link its authors in one transaction, then index both sides concurrently.
+
+    The appended books are linked into the existing author tables (new names
+    get new ids); if those tables do not exist yet they are created from
+    ``df`` in the same transaction.
+    """
+
+    with engine.connect() as connection:
+        linked = all(inspect(connection).has_table(name) for name in (AUTHORS_TABLE, BOOK_AUTHORS_TABLE))
     with engine.begin() as connection:
-        if authors_stage.empty:
-            LOGGER.info("No author rows to persist. Dropping %s if it exists.", AUTHOR_STAGE_TABLE)
-            connection.execute(text(f"DROP TABLE IF EXISTS {AUTHOR_STAGE_TABLE}"))
-            return
+        LOGGER.info("Appending %d rows to table %s", len(df), table_name)
+        write_frame(df, table_name, connection, if_exists="append", dtype=DTYPE_MAP, method=method)
+        if linked:
+            refresh_book_author_links(df, df["book_id"].dropna().astype("int64").tolist(), connection)
+        else:
+            write_author_tables(df, connection, method=method)
+    # Appending targets tables readers already use, so index them without blocking.
+    ensure_books_clean_schema(engine, table_name, concurrently=True)
+    ensure_author_tables_schema(engine, concurrently=True)
+
+
+def stage_books_clean(
+    df: pd.DataFrame,
+    engine: Engine,
+    table_name: str,
+    method: str = "copy",
+    *,
+    partition_by_year: bool = False,
+) -> None:
+    """Write and index the staging table for ``table_name`` (see ``bulk_load.stage_frame``).
+
+    With ``partition_by_year`` the staging table is range-partitioned instead;
+    partitioned tables cannot be UNLOGGED, so its rows are logged as usual.
+    """
+
+    if not partition_by_year:
+        stage_frame(df, table_name, engine, dtype=DTYPE_MAP, method=method, prepare=ensure_books_clean_schema)
+        return
+    staging = staging_table_name(table_name)
+    create_partitioned_books_clean(df, engine, staging)
+    with engine.begin() as connection:
+        write_frame(df, staging, connection, if_exists="append", dtype=DTYPE_MAP, method=method)
+    ensure_books_clean_schema(engine, staging)
+
+
+def swap_books_clean(
+    df: pd.DataFrame,
+    engine: Engine,
+    table_name: str,
+    method: str = "copy",
+    *,
+    partition_by_year: bool = False,
+) -> None:
+    """Stage ``table_name`` and the author tables in parallel, then publish them at once.
+
+    The books table and the author tables are written, indexed and analyzed
+    on separate pooled connections, so the author explosion and the author
+    COPYs overlap with the main table's load and index builds. The live
+    tables are untouched until the final rename transaction, which swaps all
+    of them in together and rebuilds the materialized views over them; if
+    either side fails nothing is published.
+    """
+
+    LOGGER.info("Staging %d rows for %s alongside the author tables", len(df), table_name)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="load") as pool:
+        books = pool.submit(stage_books_clean, df, engine, table_name, method, partition_by_year=partition_by_year)
+        authors = pool.submit(stage_author_tables, df, engine, method=method)
+        books.result()
+        authors.result()
+    tables = (table_name, AUTHORS_TABLE, BOOK_AUTHORS_TABLE)
+    with engine.begin() as connection, rebuilt_views(connection, tables):
+        publish_staging_tables(connection, {staging_table_name(name): name for name in tables})
+    LOGGER.info("Published %s, %s and %s", table_name, AUTHORS_TABLE, BOOK_AUTHORS_TABLE)
+
+
+def merge_books_clean(
+    df: pd.DataFrame,
+    engine: Engine,
+    table_name: str,
+    deleted_ids: list[int] | None = None,
+) -> None:
+    """Upsert changed books and delete removed ones (see ``bulk_load.merge_frame``).
+
+    With ``deleted_ids`` ``df`` is a delta and only its rows are shipped;
+    without, ``df`` is the full snapshot and vanished books are deleted.
+    ``book_authors`` is re-linked for the affected books only (adding any new
+    names to ``authors`` and dropping orphaned ones), in the same transaction
+    as the table itself. Any missing index is then built concurrently and the
+    tables are analyzed.
+    """
+
+    with engine.begin() as connection:
+        stats = merge_frame(df, table_name, connection, key="book_id", deleted_keys=deleted_ids)
+        refresh_book_author_links(df, stats.changed, connection)
+    ensure_books_clean_schema(engine, table_name, concurrently=True)
+    ensure_author_tables_schema(engine, concurrently=True)
+
 
-        LOGGER.info("Writing %d author rows to %s", len(authors_stage), AUTHOR_STAGE_TABLE)
-        authors_stage.to_sql(AUTHOR_STAGE_TABLE, connection, if_exists="replace", index=False)
+def reload_books_clean_years(
+    df: pd.DataFrame,
+    engine: Engine,
+    table_name: str,
+    first_year: int,
+    last_year: int,
+    *,
+    method: str = "copy",
+) -> None:
+    """Replace the rows published in ``[first_year, last_year]`` with the snapshot's.
 
+    On a year-partitioned table the range DELETE only touches the partitions
+    covering those years. Books whose year moved into or out of the range are
+    rewritten too, so every touched book ends up as in ``df``; their author
+    links are refreshed in the same transaction.
+    """
 
-def load_books_clean_to_postgres(csv_path: Path, table_name: str, if_exists: str) -> None:
+    in_range = text(f'DELETE FROM "{table_name}" WHERE publication_year BETWEEN :first AND :last RETURNING book_id')
+    with engine.begin() as connection:
+        deleted = connection.execute(in_range, {"first": first_year, "last": last_year}).scalars().all()
+        selected = df["publication_year"].between(first_year, last_year).fillna(False) | df["book_id"].isin(deleted)
+        rows = df.loc[selected.astype(bool)]
+        book_ids = sorted({int(book_id) for book_id in deleted} | {int(book_id) for book_id in rows["book_id"].dropna()})
+        connection.execute(text(f'DELETE FROM "{table_name}" WHERE book_id = ANY(:book_ids)'), {"book_ids": book_ids})
+        write_frame(rows, table_name, connection, if_exists="append", dtype=DTYPE_MAP, method=method)
+        refresh_book_author_links(df, book_ids, connection)
+    LOGGER.info("Reloaded %d book(s) for publication years %d-%d", len(book_ids), first_year, last_year)
+    ensure_books_clean_schema(engine, table_name, concurrently=True)
+    ensure_author_tables_schema(engine, concurrently=True)
+
+
+def load_books_clean_to_postgres(
+    csv_path: Path,
+    table_name: str,
+    if_exists: str,
+    method: str = "copy",
+    *,
+    partition_by_year: bool = False,
+    reload_years: tuple[int, int] | None = None,
+    deleted_ids: list[int] | None = None,
+) -> None:
+    """Load the cleaned CSV.
+
+    ``replace``, ``swap`` and ``fail`` (when ``table_name`` does not exist
+    yet) stage ``books_clean`` and the author tables in parallel and publish
+    them together in one transaction, so the live tables are replaced only
+    if both sides load; ``fail`` raises before anything is written when the
+    table exists. ``append`` adds the rows and their author links in one
+    transaction; ``merge`` writes only the rows that changed since the last
+    load (a first merge into a missing table is a full load). With
+    ``deleted_ids`` a merge treats the CSV as a delta of new or changed rows
+    and deletes those book ids, so only the change is sent.
+    ``partition_by_year`` creates ``table_name`` range-partitioned by decade of
+    ``publication_year`` (replace loads only); ``reload_years`` rewrites just
+    the books of that year range, which a partitioned table prunes to the
+    matching partitions. Installed materialized views over these tables are
+    rebuilt or refreshed afterwards.
+    """
+
+    if partition_by_year and if_exists != "replace":
+        raise ValueError("partition_by_year needs if_exists='replace'")
+    if deleted_ids is not None and if_exists != "merge":
+        raise ValueError("deleted_ids needs if_exists='merge'")
     df = read_books_clean(csv_path)
     engine = get_engine()
+    tables = (table_name, AUTHORS_TABLE, BOOK_AUTHORS_TABLE)
 
-    with engine.begin() as connection:
-        LOGGER.info("Writing %d rows to table %s", len(df), table_name)
-        df.to_sql(table_name, connection, if_exists=if_exists, index=False, dtype=DTYPE_MAP)
+    if reload_years is not None:
+        with maintained_views(engine, tables, rebuild=False):
+            reload_books_clean_years(df, engine, table_name, *reload_years, method=method)
+        LOGGER.info("Load completed successfully.")
+        return
 
-    ensure_books_clean_schema(engine, table_name)
-    write_author_stage(df, engine)
+    if if_exists in {"merge", "swap"} and is_partitioned(engine, table_name):
+        raise ValueError(
+            f"{table_name} is partitioned by publication_year; reload it with reload_years "
+            "or a replace load with partition_by_year"
+        )
+
+    if if_exists == "merge":
+        with engine.connect() as connection:
+            ready = all(inspect(connection).has_table(name) for name in tables)
+        if ready:
+            with maintained_views(engine, tables, rebuild=False):
+                merge_books_clean(df, engine, table_name, deleted_ids)
+            LOGGER.info("Load completed successfully.")
+            return
+        if deleted_ids is not None:
+            raise ValueError(f"A delta merge needs the loaded tables; one of {', '.join(tables)} is missing")
+        LOGGER.info("One of %s is missing; running a full load instead of a merge", ", ".join(tables))
+        if_exists = "replace"
+
+    if if_exists == "fail":
+        with engine.connect() as connection:
+            if inspect(connection).has_table(table_name):
+                raise ValueError(f"Table '{table_name}' already exists.")
+
+    if if_exists == "append":
+        with maintained_views(engine, tables, rebuild=False):
+            append_books_clean(df, engine, table_name, method=method)
+    else:
+        swap_books_clean(df, engine, table_name, method=method, partition_by_year=partition_by_year)
     LOGGER.info("Load completed successfully.")
 
 
+def _parse_book_ids(value: str) -> list[int]:
+    try:
+        return sorted({int(token) for token in value.split(",") if token.strip()})
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated book ids, got {value!r}") from exc
+
+
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Load books_clean.csv into PostgreSQL.")
     parser.add_argument(
@@ -131,8 +335,42 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser.add_argument(
         "--if-exists",
         default="replace",
-        choices=["fail", "replace", "append"],
-        help="Behavior if the target table already exists (default: replace)",
+        choices=["fail", "replace", "append", "swap", "merge"],
+        help=(
+            "Behavior if the target table already exists; swap loads an unlogged staging table "
+            "and renames it into place, merge upserts changed rows and deletes vanished ones "
+            "(default: replace)"
+        ),
+    )
+    parser.add_argument(
+        "--method",
+        default="copy",
+        choices=LOAD_METHODS,
+        help="Stream rows with COPY or write them with batched INSERTs (default: copy)",
+    )
+    parser.add_argument(
+        "--partition-by-year",
+        action="store_true",
+        help="Create the table range-partitioned by decade of publication_year, NULL years in a default partition "
+        "(needs --if-exists replace)",
+    )
+    parser.add_argument(
+        "--reload-years",
+        nargs=2,
+        type=int,
+        metavar=("FIRST", "LAST"),
+        help="Only rewrite the books published in FIRST..LAST (inclusive); ignores --if-exists",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="With --if-exists merge, treat --csv-path as new or changed rows only instead of a full snapshot",
+    )
+    parser.add_argument(
+        "--deleted-ids",
+        type=_parse_book_ids,
+        default=None,
+        help="Comma-separated book_id values to delete in a --delta merge (implies --delta)",
     )
     parser.add_argument(
         "--log-level",
@@ -152,6 +390,10 @@ def main(argv: list[str] | None = None) -> None:
         csv_path=Path(args.csv_path),
         table_name=args.table,
         if_exists=args.if_exists,
+        method=args.method,
+        partition_by_year=args.partition_by_year,
+        reload_years=tuple(args.reload_years) if args.reload_years else None,
+        deleted_ids=args.deleted_ids if args.deleted_ids is not None else ([] if args.delta else None),
     )
 
 
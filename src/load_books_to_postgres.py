@@ -9,22 +9,15 @@ from pathlib import Path
 from typing import Callable, List
 
 import pandas as pd
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
 
-from .cleaning import clean_books, explode_authors
-from .db_config import build_database_url_from_env
+from .author_tables import AUTHORS_TABLE, BOOK_AUTHORS_TABLE, ensure_author_tables_schema, write_author_tables
+from .bulk_load import LOAD_METHODS, write_frame
+from .cleaning import clean_books
+from .db_config import get_engine
+from .materialized_views import rebuilt_views
 
 LOGGER = logging.getLogger(__name__)
 LOG_DIR = Path("logs")
-AUTHOR_STAGE_TABLE = "book_authors_stage"
-
-
-def get_engine_from_env() -> Engine:
-    """Create a SQLAlchemy Engine using env vars."""
-
-    database_url = build_database_url_from_env()
-    return create_engine(database_url)
 
 
 def _bad_line_logger(bad_lines: List[str]) -> Callable[[list[str]], None]:
@@ -57,8 +50,13 @@ def log_bad_lines(bad_lines: list[str]) -> None:
     LOGGER.warning("Skipped %d malformed rows. Details recorded in %s", len(bad_lines), log_path)
 
 
-def load_books_csv_to_postgres(csv_path: str, table_name: str, if_exists: str = "replace") -> None:
-    """Load the books CSV into PostgreSQL, emitting author staging rows."""
+def load_books_csv_to_postgres(
+    csv_path: str,
+    table_name: str,
+    if_exists: str = "replace",
+    method: str = "copy",
+) -> None:
+    """Load the books CSV into PostgreSQL, emitting the ``authors``/``book_authors`` tables."""
 
     LOGGER.info("Reading CSV from %s", csv_path)
     df_raw, bad_lines = read_books_csv(csv_path)
@@ -66,21 +64,18 @@ def load_books_csv_to_postgres(csv_path: str, table_name: str, if_exists: str =
     LOGGER.info("Loaded %d rows after skipping %d malformed entries", len(df_raw), len(bad_lines))
 
     df_clean = clean_books(df_raw)
-    author_stage = explode_authors(df_clean)
 
     LOGGER.info("Writing %d cleaned rows to table %s", len(df_clean), table_name)
-    engine = get_engine_from_env()
-
-    with engine.begin() as connection:
-        df_clean.to_sql(table_name, connection, if_exists=if_exists, index=False)
-        if not author_stage.empty:
-            LOGGER.info(
-                "Writing %d author rows to staging table %s", len(author_stage), AUTHOR_STAGE_TABLE
-            )
-            author_stage.to_sql(AUTHOR_STAGE_TABLE, connection, if_exists="replace", index=False)
-        else:
-            LOGGER.info("No multi-author rows detected. Dropping staging table if it exists.")
-            connection.execute(text(f"DROP TABLE IF EXISTS {AUTHOR_STAGE_TABLE}"))
+    engine = get_engine()
+
+    # The author tables are always replaced, so the books, the author tables and
+    # the views over them are rebuilt in one transaction.
+    tables = (table_name, AUTHORS_TABLE, BOOK_AUTHORS_TABLE)
+    with engine.begin() as connection, rebuilt_views(connection, tables):
+        write_frame(df_clean, table_name, connection, if_exists=if_exists, method=method)
+        write_author_tables(df_clean, connection, method=method)
+    if engine.dialect.name == "postgresql":
+        ensure_author_tables_schema(engine)
 
     LOGGER.info("Load finished successfully.")
 
@@ -103,6 +98,12 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         choices=["fail", "replace", "append"],
         help="Behavior if target table already exists (default: replace)",
     )
+    parser.add_argument(
+        "--method",
+        default="copy",
+        choices=LOAD_METHODS,
+        help="Stream rows with COPY or write them with batched INSERTs (default: copy)",
+    )
     return parser.parse_args(argv)
 
 
@@ -116,6 +117,7 @@ def main(argv: list[str] | None = None) -> None:
         csv_path=args.csv_path,
         table_name=args.table,
         if_exists=args.if_exists,
+        method=args.method,
     )
 
 
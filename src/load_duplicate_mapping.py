@@ -8,23 +8,18 @@ from pathlib import Path
 from typing import Optional
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy import inspect
 
-from .db_config import build_database_url_from_env
+from .bulk_load import LOAD_METHODS, merge_frame, write_frame
+from .db_config import get_engine
+from .materialized_views import maintained_views, rebuilt_views
+from .schema import ensure_unique_index
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_CSV_PATH = Path("data/derived/duplicate_bookid_mapping.csv")
 DEFAULT_TABLE_NAME = "bookid_canonical_map"
 
 
-def get_engine_from_env() -> Engine:
-    """Build a SQLAlchemy engine using environment credentials."""
-
-    database_url = build_database_url_from_env()
-    return create_engine(database_url)
-
-
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Load duplicate→canonical bookID mappings into PostgreSQL."
@@ -42,8 +37,17 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser.add_argument(
         "--if-exists",
         default="replace",
-        choices=["fail", "replace", "append"],
-        help="Behavior if the target table already exists (default: replace)",
+        choices=["fail", "replace", "append", "merge"],
+        help=(
+            "Behavior if the target table already exists; merge upserts changed pairs by "
+            "duplicate_bookID and deletes vanished ones (default: replace)"
+        ),
+    )
+    parser.add_argument(
+        "--method",
+        default="copy",
+        choices=LOAD_METHODS,
+        help="Stream rows with COPY or write them with batched INSERTs (default: copy)",
     )
     return parser.parse_args(argv)
 
@@ -55,7 +59,7 @@ def validate_mapping_frame(df: pd.DataFrame) -> None:
         raise ValueError(f"Mapping CSV missing required columns: {', '.join(sorted(missing))}")
 
 
-def load_mapping_to_postgres(csv_path: Path, table_name: str, if_exists: str) -> None:
+def load_mapping_to_postgres(csv_path: Path, table_name: str, if_exists: str, method: str = "copy") -> None:
     if not csv_path.exists():
         raise FileNotFoundError(f"Could not find mapping CSV at {csv_path}")
 
@@ -64,9 +68,26 @@ def load_mapping_to_postgres(csv_path: Path, table_name: str, if_exists: str) ->
     validate_mapping_frame(df)
     LOGGER.info("Loaded %d duplicate→canonical pairs", len(df))
 
-    engine = get_engine_from_env()
-    with engine.begin() as connection:
-        df.to_sql(table_name, connection, if_exists=if_exists, index=False)
+    engine = get_engine()
+    if if_exists == "merge":
+        with engine.connect() as connection:
+            exists = inspect(connection).has_table(table_name)
+        if exists:
+            ensure_unique_index(engine, table_name, "duplicate_bookID")
+            with maintained_views(engine, [table_name], rebuild=False):
+                with engine.begin() as connection:
+                    merge_frame(df, table_name, connection, key="duplicate_bookID")
+            return
+        LOGGER.info("%s does not exist yet; running a full load instead of a merge", table_name)
+        if_exists = "replace"
+
+    if if_exists == "replace":
+        with engine.begin() as connection, rebuilt_views(connection, [table_name]):
+            write_frame(df, table_name, connection, if_exists=if_exists, method=method)
+    else:
+        with maintained_views(engine, [table_name], rebuild=False):
+            with engine.begin() as connection:
+                write_frame(df, table_name, connection, if_exists=if_exists, method=method)
     LOGGER.info(
         "Wrote %d rows into table %s (if_exists=%s)",
         len(df),
@@ -81,7 +102,7 @@ def main(argv: Optional[list[str]] = None) -> None:
         format="%(asctime)s %(levelname)s %(name)s - %(message)s",
     )
     args = parse_args(argv)
-    load_mapping_to_postgres(Path(args.csv_path), args.table, args.if_exists)
+    load_mapping_to_postgres(Path(args.csv_path), args.table, args.if_exists, args.method)
 
 
 if __name__ == "__main__":  # pragma: no cover
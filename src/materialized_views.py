@@ -0,0 +1,275 @@
+"""Install the ``sql/analysis`` queries as materialized views and keep them fresh.
+
+Each query in :data:`ANALYSIS_VIEWS` recomputes its canonical rollup and joins
+from scratch when run directly. Installed as a materialized view it is
+computed once per load; readers (``p04_sql_vs_pandas_compare`` included)
+select the stored rows instead. Every view gets a unique index on its key
+columns, which ``REFRESH MATERIALIZED VIEW CONCURRENTLY`` requires, so a
+refresh never blocks readers.
+
+A load that replaces the underlying tables runs inside :func:`rebuilt_views`:
+the dependent views are dropped (a dropped table cannot have dependent views)
+and recreated in the same transaction as the replacement, so readers never
+find them missing and a failed load leaves them untouched. Other loads use
+:func:`maintained_views`, which refreshes them concurrently once the load
+commits. Only views that are already installed are touched, so nothing
+changes until ``install`` has been run once.
+
+Usage::
+
+    python -m src.materialized_views install
+    python -m src.materialized_views refresh --views mv_top_authors_weighted_rating
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .db_config import get_engine
+
+LOGGER = logging.getLogger(__name__)
+SQL_DIR = Path("sql/analysis")
+
+
+@dataclass(frozen=True)
+class AnalysisView:
+    """A materialized view over one ``sql/analysis`` query.
+
+    ``key_columns`` must be unique per row (they back the unique index);
+    ``order_columns`` (default: the key) reproduce the query's ORDER BY.
+    """
+
+    name: str
+    sql_file: Path
+    key_columns: tuple[str, ...]
+    tables: tuple[str, ...]
+    order_columns: tuple[str, ...] = ()
+
+    def query(self) -> str:
+        if not self.sql_file.exists():
+            raise FileNotFoundError(f"SQL file not found: {self.sql_file}")
+        return self.sql_file.read_text(encoding="utf-8").strip().rstrip(";")
+
+    def select_sql(self) -> str:
+        return f'SELECT * FROM "{self.name}" ORDER BY {", ".join(self.order_columns or self.key_columns)}'
+
+
+ANALYSIS_VIEWS: tuple[AnalysisView, ...] = (
+    AnalysisView(
+        "mv_top_authors_weighted_rating",
+        SQL_DIR / "20_top_authors_weighted_rating.sql",
+        ("author_name",),
+        ("books_clean", "authors", "book_authors"),
+    ),
+    AnalysisView(
+        "mv_top_books_by_engagement",
+        SQL_DIR / "30_top_books_by_engagement.sql",
+        ("metric", "metric_rank"),
+        ("books_clean",),
+    ),
+    AnalysisView(
+        "mv_publication_year_trends",
+        SQL_DIR / "40_publication_year_trends.sql",
+        ("publication_year",),
+        ("books_clean",),
+    ),
+    AnalysisView(
+        "mv_language_quality_summary",
+        SQL_DIR / "50_language_quality_summary.sql",
+        ("language_code",),
+        ("books_clean",),
+    ),
+    AnalysisView(
+        "mv_duplicate_share",
+        SQL_DIR / "55_duplicate_share.sql",
+        ("total_rows",),
+        ("books_clean",),
+    ),
+    AnalysisView(
+        "mv_top_books_per_author",
+        SQL_DIR / "60_top_books_per_author.sql",
+        ("author_name", "author_rank"),
+        ("books", "bookid_canonical_map", "authors", "book_authors"),
+    ),
+    AnalysisView(
+        "mv_language_publisher_rankings",
+        SQL_DIR / "70_language_publisher_rankings.sql",
+        # RANK() ties publishers within a language, so the rank cannot be the key.
+        ("language_code", "publisher"),
+        ("books", "bookid_canonical_map"),
+        ("language_code", "language_rank", "publisher"),
+    ),
+    AnalysisView(
+        "mv_publication_year_rolling_stats",
+        SQL_DIR / "80_publication_year_rolling_stats.sql",
+        ("publication_year",),
+        ("books", "bookid_canonical_map"),
+    ),
+)
+VIEWS_BY_NAME = {view.name: view for view in ANALYSIS_VIEWS}
+
+
+def view_for_sql_file(sql_path: Path) -> AnalysisView | None:
+    for view in ANALYSIS_VIEWS:
+        if view.sql_file == sql_path:
+            return view
+    return None
+
+
+def installed_views(bind: Engine | Connection) -> list[AnalysisView]:
+    """The analysis views present in the current schema (none off PostgreSQL)."""
+
+    if bind.dialect.name != "postgresql":
+        return []
+    query = text(
+        """
+        SELECT matviewname
+        FROM pg_matviews
+        WHERE schemaname = current_schema()
+          AND matviewname = ANY(:names)
+        """
+    )
+    with bind.connect() if isinstance(bind, Engine) else nullcontext(bind) as conn:
+        names = set(conn.execute(query, {"names": list(VIEWS_BY_NAME)}).scalars())
+    return [view for view in ANALYSIS_VIEWS if view.name in names]
+
+
+def views_reading(bind: Engine | Connection, tables: Iterable[str]) -> list[AnalysisView]:
+    wanted = set(tables)
+    return [view for view in installed_views(bind) if wanted.intersection(view.tables)]
+
+
+def _create_view(conn: Connection, view: AnalysisView) -> None:
+    keys = ", ".join(view.key_columns)
+    conn.execute(text(f'CREATE MATERIALIZED VIEW IF NOT EXISTS "{view.name}" AS\n{view.query()}\nWITH DATA'))
+    conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{view.name}" ON "{view.name}" ({keys})'))
+
+
+def install_views(engine: Engine, views: Sequence[AnalysisView] = ANALYSIS_VIEWS) -> None:
+    """Create (and populate) each view with its unique key index."""
+
+    for view in views:
+        with engine.begin() as conn:
+            _create_view(conn, view)
+        LOGGER.info("Installed materialized view %s", view.name)
+
+
+def refresh_views(
+    engine: Engine,
+    views: Sequence[AnalysisView] | None = None,
+    *,
+    concurrently: bool = True,
+) -> None:
+    """Refresh ``views`` (default: every installed one); concurrent refreshes keep readers unblocked."""
+
+    mode = "CONCURRENTLY " if concurrently else ""
+    for view in installed_views(engine) if views is None else views:
+        with engine.begin() as conn:
+            conn.execute(text(f'REFRESH MATERIALIZED VIEW {mode}"{view.name}"'))
+        LOGGER.info("Refreshed materialized view %s", view.name)
+
+
+def drop_views(engine: Engine, views: Sequence[AnalysisView]) -> None:
+    for view in views:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{view.name}"'))
+        LOGGER.info("Dropped materialized view %s", view.name)
+
+
+@contextmanager
+def rebuilt_views(connection: Connection, tables: Iterable[str]) -> Iterator[None]:
+    """Drop the installed views over ``tables`` and recreate them in ``connection``'s transaction.
+
+    Wrap the statements that drop or replace ``tables``: the views are
+    recreated over the new tables before the caller commits, and a failure
+    rolls the drop back with everything else.
+    """
+
+    views = views_reading(connection, tables)
+    for view in views:
+        connection.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{view.name}"'))
+    yield
+    for view in views:
+        _create_view(connection, view)
+        LOGGER.info("Rebuilt materialized view %s", view.name)
+
+
+@contextmanager
+def maintained_views(engine: Engine, tables: Iterable[str], *, rebuild: bool) -> Iterator[None]:
+    """Keep the installed views over ``tables`` current across a load.
+
+    Without ``rebuild`` the views are refreshed concurrently once the load
+    finishes. With ``rebuild`` (for loads that drop and recreate ``tables``
+    outside a single transaction; prefer :func:`rebuilt_views`) they are
+    dropped first and reinstalled afterwards, also when the load fails.
+    """
+
+    views = views_reading(engine, tables)
+    if not rebuild:
+        yield
+        refresh_views(engine, views)
+        return
+    drop_views(engine, views)
+    try:
+        yield
+    except Exception:
+        # Put the views back over whatever tables the failed load left behind.
+        try:
+            install_views(engine, views)
+        except SQLAlchemyError:
+            LOGGER.warning(
+                "Load failed; run `python -m src.materialized_views install` to restore %s",
+                ", ".join(view.name for view in views),
+            )
+        raise
+    install_views(engine, views)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the materialized views over sql/analysis queries.")
+    parser.add_argument("action", choices=["install", "refresh", "drop"], help="What to do with the views")
+    parser.add_argument(
+        "--views",
+        nargs="*",
+        choices=list(VIEWS_BY_NAME),
+        help="Subset of views (default: all for install/drop, every installed one for refresh)",
+    )
+    parser.add_argument(
+        "--blocking",
+        action="store_true",
+        help="Refresh without CONCURRENTLY (faster, but locks readers out meanwhile)",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Python logging level (default: INFO)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+    engine = get_engine()
+    selected = [VIEWS_BY_NAME[name] for name in args.views] if args.views else None
+    if args.action == "install":
+        install_views(engine, selected or ANALYSIS_VIEWS)
+    elif args.action == "refresh":
+        refresh_views(engine, selected, concurrently=not args.blocking)
+    else:
+        drop_views(engine, selected or ANALYSIS_VIEWS)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,153 @@
+"""On-disk cache for metric results, charts, and query outputs.
+
+Entries are keyed by a content fingerprint of the input, the producing
+function's name, its parameters, and a code version (a hash of the source
+files involved), so editing ``books_clean.csv``, a CLI flag, or the metric
+code all miss the cache naturally. Values are pickled one file per key;
+reads refresh the file's mtime and writes evict the least recently used
+entries beyond ``max_entries``. ``force=True`` skips lookups but still
+refreshes the stored results.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Mapping, TypeVar
+
+import pandas as pd
+
+__all__ = [
+    "DEFAULT_MAX_ENTRIES",
+    "MetricCache",
+    "code_version",
+    "file_fingerprint",
+    "frame_fingerprint",
+]
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_MAX_ENTRIES = 256
+_CHUNK_SIZE = 1 << 20
+
+T = TypeVar("T")
+
+
+def file_fingerprint(path: Path) -> str:
+    """Content hash of ``path`` (independent of its name and mtime)."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of an in-memory frame, including its columns and dtypes."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_version(*modules: str) -> str:
+    """Hash of the source files behind the named modules."""
+
+    digest = hashlib.blake2b(digest_size=8)
+    for name in sorted(modules):
+        module = sys.modules.get(name) or importlib.import_module(name)
+        source = getattr(module, "__file__", None)
+        digest.update(name.encode("utf-8"))
+        if source:
+            digest.update(Path(source).read_bytes())
+    return digest.hexdigest()
+
+
+class MetricCache:
+    """LRU-evicted pickle cache rooted at ``directory``."""
+
+    def __init__(self, directory: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES, force: bool = False) -> None:
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive; got {max_entries}")
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.force = force
+
+    @staticmethod
+    def key(name: str, params: Mapping[str, object], fingerprint: str, version: str) -> str:
+        payload = json.dumps(
+            {"name": name, "params": dict(params), "data": fingerprint, "code": version},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str, label: str = "") -> object | None:
+        """Return the cached value for ``key`` or ``None`` (always ``None`` when forced)."""
+
+        path = self._path(key)
+        if self.force or not path.exists():
+            LOGGER.info("Cache %s for %s", "bypass" if self.force else "miss", label or key[:12])
+            return None
+        try:
+            value = pd.read_pickle(path)
+        except Exception:  # corrupt or truncated entry - treat as a miss
+            LOGGER.warning("Discarding unreadable cache entry %s", path)
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        LOGGER.info("Cache hit for %s", label or key[:12])
+        return value
+
+    def put(self, key: str, value: object) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+        try:
+            pd.to_pickle(value, temp_name)
+            os.replace(temp_name, self._path(key))
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_name)
+        self._evict()
+
+    def get_or_compute(
+        self,
+        name: str,
+        params: Mapping[str, object],
+        fingerprint: str,
+        version: str,
+        compute: Callable[[], T],
+    ) -> T:
+        key = self.key(name, params, fingerprint, version)
+        cached = self.get(key, name)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            with contextlib.suppress(FileNotFoundError):
+                entries.append((path.stat().st_mtime, path))
+        entries.sort()
+        for _, path in entries[: max(len(entries) - self.max_entries, 0)]:
+            LOGGER.debug("Evicting cache entry %s", path.name)
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
@@ -4,16 +4,36 @@ All functions accept the cleaned Goodreads dataset (``books_clean.csv``) and
 return tidy pandas DataFrames suitable for CSV export or downstream
 visualizations. The calculations intentionally mirror the catalog produced in
 Task 01 so the project stays reproducible for reviewers.
+
+Passing ``engine=`` (a SQLAlchemy engine for the loaded ``books_clean``
+tables) pushes the aggregation down to PostgreSQL instead: ``df`` and the
+shared intermediates are ignored and only the result table is transferred
+(see :mod:`src.metrics.pushdown`). Pushed-down quantiles are always exact.
 """
 from __future__ import annotations
 
 from typing import Iterable, Sequence
 
 import pandas as pd
+from sqlalchemy.engine import Engine
 
 from src.cleaning import explode_authors
+from src.metrics import pushdown
+from src.metrics.incidence import AuthorIncidence
+from src.metrics.keys import GROUP_KEY_COLUMNS, decode_keys, encode_keys
+from src.metrics.quantiles import (
+    DEFAULT_RELATIVE_ACCURACY,
+    QUANTILE_MODES,
+    build_sketch,
+    grouped_quantile,
+    sketch_quantile,
+)
+from src.metrics.selection import top_n_rows
+from src.metrics.timeseries import year_series
 
 __all__ = [
+    "canonical_rollup",
+    "explode_book_authors",
     "compute_top_authors_by_weighted_rating",
     "compute_top_books_by_ratings_count",
     "compute_top_books_by_text_reviews",
@@ -28,6 +48,7 @@ __all__ = [
     "compute_engagement_uplift_canonical",
     "compute_publisher_language_rankings",
     "compute_publication_year_rolling_stats",
+    "rank_publisher_languages",
 ]
 
 
@@ -37,8 +58,46 @@ def _ensure_columns(df: pd.DataFrame, columns: Iterable[str]) -> None:
         raise KeyError(f"Missing required columns: {missing}")
 
 
-def _canonical_rollup(df: pd.DataFrame) -> pd.DataFrame:
-    """Return a canonical-level view (one row per canonical_book_id)."""
+def _grouped_summary(
+    frame: pd.DataFrame,
+    keys: str | Sequence[str],
+    aggregations: dict[str, tuple[str, object]],
+    *,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+) -> pd.DataFrame:
+    """Named groupby aggregation where a float function means "that quantile".
+
+    Quantile columns never go through per-group Python callbacks: exact mode
+    uses the vectorized :func:`grouped_quantile`, ``quantile_mode="approx"``
+    reads them from mergeable sketches (see :mod:`src.metrics.quantiles`).
+    String keys are grouped on their dictionary codes (see
+    :mod:`src.metrics.keys`); callers decode the rows they keep.
+    """
+
+    if quantile_mode not in QUANTILE_MODES:
+        raise ValueError(f"quantile_mode must be one of {QUANTILE_MODES}; got {quantile_mode!r}")
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    frame = encode_keys(frame, [key for key in keys if key in GROUP_KEY_COLUMNS])
+    quantiles = {name: spec for name, spec in aggregations.items() if isinstance(spec[1], float)}
+    plain = {name: spec for name, spec in aggregations.items() if name not in quantiles}
+    grouped = frame.groupby(keys, dropna=False, observed=True).agg(**plain)
+    for name, (column, q) in quantiles.items():
+        if quantile_mode == "exact":
+            # Same grouping as ``grouped``, so the rows line up positionally.
+            grouped[name] = grouped_quantile(frame, keys, column, q, dropna=False).to_numpy()
+        else:
+            sketch = build_sketch(frame, keys, column, relative_accuracy, dropna=False)
+            grouped[name] = sketch_quantile(sketch, q, relative_accuracy).reindex(grouped.index)
+    return grouped.loc[:, list(aggregations)].reset_index()
+
+
+def canonical_rollup(df: pd.DataFrame, *, with_representative: bool = False) -> pd.DataFrame:
+    """Return a canonical-level view (one row per canonical_book_id).
+
+    ``with_representative`` appends the ``representative_book_id`` whose text
+    columns were kept, which incremental callers need to re-derive the order.
+    """
 
     text_cols = [
         "title",
@@ -59,81 +118,126 @@ def _canonical_rollup(df: pd.DataFrame) -> pd.DataFrame:
     ]
 
     _ensure_columns(df, ["canonical_book_id", "book_id", "is_duplicate", *text_cols, *numeric_cols])
+    # idxmin returns index labels; a fresh RangeIndex makes them unique positions.
+    df = df.reset_index(drop=True)
 
-    textual = (
-        df.sort_values(["is_duplicate", "book_id"], ascending=[True, True])
-        .drop_duplicates("canonical_book_id", keep="first")
-        .loc[:, ["canonical_book_id", *text_cols]]
+    # Encode the (is_duplicate, book_id) preference into one integer so a single
+    # grouped idxmin picks the representative row alongside the max engagement.
+    priority = _representative_priority(df)
+    grouped = (
+        df.loc[:, ["canonical_book_id", *numeric_cols]]
+        .assign(_priority=priority)
+        .groupby("canonical_book_id", dropna=False)
+        .agg(
+            _representative=("_priority", "idxmin"),
+            **{column: (column, "max") for column in numeric_cols},
+        )
     )
 
-    aggregated = (
-        df.groupby("canonical_book_id", dropna=False)
-        .agg({
-            "ratings_count": "max",
-            "ratings_count_capped": "max",
-            "text_reviews_count": "max",
-            "text_reviews_count_capped": "max",
-        })
-        .reset_index()
-    )
+    representatives = df.iloc[grouped["_representative"].to_numpy()]
+    rollup = representatives.loc[:, ["canonical_book_id", *text_cols]].reset_index(drop=True)
+    for column in numeric_cols:
+        rollup[column] = grouped[column].array
+    rollup["representative_book_id"] = representatives["book_id"].array
+
+    # Groups are emitted in canonical_book_id order, which already matches the
+    # (is_duplicate, book_id) order for canonical representatives. Only groups
+    # whose canonical row is absent need to be moved behind them.
+    orphaned = representatives["is_duplicate"].fillna(False).to_numpy(dtype=bool)
+    if orphaned.any():
+        rollup = pd.concat(
+            [
+                rollup.loc[~orphaned],
+                rollup.loc[orphaned].sort_values("representative_book_id", kind="stable"),
+            ],
+            ignore_index=True,
+        )
+    if not with_representative:
+        rollup = rollup.drop(columns="representative_book_id")
+    return rollup
+
+
+def _representative_priority(df: pd.DataFrame) -> pd.Series:
+    """Integer key ordering rows like ``sort_values(["is_duplicate", "book_id"])``."""
+
+    book_ids = pd.to_numeric(df["book_id"], errors="coerce")
+    offset = int(book_ids.max()) + 1 if book_ids.notna().any() else 1
+    duplicate_flag = df["is_duplicate"].fillna(False).astype("int64")
+    return book_ids.fillna(offset).astype("int64") + duplicate_flag * (offset + 1)
+
+
+def explode_book_authors(df: pd.DataFrame) -> pd.DataFrame:
+    """Return one row per (book_id, author) link for the author metrics (M1, M2)."""
 
-    return textual.merge(aggregated, on="canonical_book_id", how="left")
+    _ensure_columns(df, ["book_id", "authors_clean", "authors_raw"])
+    return explode_authors(df[["book_id", "authors_clean", "authors_raw"]].drop_duplicates())
+
+
+def _author_incidence(df: pd.DataFrame, authors: pd.DataFrame | AuthorIncidence | None) -> AuthorIncidence:
+    if authors is None:
+        return AuthorIncidence.from_books(df)
+    if isinstance(authors, pd.DataFrame):
+        return AuthorIncidence.from_links(authors, df["book_id"])
+    if authors.n_books != len(df):
+        raise ValueError(f"Author incidence covers {authors.n_books} books but the frame has {len(df)} rows")
+    return authors
 
 
 def compute_top_authors_by_weighted_rating(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     min_ratings: int = 5_000,
     top_n: int = 15,
+    authors: pd.DataFrame | AuthorIncidence | None = None,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
-    """M1 – Weighted average rating per author with a ratings floor."""
+    """M1 – Weighted average rating per author with a ratings floor.
 
-    _ensure_columns(df, ["book_id", "authors_clean", "authors_raw", "average_rating", "ratings_count", "canonical_book_id"])
+    Author totals are sparse products over the book × author incidence
+    (``authors`` may be a prebuilt :class:`AuthorIncidence` for ``df`` or an
+    exploded link table).
+    """
 
-    exploded = explode_authors(df[["book_id", "authors_clean", "authors_raw"]])
-    if exploded.empty:
-        return pd.DataFrame(columns=["author_name", "weighted_average_rating", "total_ratings", "book_count"])
+    if engine is not None:
+        return pushdown.pushdown_top_authors_by_weighted_rating(engine, min_ratings=min_ratings, top_n=top_n)
 
-    merged = exploded.merge(
-        df[["book_id", "canonical_book_id", "average_rating", "ratings_count"]],
-        on="book_id",
-        how="left",
-    )
-    merged = merged.dropna(subset=["author_name", "average_rating", "ratings_count"])
-    merged["weighted_sum"] = merged["average_rating"] * merged["ratings_count"]
+    _ensure_columns(df, ["book_id", "authors_clean", "authors_raw", "average_rating", "ratings_count", "canonical_book_id"])
 
-    grouped = (
-        merged.groupby("author_name", dropna=False)
-        .agg(
-            weighted_rating_sum=("weighted_sum", "sum"),
-            total_ratings=("ratings_count", "sum"),
-            book_count=("canonical_book_id", "nunique"),
-        )
-        .reset_index()
+    incidence = _author_incidence(df, authors)
+    rated = (df["average_rating"].notna() & df["ratings_count"].notna()).to_numpy()
+    grouped = pd.DataFrame(
+        {
+            "author_name": incidence.authors,
+            "weighted_rating_sum": incidence.author_sums((df["average_rating"] * df["ratings_count"]).where(rated, 0.0)),
+            "total_ratings": incidence.author_sums(df["ratings_count"].where(rated, 0)),
+            "book_count": incidence.distinct_counts(df["canonical_book_id"].where(rated)),
+        }
     )
+    grouped = grouped[incidence.author_sums(rated) > 0]
     filtered = grouped[grouped["total_ratings"] >= min_ratings]
     if filtered.empty:
         return pd.DataFrame(columns=["author_name", "weighted_average_rating", "total_ratings", "book_count"])
 
     filtered = filtered.copy()
     filtered["weighted_average_rating"] = filtered["weighted_rating_sum"] / filtered["total_ratings"]
-    result = filtered.sort_values(
-        ["weighted_average_rating", "total_ratings"], ascending=[False, False]
-    ).head(top_n)
+    result = top_n_rows(filtered, ["weighted_average_rating", "total_ratings"], top_n)
     return result[["author_name", "weighted_average_rating", "total_ratings", "book_count"]]
 
 
 def compute_top_books_by_ratings_count(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     top_n: int = 20,
+    canonical: pd.DataFrame | None = None,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
     """M3 – Leaderboard of canonical books sorted by capped ratings counts."""
 
-    canonical = _canonical_rollup(df)
-    result = canonical.sort_values(
-        ["ratings_count_capped", "ratings_count"], ascending=[False, False]
-    ).head(top_n)
+    if engine is not None:
+        return pushdown.pushdown_top_books_by_ratings_count(engine, top_n=top_n)
+
+    canonical = canonical_rollup(df) if canonical is None else canonical
+    result = top_n_rows(canonical, ["ratings_count_capped", "ratings_count"], top_n)
     columns = [
         "canonical_book_id",
         "title",
@@ -142,20 +246,23 @@ def compute_top_books_by_ratings_count(
         "ratings_count_capped",
         "language_code",
     ]
-    return result[columns]
+    return decode_keys(result[columns])
 
 
 def compute_top_books_by_text_reviews(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     top_n: int = 20,
+    canonical: pd.DataFrame | None = None,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
     """M4 – Highlight canonical books with the most written reviews."""
 
-    canonical = _canonical_rollup(df)
-    result = canonical.sort_values(
-        ["text_reviews_count_capped", "text_reviews_count"], ascending=[False, False]
-    ).head(top_n)
+    if engine is not None:
+        return pushdown.pushdown_top_books_by_text_reviews(engine, top_n=top_n)
+
+    canonical = canonical_rollup(df) if canonical is None else canonical
+    result = top_n_rows(canonical, ["text_reviews_count_capped", "text_reviews_count"], top_n)
     columns = [
         "canonical_book_id",
         "title",
@@ -164,34 +271,51 @@ def compute_top_books_by_text_reviews(
         "text_reviews_count_capped",
         "language_code",
     ]
-    return result[columns]
+    return decode_keys(result[columns])
 
 
-def compute_median_rating_by_page_bucket(df: pd.DataFrame) -> pd.DataFrame:
+def compute_median_rating_by_page_bucket(
+    df: pd.DataFrame | None,
+    *,
+    canonical: pd.DataFrame | None = None,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M5 – Median rating per page_length_bucket."""
 
+    if engine is not None:
+        return pushdown.pushdown_median_rating_by_page_bucket(engine)
+
     _ensure_columns(df, ["page_length_bucket", "average_rating", "canonical_book_id"])
-    canonical = _canonical_rollup(df)
-    grouped = (
-        canonical.groupby("page_length_bucket", dropna=False)
-        .agg(
-            median_rating=("average_rating", "median"),
-            book_count=("canonical_book_id", "nunique"),
-        )
-        .reset_index()
+    canonical = canonical_rollup(df) if canonical is None else canonical
+    grouped = _grouped_summary(
+        canonical,
+        "page_length_bucket",
+        {
+            "median_rating": ("average_rating", 0.5),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
-    return grouped.sort_values("median_rating", ascending=False)
+    return decode_keys(grouped.sort_values("median_rating", ascending=False))
 
 
 def compute_average_rating_by_publication_year(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     min_year: int | None = None,
+    canonical: pd.DataFrame | None = None,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
     """M7 – Average rating per publication year."""
 
+    if engine is not None:
+        return pushdown.pushdown_average_rating_by_publication_year(engine, min_year=min_year)
+
     _ensure_columns(df, ["publication_year", "average_rating", "canonical_book_id"])
-    canonical = _canonical_rollup(df)
+    canonical = canonical_rollup(df) if canonical is None else canonical
     data = canonical.dropna(subset=["publication_year"])
     if min_year is not None:
         data = data[data["publication_year"] >= min_year]
@@ -208,55 +332,75 @@ def compute_average_rating_by_publication_year(
 
 
 def compute_median_ratings_count_by_publication_year(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     min_year: int | None = None,
+    canonical: pd.DataFrame | None = None,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
     """M8 – Median capped ratings count per publication year."""
 
+    if engine is not None:
+        return pushdown.pushdown_median_ratings_count_by_publication_year(engine, min_year=min_year)
+
     _ensure_columns(df, ["publication_year", "ratings_count_capped", "canonical_book_id"])
-    canonical = _canonical_rollup(df)
+    canonical = canonical_rollup(df) if canonical is None else canonical
     data = canonical.dropna(subset=["publication_year"])
     if min_year is not None:
         data = data[data["publication_year"] >= min_year]
-    grouped = (
-        data.groupby("publication_year", dropna=False)
-        .agg(
-            median_ratings_count_capped=("ratings_count_capped", "median"),
-            book_count=("canonical_book_id", "nunique"),
-        )
-        .reset_index()
-        .sort_values("publication_year")
+    grouped = _grouped_summary(
+        data,
+        "publication_year",
+        {
+            "median_ratings_count_capped": ("ratings_count_capped", 0.5),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
-    return grouped
+    return grouped.sort_values("publication_year")
 
 
 def compute_language_rating_summary(
-    df: pd.DataFrame,
+    df: pd.DataFrame | None,
     *,
     min_books: int = 50,
+    canonical: pd.DataFrame | None = None,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
 ) -> pd.DataFrame:
     """M9 – Average rating per language with sufficient canonical coverage."""
 
+    if engine is not None:
+        return pushdown.pushdown_language_rating_summary(engine, min_books=min_books)
+
     _ensure_columns(df, ["language_code", "average_rating", "canonical_book_id", "ratings_count_capped"])
-    canonical = _canonical_rollup(df)
+    canonical = canonical_rollup(df) if canonical is None else canonical
     data = canonical.dropna(subset=["language_code"])
-    grouped = (
-        data.groupby("language_code", dropna=False)
-        .agg(
-            book_count=("canonical_book_id", "nunique"),
-            average_rating=("average_rating", "mean"),
-            median_ratings_count_capped=("ratings_count_capped", "median"),
-        )
-        .reset_index()
+    grouped = _grouped_summary(
+        data,
+        "language_code",
+        {
+            "book_count": ("canonical_book_id", "nunique"),
+            "average_rating": ("average_rating", "mean"),
+            "median_ratings_count_capped": ("ratings_count_capped", 0.5),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
     filtered = grouped[grouped["book_count"] >= min_books]
-    return filtered.sort_values(["average_rating", "book_count"], ascending=[False, False])
+    return decode_keys(filtered.sort_values(["average_rating", "book_count"], ascending=[False, False]))
 
 
-def compute_duplicate_share(df: pd.DataFrame) -> pd.DataFrame:
+def compute_duplicate_share(df: pd.DataFrame | None, *, engine: Engine | None = None) -> pd.DataFrame:
     """M11 – Share of rows flagged as duplicates (for canonical awareness)."""
 
+    if engine is not None:
+        return pushdown.pushdown_duplicate_share(engine)
+
     _ensure_columns(df, ["is_duplicate", "canonical_book_id"])
     total_rows = len(df)
     duplicate_rows = int(df["is_duplicate"].sum())
@@ -270,27 +414,30 @@ def compute_duplicate_share(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def compute_author_engagement_index(df: pd.DataFrame) -> pd.DataFrame:
+def compute_author_engagement_index(
+    df: pd.DataFrame | None,
+    *,
+    authors: pd.DataFrame | AuthorIncidence | None = None,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M2 (optional) – Simple author engagement index (z-score of two signals)."""
+
+    if engine is not None:
+        return pushdown.pushdown_author_engagement_index(engine)
+
     _ensure_columns(df, ["ratings_count_capped", "text_reviews_count_capped", "book_id", "authors_clean"])
-    # explode authors then aggregate per author
-    exploded = explode_authors(df[["book_id", "authors_clean", "authors_raw"]].drop_duplicates())
-    if exploded.empty:
+    # per-author sums over the book × author incidence
+    incidence = _author_incidence(df, authors)
+    if incidence.n_authors == 0:
         return pd.DataFrame(columns=["author_name", "engagement_index", "ratings_count_capped", "text_reviews_count_capped", "book_count"])
 
-    merged = exploded.merge(
-        df[["book_id", "ratings_count_capped", "text_reviews_count_capped", "canonical_book_id"]],
-        on="book_id",
-        how="left",
-    )
-    g = (
-        merged.groupby("author_name", dropna=False)
-        .agg(
-            ratings_count_capped=("ratings_count_capped", "sum"),
-            text_reviews_count_capped=("text_reviews_count_capped", "sum"),
-            book_count=("canonical_book_id", "nunique"),
-        )
-        .reset_index()
+    g = pd.DataFrame(
+        {
+            "author_name": incidence.authors,
+            "ratings_count_capped": incidence.author_sums(df["ratings_count_capped"]),
+            "text_reviews_count_capped": incidence.author_sums(df["text_reviews_count_capped"]),
+            "book_count": incidence.distinct_counts(df["canonical_book_id"]),
+        }
     )
     # compute z-scores without requiring scipy
     for col in ("ratings_count_capped", "text_reviews_count_capped"):
@@ -302,76 +449,152 @@ def compute_author_engagement_index(df: pd.DataFrame) -> pd.DataFrame:
     return g.sort_values("engagement_index", ascending=False)[["author_name", "engagement_index", "ratings_count_capped", "text_reviews_count_capped", "book_count"]]
 
 
-def compute_publisher_engagement(df: pd.DataFrame) -> pd.DataFrame:
+def compute_publisher_engagement(
+    df: pd.DataFrame | None,
+    *,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M10 (optional) – Publisher-level median engagement and counts."""
 
+    if engine is not None:
+        return pushdown.pushdown_publisher_engagement(engine)
+
     _ensure_columns(df, ["publisher", "ratings_count_capped", "canonical_book_id"])
-    res = (
-        df.dropna(subset=["publisher"]) 
-        .groupby("publisher", dropna=False)
-        .agg(median_ratings_count_capped=("ratings_count_capped", "median"), book_count=("canonical_book_id", "nunique"))
-        .reset_index()
+    res = _grouped_summary(
+        df.dropna(subset=["publisher"]),
+        "publisher",
+        {
+            "median_ratings_count_capped": ("ratings_count_capped", 0.5),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
-    return res.sort_values("median_ratings_count_capped", ascending=False)
+    return decode_keys(res.sort_values("median_ratings_count_capped", ascending=False))
 
 
-def compute_page_length_engagement_delta(df: pd.DataFrame) -> pd.DataFrame:
+def compute_page_length_engagement_delta(
+    df: pd.DataFrame | None,
+    *,
+    canonical: pd.DataFrame | None = None,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M6 (optional) – Engagement delta by page length bucket."""
 
+    if engine is not None:
+        return pushdown.pushdown_page_length_engagement_delta(engine)
+
     _ensure_columns(df, ["page_length_bucket", "ratings_count_capped", "text_reviews_count_capped", "canonical_book_id"])
-    canonical = _canonical_rollup(df)
-    g = (
-        canonical.groupby("page_length_bucket", dropna=False)
-        .agg(
-            median_ratings_count_capped=("ratings_count_capped", "median"),
-            median_text_reviews_capped=("text_reviews_count_capped", "median"),
-            book_count=("canonical_book_id", "nunique"),
-        )
-        .reset_index()
+    canonical = canonical_rollup(df) if canonical is None else canonical
+    g = _grouped_summary(
+        canonical,
+        "page_length_bucket",
+        {
+            "median_ratings_count_capped": ("ratings_count_capped", 0.5),
+            "median_text_reviews_capped": ("text_reviews_count_capped", 0.5),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
     g["engagement_delta"] = g["median_ratings_count_capped"] - g["median_text_reviews_capped"]
-    return g
+    return decode_keys(g)
 
 
-def compute_engagement_uplift_canonical(df: pd.DataFrame) -> pd.DataFrame:
+def compute_engagement_uplift_canonical(
+    df: pd.DataFrame | None,
+    *,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M12 (optional) – Compare canonical vs duplicate median engagement."""
 
+    if engine is not None:
+        return pushdown.pushdown_engagement_uplift_canonical(engine)
+
     _ensure_columns(df, ["is_duplicate", "ratings_count_capped", "canonical_book_id"])
     # create edition_type column for clarity
     tmp = df.copy()
     tmp["edition_type"] = tmp["is_duplicate"].map({False: "canonical", True: "duplicate"})
-    res = (
-        tmp.groupby("edition_type", dropna=False)
-        .agg(median_ratings_count=("ratings_count_capped", "median"), book_count=("canonical_book_id", "nunique"))
-        .reset_index()
+    res = _grouped_summary(
+        tmp,
+        "edition_type",
+        {
+            "median_ratings_count": ("ratings_count_capped", 0.5),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
     return res
 
 
-def compute_publisher_language_rankings(df: pd.DataFrame) -> pd.DataFrame:
+def compute_publisher_language_rankings(
+    df: pd.DataFrame | None,
+    *,
+    quantile_mode: str = "exact",
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
     """M13 (optional) – Publisher × language rankings (average rating and p75 engagement)."""
 
+    if engine is not None:
+        return rank_publisher_languages(pushdown.pushdown_publisher_language_rankings(engine))
+
     _ensure_columns(df, ["publisher", "language_code", "average_rating", "ratings_count_capped"])
-    res = (
-        df.dropna(subset=["publisher", "language_code"]) 
-        .groupby(["publisher", "language_code"], dropna=False)
-        .agg(average_rating=("average_rating", "mean"), p75_ratings_count=("ratings_count_capped", lambda s: s.quantile(0.75)), book_count=("canonical_book_id", "nunique"))
-        .reset_index()
+    res = _grouped_summary(
+        df.dropna(subset=["publisher", "language_code"]),
+        ["publisher", "language_code"],
+        {
+            "average_rating": ("average_rating", "mean"),
+            "p75_ratings_count": ("ratings_count_capped", 0.75),
+            "book_count": ("canonical_book_id", "nunique"),
+        },
+        quantile_mode=quantile_mode,
+        relative_accuracy=relative_accuracy,
     )
-    return res.sort_values(["average_rating", "p75_ratings_count"], ascending=[False, False])
+    return rank_publisher_languages(decode_keys(res))
 
 
-def compute_publication_year_rolling_stats(df: pd.DataFrame, window: int = 3) -> pd.DataFrame:
-    """M14 (optional) – Rolling statistics by publication year (default window=3)."""
+def rank_publisher_languages(res: pd.DataFrame) -> pd.DataFrame:
+    """Order M13 rows by rating and p75 engagement, ties broken by publisher then language.
 
-    _ensure_columns(df, ["publication_year", "average_rating", "canonical_book_id"])
-    canonical = _canonical_rollup(df)
-    ts = (
-        canonical.dropna(subset=["publication_year"]) 
-        .groupby("publication_year", dropna=False)
-        .agg(average_rating=("average_rating", "mean"), book_count=("canonical_book_id", "nunique"))
-        .sort_index()
+    The cube and the incremental state sum ratings in another order than a
+    groupby mean, so equal averages can differ in the last bit; ranking on the
+    average rounded to 9 decimals treats those as the ties they are, and every
+    M13 source then lists the rows in the same order.
+    """
+
+    ranked = res.assign(_rating_rank=res["average_rating"].round(9)).sort_values(
+        ["_rating_rank", "p75_ratings_count", "publisher", "language_code"],
+        ascending=[False, False, True, True],
+        kind="stable",
     )
-    ts["rolling_average_rating"] = ts["average_rating"].rolling(window=window, min_periods=1).mean()
-    ts = ts.reset_index()
-    return ts
+    return ranked.drop(columns="_rating_rank")
+
+
+def compute_publication_year_rolling_stats(
+    df: pd.DataFrame | None,
+    window: int | Sequence[int] = 3,
+    *,
+    canonical: pd.DataFrame | None = None,
+    engine: Engine | None = None,
+) -> pd.DataFrame:
+    """M14 (optional) – Rolling statistics by publication year (default window=3).
+
+    Both the mean of yearly means and the book-weighted rolling rating come
+    from prefix sums (:mod:`src.metrics.timeseries`); pass several window
+    sizes to get one suffixed column pair per size from a single grouping.
+    """
+
+    if engine is not None:
+        return pushdown.pushdown_publication_year_rolling_stats(engine, window)
+
+    _ensure_columns(df, ["publication_year", "average_rating", "canonical_book_id"])
+    canonical = canonical_rollup(df) if canonical is None else canonical
+    return year_series(canonical).rolling_frame(window)
@@ -0,0 +1,336 @@
+"""Precomputed metrics cube over year × language × page bucket × publisher.
+
+``build_cube`` scans ``books_clean`` once and keeps, per cell of the four
+dimensions, additive counts and sums plus value histograms (or, with
+``relative_accuracy``, the mergeable sketches from
+:mod:`src.metrics.quantiles`). Two grains share the dimensions:
+
+* ``canonical`` – one fact per canonical book (its representative row), which
+  answers M5, M7, M8, M9 and M14;
+* ``editions`` – one fact per row, which answers M10 and M13. Distinct
+  canonical counts stay additive because each canonical book is flagged once
+  per publisher (and per publisher × language) on its first edition.
+
+The ``cube_*`` helpers roll the cells up to the same tables the ``compute_*``
+functions return. ``save_cube``/``load_cube`` persist the cube as a columnar
+``.npz`` file (string dimensions dictionary-encoded), so report runs and
+ad-hoc slices skip the CSV entirely; ``cube_metadata`` reads back the format
+tag, version and quantile settings it was built with without loading cells.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.metrics.core_metrics import canonical_rollup, rank_publisher_languages
+from src.metrics.quantiles import build_sketch, histogram_quantile, sketch_quantile
+from src.metrics.timeseries import YearSeries
+
+__all__ = [
+    "CUBE_DIMENSIONS",
+    "MetricsCube",
+    "build_cube",
+    "save_cube",
+    "load_cube",
+    "cube_metadata",
+    "cube_median_rating_by_page_bucket",
+    "cube_average_rating_by_publication_year",
+    "cube_median_ratings_count_by_publication_year",
+    "cube_language_rating_summary",
+    "cube_publisher_engagement",
+    "cube_publisher_language_rankings",
+    "cube_publication_year_rolling_stats",
+]
+
+CUBE_FORMAT = "goodreads-metrics-cube"
+CUBE_VERSION = 2
+CUBE_DIMENSIONS = ("publication_year", "language_code", "page_length_bucket", "publisher")
+
+
+@dataclass
+class MetricsCube:
+    """Flat cell tables: the dimension columns followed by their measures."""
+
+    canonical: pd.DataFrame
+    editions: pd.DataFrame
+    histograms: dict[str, pd.DataFrame] = field(default_factory=dict)
+    relative_accuracy: float | None = None
+
+    @property
+    def quantile_mode(self) -> str:
+        return "exact" if self.relative_accuracy is None else "approx"
+
+
+# ---------------------------------------------------------------------------
+# Build / persist
+# ---------------------------------------------------------------------------
+
+
+def _histogram(frame: pd.DataFrame, value: str, relative_accuracy: float | None) -> pd.DataFrame:
+    dims = list(CUBE_DIMENSIONS)
+    if relative_accuracy is not None:
+        hist = build_sketch(frame, dims, value, relative_accuracy, dropna=False)
+    else:
+        hist = frame.dropna(subset=[value]).groupby([*dims, value], dropna=False).size().to_frame("count")
+    return hist.rename_axis([*dims, "value"]).reset_index()
+
+
+def _first_edition(rows: pd.DataFrame, keys: list[str]) -> pd.Series:
+    return (~rows.duplicated([*keys, "canonical_book_id"]) & rows["canonical_book_id"].notna()).astype("int64")
+
+
+def build_cube(df: pd.DataFrame, *, relative_accuracy: float | None = None) -> MetricsCube:
+    """Aggregate ``books_clean`` into canonical- and edition-level cells."""
+
+    dims = list(CUBE_DIMENSIONS)
+    canonical = canonical_rollup(df, with_representative=True)
+    publishers = df.drop_duplicates("book_id").set_index("book_id")["publisher"]
+    canonical = canonical.assign(
+        publisher=canonical["representative_book_id"].map(publishers).to_numpy()
+    )
+
+    grouped = canonical.groupby(dims, dropna=False)
+    canonical_cells = grouped.size().to_frame("books")
+    canonical_cells["rating_sum"] = grouped["average_rating"].sum()
+    canonical_cells["rating_count"] = grouped["average_rating"].count()
+
+    rows = df.assign(
+        canonical_in_publisher=_first_edition(df, ["publisher"]),
+        canonical_in_publisher_language=_first_edition(df, ["publisher", "language_code"]),
+    )
+    grouped = rows.groupby(dims, dropna=False)
+    edition_cells = grouped.size().to_frame("rows")
+    edition_cells["rating_sum"] = grouped["average_rating"].sum()
+    edition_cells["rating_count"] = grouped["average_rating"].count()
+    edition_cells["canonical_in_publisher"] = grouped["canonical_in_publisher"].sum()
+    edition_cells["canonical_in_publisher_language"] = grouped["canonical_in_publisher_language"].sum()
+
+    return MetricsCube(
+        canonical=canonical_cells.reset_index(),
+        editions=edition_cells.reset_index(),
+        histograms={
+            "canonical_rating": _histogram(canonical, "average_rating", relative_accuracy),
+            "canonical_ratings_count": _histogram(canonical, "ratings_count_capped", relative_accuracy),
+            "editions_ratings_count": _histogram(rows, "ratings_count_capped", relative_accuracy),
+        },
+        relative_accuracy=relative_accuracy,
+    )
+
+
+def _encode(name: str, table: pd.DataFrame, arrays: dict[str, np.ndarray]) -> None:
+    arrays[f"{name}/__columns__"] = np.asarray(table.columns, dtype=str)
+    for column in table.columns:
+        series = table[column]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            arrays[f"{name}/{column}"] = series.to_numpy(dtype="float64" if series.isna().any() else None)
+        else:
+            codes, labels = pd.factorize(series)
+            arrays[f"{name}/{column}/codes"] = codes.astype(np.int32)
+            arrays[f"{name}/{column}/labels"] = np.asarray(labels, dtype=str)
+
+
+def _decode(name: str, arrays: dict[str, np.ndarray]) -> pd.DataFrame:
+    columns: dict[str, object] = {}
+    for column in arrays[f"{name}/__columns__"].tolist():
+        if f"{name}/{column}" in arrays:
+            columns[column] = arrays[f"{name}/{column}"]
+        else:
+            codes = arrays[f"{name}/{column}/codes"]
+            labels = pd.Index(arrays[f"{name}/{column}/labels"], dtype="str")
+            columns[column] = pd.Series(labels.take(codes), dtype="str").mask(codes < 0)
+    return pd.DataFrame(columns)
+
+
+def save_cube(cube: MetricsCube, path: Path) -> Path:
+    """Write ``cube`` as a compressed columnar ``.npz`` file."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays: dict[str, np.ndarray] = {
+        "__format__": np.asarray(CUBE_FORMAT),
+        "__version__": np.asarray(CUBE_VERSION),
+        "__quantile_mode__": np.asarray(cube.quantile_mode),
+        "__relative_accuracy__": np.asarray(np.nan if cube.relative_accuracy is None else cube.relative_accuracy),
+        "__histograms__": np.asarray(sorted(cube.histograms), dtype=str),
+    }
+    _encode("canonical", cube.canonical, arrays)
+    _encode("editions", cube.editions, arrays)
+    for name, table in cube.histograms.items():
+        _encode(f"hist/{name}", table, arrays)
+    with path.open("wb") as handle:
+        np.savez_compressed(handle, **arrays)
+    return path
+
+
+def cube_metadata(path: Path) -> dict[str, object]:
+    """Format tag, version and quantile settings of the cube file at ``path``.
+
+    Only the small header arrays are read. Files written before the format tag
+    existed report ``format=None``.
+    """
+
+    if not path.exists():
+        raise FileNotFoundError(f"Could not find metrics cube at {path}")
+    with np.load(path, allow_pickle=False) as payload:
+        header = {key: payload[key] for key in payload.files if key.startswith("__") and key != "__histograms__"}
+    accuracy = float(header.get("__relative_accuracy__", np.nan))
+    return {
+        "format": str(header["__format__"]) if "__format__" in header else None,
+        "version": int(header["__version__"]) if "__version__" in header else None,
+        "quantile_mode": "exact" if np.isnan(accuracy) else "approx",
+        "relative_accuracy": None if np.isnan(accuracy) else accuracy,
+    }
+
+
+def load_cube(path: Path) -> MetricsCube:
+    metadata = cube_metadata(path)
+    if metadata["format"] != CUBE_FORMAT or metadata["version"] != CUBE_VERSION:
+        raise ValueError(
+            f"Metrics cube at {path} has format {metadata['format']!r} version {metadata['version']}; "
+            f"expected {CUBE_FORMAT!r} version {CUBE_VERSION}"
+        )
+    with np.load(path, allow_pickle=False) as payload:
+        arrays = {key: payload[key] for key in payload.files}
+    return MetricsCube(
+        canonical=_decode("canonical", arrays),
+        editions=_decode("editions", arrays),
+        histograms={name: _decode(f"hist/{name}", arrays) for name in arrays["__histograms__"].tolist()},
+        relative_accuracy=metadata["relative_accuracy"],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Slices
+# ---------------------------------------------------------------------------
+
+
+def _restrict(table: pd.DataFrame, notna: Sequence[str] = (), min_year: int | None = None) -> pd.DataFrame:
+    mask = np.ones(len(table), dtype=bool)
+    for column in notna:
+        mask &= table[column].notna().to_numpy()
+    if min_year is not None:
+        mask &= (table["publication_year"] >= min_year).to_numpy()
+    return table.loc[mask]
+
+
+def _rollup(table: pd.DataFrame, keys: list[str], measures: list[str]) -> pd.DataFrame:
+    return table.groupby(keys, dropna=False)[measures].sum()
+
+
+def _quantile(cube: MetricsCube, hist: pd.DataFrame, keys: list[str], q: float) -> pd.Series:
+    counts = hist.groupby([*keys, "value"], dropna=False)["count"].sum().to_frame("count")
+    if cube.relative_accuracy is not None:
+        return sketch_quantile(counts, q, cube.relative_accuracy)
+    return histogram_quantile(counts, q)
+
+
+def _mean(cells: pd.DataFrame) -> pd.Series:
+    counts = cells["rating_count"]
+    return (cells["rating_sum"] / counts.where(counts > 0)).astype("float64")
+
+
+def cube_median_rating_by_page_bucket(cube: MetricsCube) -> pd.DataFrame:
+    """M5 sliced from the cube."""
+
+    keys = ["page_length_bucket"]
+    cells = _rollup(cube.canonical, keys, ["books"])
+    grouped = pd.DataFrame(
+        {
+            "median_rating": _quantile(cube, cube.histograms["canonical_rating"], keys, 0.5).reindex(cells.index),
+            "book_count": cells["books"],
+        }
+    ).reset_index()
+    return grouped.sort_values("median_rating", ascending=False)
+
+
+def _year_cells(cube: MetricsCube, min_year: int | None) -> pd.DataFrame:
+    canonical = _restrict(cube.canonical, ["publication_year"], min_year)
+    return _rollup(canonical, ["publication_year"], ["books", "rating_sum", "rating_count"])
+
+
+def cube_average_rating_by_publication_year(cube: MetricsCube, *, min_year: int | None = None) -> pd.DataFrame:
+    """M7 sliced from the cube."""
+
+    cells = _year_cells(cube, min_year)
+    grouped = pd.DataFrame({"average_rating": _mean(cells), "book_count": cells["books"]})
+    return grouped.reset_index().sort_values("publication_year")
+
+
+def cube_median_ratings_count_by_publication_year(
+    cube: MetricsCube,
+    *,
+    min_year: int | None = None,
+) -> pd.DataFrame:
+    """M8 sliced from the cube."""
+
+    keys = ["publication_year"]
+    cells = _year_cells(cube, min_year)
+    hist = _restrict(cube.histograms["canonical_ratings_count"], keys, min_year)
+    grouped = pd.DataFrame(
+        {
+            "median_ratings_count_capped": _quantile(cube, hist, keys, 0.5).reindex(cells.index),
+            "book_count": cells["books"],
+        }
+    )
+    return grouped.reset_index().sort_values("publication_year")
+
+
+def cube_language_rating_summary(cube: MetricsCube, *, min_books: int = 50) -> pd.DataFrame:
+    """M9 sliced from the cube."""
+
+    keys = ["language_code"]
+    cells = _rollup(_restrict(cube.canonical, keys), keys, ["books", "rating_sum", "rating_count"])
+    hist = _restrict(cube.histograms["canonical_ratings_count"], keys)
+    grouped = pd.DataFrame(
+        {
+            "book_count": cells["books"],
+            "average_rating": _mean(cells),
+            "median_ratings_count_capped": _quantile(cube, hist, keys, 0.5).reindex(cells.index),
+        }
+    ).reset_index()
+    filtered = grouped[grouped["book_count"] >= min_books]
+    return filtered.sort_values(["average_rating", "book_count"], ascending=[False, False])
+
+
+def cube_publisher_engagement(cube: MetricsCube) -> pd.DataFrame:
+    """M10 sliced from the cube."""
+
+    keys = ["publisher"]
+    cells = _rollup(_restrict(cube.editions, keys), keys, ["canonical_in_publisher"])
+    hist = _restrict(cube.histograms["editions_ratings_count"], keys)
+    res = pd.DataFrame(
+        {
+            "median_ratings_count_capped": _quantile(cube, hist, keys, 0.5).reindex(cells.index),
+            "book_count": cells["canonical_in_publisher"],
+        }
+    ).reset_index()
+    return res.sort_values("median_ratings_count_capped", ascending=False)
+
+
+def cube_publisher_language_rankings(cube: MetricsCube) -> pd.DataFrame:
+    """M13 sliced from the cube."""
+
+    keys = ["publisher", "language_code"]
+    cells = _rollup(
+        _restrict(cube.editions, keys),
+        keys,
+        ["rating_sum", "rating_count", "canonical_in_publisher_language"],
+    )
+    hist = _restrict(cube.histograms["editions_ratings_count"], keys)
+    res = pd.DataFrame(
+        {
+            "average_rating": _mean(cells),
+            "p75_ratings_count": _quantile(cube, hist, keys, 0.75).reindex(cells.index),
+            "book_count": cells["canonical_in_publisher_language"],
+        }
+    ).reset_index()
+    return rank_publisher_languages(res)
+
+
+def cube_publication_year_rolling_stats(cube: MetricsCube, window: int | Sequence[int] = 3) -> pd.DataFrame:
+    """M14 sliced from the cube."""
+
+    return YearSeries.from_aggregates(_year_cells(cube, None)).rolling_frame(window)
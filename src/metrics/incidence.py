@@ -0,0 +1,111 @@
+"""Sparse book × author incidence for the author metrics (M1, M2).
+
+Instead of exploding one row per (book, author) link and merging the book
+columns back onto it, :class:`AuthorIncidence` keeps the links as CSR arrays:
+row ``i`` of the matrix is the ``i``-th row of the books frame and lists the
+codes of its authors in a sorted author dictionary. Author-level totals are
+then the transposed matrix–vector product ``Aᵀx`` over any per-book column
+(a weighted ``np.bincount``), and distinct-book counts come from the unique
+(author, label) code pairs, so no book column is ever repeated per author.
+
+The links are parsed once per distinct ``authors_clean`` string with the same
+rules as ``src.cleaning.explode_authors``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from src.cleaning import _split_authors
+from src.metrics.keys import decode_keys
+
+__all__ = ["AuthorIncidence"]
+
+
+@dataclass(frozen=True)
+class AuthorIncidence:
+    """CSR incidence matrix: ``indices[indptr[i]:indptr[i + 1]]`` are book ``i``'s author codes."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    authors: pd.Index
+
+    @property
+    def n_books(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_authors(self) -> int:
+        return len(self.authors)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_books(cls, df: pd.DataFrame, *, column: str = "authors_clean") -> "AuthorIncidence":
+        """Parse the author strings of ``df`` (rows without a ``book_id`` get no links)."""
+
+        strings, uniques = pd.factorize(df[column])
+        strings = np.where(df["book_id"].isna().to_numpy(), -1, strings)
+        token_lists = [_split_authors(value) for value in uniques]
+        lengths = np.fromiter(map(len, token_lists), dtype="int64", count=len(token_lists))
+        names = pd.Series(list(chain.from_iterable(token_lists)), dtype="str")
+        codes, authors = pd.factorize(names, sort=True)
+
+        linked = strings >= 0
+        degrees = np.zeros(len(strings), dtype="int64")
+        degrees[linked] = lengths[strings[linked]]
+        indptr = np.concatenate([[0], np.cumsum(degrees)])
+        # Each book's links are a copy of its author string's run in ``codes``.
+        string_starts = np.concatenate([[0], np.cumsum(lengths)])[:-1]
+        shift = string_starts[strings[linked]] - indptr[:-1][linked]
+        offsets = np.repeat(shift, degrees[linked]) + np.arange(indptr[-1])
+        return cls(indptr, codes[offsets], pd.Index(authors))
+
+    @classmethod
+    def from_links(cls, links: pd.DataFrame, book_ids: pd.Series) -> "AuthorIncidence":
+        """Build from exploded ``(book_id, author_name)`` links against the rows holding ``book_ids``.
+
+        Authors whose books are absent from ``book_ids`` stay in the dictionary
+        with empty columns, like a left merge of the links onto the books.
+        """
+
+        rows_index = pd.Index(book_ids)
+        if not rows_index.is_unique:
+            raise ValueError("book_ids must be unique to align author links with book rows")
+        names = decode_keys(links, ["author_name"])["author_name"]
+        valid = names.notna().to_numpy()
+        codes, authors = pd.factorize(names[valid], sort=True)
+        rows = rows_index.get_indexer(links["book_id"][valid])
+        keep = rows >= 0
+        order = np.argsort(rows[keep], kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=len(rows_index)))])
+        return cls(indptr, codes[keep][order], pd.Index(authors))
+
+    def _link_values(self, values: np.ndarray) -> np.ndarray:
+        return np.repeat(values, np.diff(self.indptr))
+
+    def author_sums(self, values: pd.Series | np.ndarray) -> np.ndarray:
+        """``Aᵀx``: per-author sum of a per-book column (missing values count as zero).
+
+        Integer and boolean columns keep an integer result, like a groupby sum.
+        """
+
+        series = pd.Series(values, copy=False)
+        integer = pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series)
+        data = series.to_numpy(dtype="float64", na_value=0.0)
+        sums = np.bincount(self.indices, weights=self._link_values(data), minlength=self.n_authors)
+        return sums.astype("int64") if integer else sums
+
+    def distinct_counts(self, labels: pd.Series | np.ndarray) -> np.ndarray:
+        """Per-author number of distinct non-missing ``labels`` among their books."""
+
+        codes, uniques = pd.factorize(pd.Series(labels, copy=False))
+        links = self._link_values(codes)
+        valid = links >= 0
+        pairs = np.unique(self.indices[valid].astype("int64") * max(len(uniques), 1) + links[valid])
+        return np.bincount(pairs // max(len(uniques), 1), minlength=self.n_authors)
@@ -0,0 +1,603 @@
+"""Mergeable aggregate state behind the core metrics (incremental mode).
+
+``build_state`` condenses ``books_clean`` into additive per-group aggregates:
+weighted sums, counts, ``(group, canonical_book_id)`` multiplicities for the
+distinct-canonical counts, and ``(group, value)`` histograms that keep the
+median/p75 metrics exact (or, with ``relative_accuracy`` set, log-bucket
+sketches from :mod:`src.metrics.quantiles` whose size no longer grows with
+the catalogue). ``apply_delta`` retracts the old contribution of
+every changed or removed book (and of the canonical groups they touch) and
+adds the new one, so a daily delta never rescans the full catalogue. The
+``state_*`` helpers derive the same tables as the ``compute_*`` functions in
+:mod:`src.metrics.core_metrics`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.metrics.core_metrics import (
+    canonical_rollup,
+    compute_top_books_by_ratings_count,
+    compute_top_books_by_text_reviews,
+    explode_book_authors,
+    rank_publisher_languages,
+)
+from src.metrics.quantiles import build_sketch, histogram_quantile, sketch_quantile
+from src.metrics.selection import top_n_rows
+from src.metrics.timeseries import YearSeries
+
+__all__ = [
+    "CoreMetricsState",
+    "build_state",
+    "apply_delta",
+    "save_state",
+    "load_state",
+    "state_top_authors_by_weighted_rating",
+    "state_top_books_by_ratings_count",
+    "state_top_books_by_text_reviews",
+    "state_median_rating_by_page_bucket",
+    "state_average_rating_by_publication_year",
+    "state_median_ratings_count_by_publication_year",
+    "state_language_rating_summary",
+    "state_duplicate_share",
+    "state_author_engagement_index",
+    "state_publisher_engagement",
+    "state_page_length_engagement_delta",
+    "state_engagement_uplift_canonical",
+    "state_publisher_language_rankings",
+    "state_publication_year_rolling_stats",
+]
+
+STATE_VERSION = 1
+# Stand-in for missing group keys that the metrics keep (groupby dropna=False).
+MISSING_KEY = "__missing__"
+
+BOOK_COLUMNS = [
+    "book_id",
+    "canonical_book_id",
+    "is_duplicate",
+    "title",
+    "authors_clean",
+    "authors_raw",
+    "language_code",
+    "publisher",
+    "page_length_bucket",
+    "media_type_hint",
+    "publication_year",
+    "average_rating",
+    "num_pages",
+    "num_pages_capped",
+    "ratings_count",
+    "ratings_count_capped",
+    "text_reviews_count",
+    "text_reviews_count_capped",
+]
+
+
+@dataclass
+class CoreMetricsState:
+    """Persisted inputs for incremental metric maintenance.
+
+    ``books`` is the narrow book-level store needed to retract changed rows,
+    ``canonical`` the canonical rollup (with representative ids), and
+    ``aggregates`` the additive tables keyed by group (first column = support).
+    ``relative_accuracy`` is set when the ``*_hist`` tables are sketches.
+    """
+
+    books: pd.DataFrame
+    canonical: pd.DataFrame
+    aggregates: dict[str, pd.DataFrame] = field(default_factory=dict)
+    relative_accuracy: float | None = None
+
+    @property
+    def quantile_mode(self) -> str:
+        return "exact" if self.relative_accuracy is None else "approx"
+
+
+# ---------------------------------------------------------------------------
+# Contributions
+# ---------------------------------------------------------------------------
+
+
+def _size(frame: pd.DataFrame, keys: list[str], name: str = "rows") -> pd.DataFrame:
+    return frame.groupby(keys).size().to_frame(name)
+
+
+def _histogram(
+    frame: pd.DataFrame,
+    keys: list[str],
+    value: str,
+    *,
+    relative_accuracy: float | None = None,
+) -> pd.DataFrame:
+    if relative_accuracy is not None:
+        return build_sketch(frame, keys, value, relative_accuracy)
+    return _size(frame.dropna(subset=[value]), [*keys, value], name="count")
+
+
+def _rating_sums(frame: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    grouped = frame.groupby(keys)
+    out = grouped.size().to_frame("rows")
+    out["rating_sum"] = grouped["average_rating"].sum()
+    out["rating_count"] = grouped["average_rating"].count()
+    return out
+
+
+def _canonical_contributions(
+    canonical: pd.DataFrame,
+    relative_accuracy: float | None,
+) -> dict[str, pd.DataFrame]:
+    hist = partial(_histogram, relative_accuracy=relative_accuracy)
+    data = canonical.assign(page_length_bucket=canonical["page_length_bucket"].fillna(MISSING_KEY))
+    dated = data.dropna(subset=["publication_year"])
+    languages = data.dropna(subset=["language_code"])
+    return {
+        "page_bucket": _size(data, ["page_length_bucket"]),
+        "page_bucket_rating_hist": hist(data, ["page_length_bucket"], "average_rating"),
+        "page_bucket_ratings_hist": hist(data, ["page_length_bucket"], "ratings_count_capped"),
+        "page_bucket_reviews_hist": hist(data, ["page_length_bucket"], "text_reviews_count_capped"),
+        "year": _rating_sums(dated, ["publication_year"]),
+        "year_ratings_hist": hist(dated, ["publication_year"], "ratings_count_capped"),
+        "language": _rating_sums(languages, ["language_code"]),
+        "language_ratings_hist": hist(languages, ["language_code"], "ratings_count_capped"),
+    }
+
+
+def _row_contributions(rows: pd.DataFrame, relative_accuracy: float | None) -> dict[str, pd.DataFrame]:
+    hist = partial(_histogram, relative_accuracy=relative_accuracy)
+    editions = rows.assign(
+        edition_type=rows["is_duplicate"].map({False: "canonical", True: "duplicate"}).fillna(MISSING_KEY)
+    )
+    publishers = rows.dropna(subset=["publisher"])
+    pairs = rows.dropna(subset=["publisher", "language_code"])
+    totals = pd.DataFrame(
+        {"rows": [len(rows)], "duplicate_rows": [int(rows["is_duplicate"].sum())]},
+        index=pd.Index(["all"], name="scope"),
+    )
+    return {
+        "totals": totals,
+        "edition": _size(editions, ["edition_type"]),
+        "edition_ratings_hist": hist(editions, ["edition_type"], "ratings_count_capped"),
+        "edition_canonical": _size(editions, ["edition_type", "canonical_book_id"]),
+        "publisher": _size(publishers, ["publisher"]),
+        "publisher_ratings_hist": hist(publishers, ["publisher"], "ratings_count_capped"),
+        "publisher_canonical": _size(publishers, ["publisher", "canonical_book_id"]),
+        "publisher_language": _rating_sums(pairs, ["publisher", "language_code"]),
+        "publisher_language_ratings_hist": hist(pairs, ["publisher", "language_code"], "ratings_count_capped"),
+        "publisher_language_canonical": _size(pairs, ["publisher", "language_code", "canonical_book_id"]),
+    }
+
+
+def _author_contributions(rows: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    links = explode_book_authors(rows)
+    if links.empty:
+        links = pd.DataFrame({"book_id": pd.Series(dtype="int64"), "author_name": pd.Series(dtype="str")})
+    merged = links.loc[:, ["book_id", "author_name"]].merge(
+        rows[
+            [
+                "book_id",
+                "canonical_book_id",
+                "average_rating",
+                "ratings_count",
+                "ratings_count_capped",
+                "text_reviews_count_capped",
+            ]
+        ],
+        on="book_id",
+        how="left",
+    )
+
+    grouped = merged.groupby("author_name")
+    engagement = grouped.size().to_frame("rows")
+    engagement["ratings_count_capped"] = grouped["ratings_count_capped"].sum()
+    engagement["text_reviews_count_capped"] = grouped["text_reviews_count_capped"].sum()
+
+    rated = merged.dropna(subset=["author_name", "average_rating", "ratings_count"])
+    rated = rated.assign(weighted_sum=rated["average_rating"] * rated["ratings_count"])
+    grouped = rated.groupby("author_name")
+    weighted = grouped.size().to_frame("rows")
+    weighted["weighted_rating_sum"] = grouped["weighted_sum"].sum()
+    weighted["total_ratings"] = grouped["ratings_count"].sum()
+
+    return {
+        "author_engagement": engagement,
+        "author_canonical": _size(merged, ["author_name", "canonical_book_id"]),
+        "author_weighted": weighted,
+        "author_weighted_canonical": _size(rated, ["author_name", "canonical_book_id"]),
+    }
+
+
+def _combine(
+    base: dict[str, pd.DataFrame],
+    delta: dict[str, pd.DataFrame],
+    *,
+    sign: int = 1,
+) -> dict[str, pd.DataFrame]:
+    """Add (``sign=1``) or retract (``sign=-1``) ``delta`` from ``base``."""
+
+    combined: dict[str, pd.DataFrame] = {}
+    for name in base.keys() | delta.keys():
+        parts = [frame for frame in (base.get(name), delta.get(name)) if frame is not None]
+        if len(parts) == 2:
+            current, change = parts
+            if change.empty:
+                combined[name] = current
+                continue
+            stacked = pd.concat([current, change * sign])
+            merged = stacked.groupby(level=list(range(stacked.index.nlevels))).sum()
+            combined[name] = merged[merged.iloc[:, 0] != 0]
+        else:
+            combined[name] = parts[0] if sign == 1 else parts[0] * sign
+    return combined
+
+
+def _aggregate(
+    books: pd.DataFrame,
+    canonical: pd.DataFrame,
+    relative_accuracy: float | None = None,
+) -> dict[str, pd.DataFrame]:
+    return {
+        **_canonical_contributions(canonical, relative_accuracy),
+        **_row_contributions(books, relative_accuracy),
+        **_author_contributions(books),
+    }
+
+
+def _canonical_order_keys(canonical: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    orphaned = (canonical["representative_book_id"] != canonical["canonical_book_id"]).to_numpy(dtype=bool)
+    return orphaned, canonical["representative_book_id"].to_numpy(dtype="float64")
+
+
+def _merge_canonical(kept: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+    """Insert ``fresh`` rows into the already ordered ``kept`` rollup.
+
+    The rollup is ordered by (orphaned, representative_book_id); only the
+    fresh rows are sorted, then placed by binary search, so the cost beyond
+    the affected groups is a linear copy rather than a full re-sort.
+    """
+
+    if fresh.empty:
+        return kept.reset_index(drop=True)
+    kept_orphaned, kept_ids = _canonical_order_keys(kept)
+    fresh_orphaned, fresh_ids = _canonical_order_keys(fresh)
+    fresh_order = np.lexsort((fresh_ids, fresh_orphaned))
+    fresh_orphaned, fresh_ids = fresh_orphaned[fresh_order], fresh_ids[fresh_order]
+
+    # ``kept`` holds its non-orphaned block first; search within each block.
+    split = int(np.searchsorted(kept_orphaned, True))
+    positions = np.where(
+        fresh_orphaned,
+        split + np.searchsorted(kept_ids[split:], fresh_ids),
+        np.searchsorted(kept_ids[:split], fresh_ids),
+    )
+    order = np.insert(np.arange(len(kept)), positions, len(kept) + np.arange(len(fresh)))
+    stacked = pd.concat([kept, fresh.iloc[fresh_order]], ignore_index=True)
+    return stacked.iloc[order].reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# Build / update / persist
+# ---------------------------------------------------------------------------
+
+
+def build_state(df: pd.DataFrame, *, relative_accuracy: float | None = None) -> CoreMetricsState:
+    """Aggregate a full ``books_clean`` frame into a fresh state.
+
+    Pass ``relative_accuracy`` to keep quantile inputs as sketches instead of
+    exact histograms.
+    """
+
+    books = df.loc[:, BOOK_COLUMNS].reset_index(drop=True)
+    canonical = canonical_rollup(books, with_representative=True)
+    return CoreMetricsState(
+        books=books,
+        canonical=canonical,
+        aggregates=_aggregate(books, canonical, relative_accuracy),
+        relative_accuracy=relative_accuracy,
+    )
+
+
+def apply_delta(
+    state: CoreMetricsState,
+    changed: pd.DataFrame,
+    removed_book_ids: Iterable[int] = (),
+) -> CoreMetricsState:
+    """Upsert ``changed`` rows and drop ``removed_book_ids`` without a full rescan.
+
+    Only the canonical groups touched by the delta are rolled up again and
+    merged into the ordered rollup; untouched rows are copied, not re-sorted.
+    """
+
+    changed = changed.loc[:, BOOK_COLUMNS].reset_index(drop=True)
+    touched_ids = set(changed["book_id"].tolist()) | set(removed_book_ids)
+
+    books = state.books
+    stale_mask = books["book_id"].isin(touched_ids)
+    stale = books.loc[stale_mask]
+    affected_canonical = set(stale["canonical_book_id"].tolist()) | set(changed["canonical_book_id"].tolist())
+
+    canonical_mask = state.canonical["canonical_book_id"].isin(affected_canonical)
+    stale_canonical = state.canonical.loc[canonical_mask]
+
+    books = pd.concat([books.loc[~stale_mask], changed], ignore_index=True)
+    group_rows = books.loc[books["canonical_book_id"].isin(affected_canonical)]
+    fresh_canonical = (
+        canonical_rollup(group_rows, with_representative=True)
+        if not group_rows.empty
+        else stale_canonical.iloc[0:0]
+    )
+
+    accuracy = state.relative_accuracy
+    aggregates = _combine(state.aggregates, _aggregate(stale, stale_canonical, accuracy), sign=-1)
+    aggregates = _combine(aggregates, _aggregate(changed, fresh_canonical, accuracy))
+
+    canonical = _merge_canonical(state.canonical.loc[~canonical_mask], fresh_canonical)
+    return CoreMetricsState(
+        books=books, canonical=canonical, aggregates=aggregates, relative_accuracy=accuracy
+    )
+
+
+def save_state(state: CoreMetricsState, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": STATE_VERSION,
+        "books": state.books,
+        "canonical": state.canonical,
+        "aggregates": state.aggregates,
+        "quantile_mode": state.quantile_mode,
+        "relative_accuracy": state.relative_accuracy,
+    }
+    pd.to_pickle(payload, path)
+    return path
+
+
+def load_state(path: Path) -> CoreMetricsState:
+    if not path.exists():
+        raise FileNotFoundError(f"Could not find metrics state at {path}")
+    payload = pd.read_pickle(path)
+    if payload.get("version") != STATE_VERSION:
+        raise ValueError(
+            f"Metrics state at {path} has version {payload.get('version')}; expected {STATE_VERSION}"
+        )
+    return CoreMetricsState(
+        books=payload["books"],
+        canonical=payload["canonical"],
+        aggregates=payload["aggregates"],
+        relative_accuracy=payload.get("relative_accuracy"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Derivations
+# ---------------------------------------------------------------------------
+
+
+def _quantile(state: CoreMetricsState, name: str, q: float) -> pd.Series:
+    hist = state.aggregates[name]
+    if state.relative_accuracy is not None:
+        return sketch_quantile(hist, q, state.relative_accuracy)
+    return histogram_quantile(hist, q)
+
+
+def _distinct(pairs: pd.DataFrame, keys: Sequence[str]) -> pd.Series:
+    return pairs.groupby(level=list(keys)).size()
+
+
+def _mean(frame: pd.DataFrame) -> pd.Series:
+    counts = frame["rating_count"]
+    return (frame["rating_sum"] / counts.where(counts > 0)).astype("float64")
+
+
+def _restore_missing(frame: pd.DataFrame, column: str) -> pd.DataFrame:
+    frame[column] = frame[column].mask(frame[column] == MISSING_KEY)
+    return frame.sort_values(column, na_position="last", kind="stable").reset_index(drop=True)
+
+
+def state_top_authors_by_weighted_rating(
+    state: CoreMetricsState,
+    *,
+    min_ratings: int = 5_000,
+    top_n: int = 15,
+) -> pd.DataFrame:
+    """M1 derived from state."""
+
+    columns = ["author_name", "weighted_average_rating", "total_ratings", "book_count"]
+    weighted = state.aggregates["author_weighted"]
+    grouped = weighted.loc[:, ["weighted_rating_sum", "total_ratings"]].copy()
+    grouped["book_count"] = _distinct(state.aggregates["author_weighted_canonical"], ["author_name"])
+    grouped["book_count"] = grouped["book_count"].fillna(0).astype("int64")
+    filtered = grouped[grouped["total_ratings"] >= min_ratings].reset_index()
+    if filtered.empty:
+        return pd.DataFrame(columns=columns)
+    filtered["weighted_average_rating"] = filtered["weighted_rating_sum"] / filtered["total_ratings"]
+    result = top_n_rows(filtered, ["weighted_average_rating", "total_ratings"], top_n)
+    return result[columns]
+
+
+def state_top_books_by_ratings_count(state: CoreMetricsState, *, top_n: int = 20) -> pd.DataFrame:
+    """M3 derived from state."""
+
+    return compute_top_books_by_ratings_count(state.canonical, top_n=top_n, canonical=state.canonical)
+
+
+def state_top_books_by_text_reviews(state: CoreMetricsState, *, top_n: int = 20) -> pd.DataFrame:
+    """M4 derived from state."""
+
+    return compute_top_books_by_text_reviews(state.canonical, top_n=top_n, canonical=state.canonical)
+
+
+def state_median_rating_by_page_bucket(state: CoreMetricsState) -> pd.DataFrame:
+    """M5 derived from state."""
+
+    buckets = state.aggregates["page_bucket"]
+    grouped = pd.DataFrame(
+        {
+            "median_rating": _quantile(state, "page_bucket_rating_hist", 0.5),
+            "book_count": buckets["rows"],
+        },
+        index=buckets.index,
+    ).reset_index()
+    grouped = _restore_missing(grouped, "page_length_bucket")
+    return grouped.sort_values("median_rating", ascending=False)
+
+
+def _year_table(state: CoreMetricsState, min_year: int | None) -> pd.DataFrame:
+    years = state.aggregates["year"]
+    if min_year is not None:
+        years = years[years.index >= min_year]
+    return years
+
+
+def state_average_rating_by_publication_year(
+    state: CoreMetricsState,
+    *,
+    min_year: int | None = None,
+) -> pd.DataFrame:
+    """M7 derived from state."""
+
+    years = _year_table(state, min_year)
+    grouped = pd.DataFrame({"average_rating": _mean(years), "book_count": years["rows"]})
+    return grouped.reset_index().sort_values("publication_year")
+
+
+def state_median_ratings_count_by_publication_year(
+    state: CoreMetricsState,
+    *,
+    min_year: int | None = None,
+) -> pd.DataFrame:
+    """M8 derived from state."""
+
+    years = _year_table(state, min_year)
+    medians = _quantile(state, "year_ratings_hist", 0.5)
+    grouped = pd.DataFrame(
+        {"median_ratings_count_capped": medians.reindex(years.index), "book_count": years["rows"]}
+    )
+    return grouped.reset_index().sort_values("publication_year")
+
+
+def state_language_rating_summary(state: CoreMetricsState, *, min_books: int = 50) -> pd.DataFrame:
+    """M9 derived from state."""
+
+    languages = state.aggregates["language"]
+    medians = _quantile(state, "language_ratings_hist", 0.5)
+    grouped = pd.DataFrame(
+        {
+            "book_count": languages["rows"],
+            "average_rating": _mean(languages),
+            "median_ratings_count_capped": medians.reindex(languages.index),
+        }
+    ).reset_index()
+    filtered = grouped[grouped["book_count"] >= min_books]
+    return filtered.sort_values(["average_rating", "book_count"], ascending=[False, False])
+
+
+def state_duplicate_share(state: CoreMetricsState) -> pd.DataFrame:
+    """M11 derived from state."""
+
+    totals = state.aggregates["totals"]
+    total_rows = int(totals["rows"].sum())
+    duplicate_rows = int(totals["duplicate_rows"].sum())
+    share = duplicate_rows / total_rows if total_rows else 0.0
+    return pd.DataFrame(
+        {
+            "total_rows": [total_rows],
+            "duplicate_rows": [duplicate_rows],
+            "duplicate_share_pct": [round(share * 100, 4)],
+        }
+    )
+
+
+def state_author_engagement_index(state: CoreMetricsState) -> pd.DataFrame:
+    """M2 derived from state."""
+
+    columns = ["author_name", "engagement_index", "ratings_count_capped", "text_reviews_count_capped", "book_count"]
+    engagement = state.aggregates["author_engagement"]
+    if engagement.empty:
+        return pd.DataFrame(columns=columns)
+    g = engagement.loc[:, ["ratings_count_capped", "text_reviews_count_capped"]].copy()
+    g["book_count"] = _distinct(state.aggregates["author_canonical"], ["author_name"])
+    g["book_count"] = g["book_count"].fillna(0).astype("int64")
+    g = g.reset_index()
+    for col in ("ratings_count_capped", "text_reviews_count_capped"):
+        s = g[col].fillna(0)
+        denom = s.std(ddof=0)
+        g[f"z_{col}"] = (s - s.mean()) / (denom if denom != 0 else 1)
+
+    g["engagement_index"] = (g["z_ratings_count_capped"] + g["z_text_reviews_count_capped"]) / 2
+    return g.sort_values("engagement_index", ascending=False)[columns]
+
+
+def state_publisher_engagement(state: CoreMetricsState) -> pd.DataFrame:
+    """M10 derived from state."""
+
+    publishers = state.aggregates["publisher"]
+    medians = _quantile(state, "publisher_ratings_hist", 0.5)
+    res = pd.DataFrame(
+        {
+            "median_ratings_count_capped": medians.reindex(publishers.index),
+            "book_count": _distinct(state.aggregates["publisher_canonical"], ["publisher"])
+            .reindex(publishers.index, fill_value=0),
+        }
+    ).reset_index()
+    return res.sort_values("median_ratings_count_capped", ascending=False)
+
+
+def state_page_length_engagement_delta(state: CoreMetricsState) -> pd.DataFrame:
+    """M6 derived from state."""
+
+    buckets = state.aggregates["page_bucket"]
+    g = pd.DataFrame(
+        {
+            "median_ratings_count_capped": _quantile(state, "page_bucket_ratings_hist", 0.5).reindex(buckets.index),
+            "median_text_reviews_capped": _quantile(state, "page_bucket_reviews_hist", 0.5).reindex(buckets.index),
+            "book_count": buckets["rows"],
+        }
+    ).reset_index()
+    g = _restore_missing(g, "page_length_bucket")
+    g["engagement_delta"] = g["median_ratings_count_capped"] - g["median_text_reviews_capped"]
+    return g
+
+
+def state_engagement_uplift_canonical(state: CoreMetricsState) -> pd.DataFrame:
+    """M12 derived from state."""
+
+    editions = state.aggregates["edition"]
+    res = pd.DataFrame(
+        {
+            "median_ratings_count": _quantile(state, "edition_ratings_hist", 0.5).reindex(editions.index),
+            "book_count": _distinct(state.aggregates["edition_canonical"], ["edition_type"])
+            .reindex(editions.index, fill_value=0),
+        }
+    ).reset_index()
+    return _restore_missing(res, "edition_type")
+
+
+def state_publisher_language_rankings(state: CoreMetricsState) -> pd.DataFrame:
+    """M13 derived from state."""
+
+    pairs = state.aggregates["publisher_language"]
+    keys = ["publisher", "language_code"]
+    res = pd.DataFrame(
+        {
+            "average_rating": _mean(pairs),
+            "p75_ratings_count": _quantile(state, "publisher_language_ratings_hist", 0.75).reindex(pairs.index),
+            "book_count": _distinct(state.aggregates["publisher_language_canonical"], keys)
+            .reindex(pairs.index, fill_value=0),
+        }
+    ).reset_index()
+    return rank_publisher_languages(res)
+
+
+def state_publication_year_rolling_stats(
+    state: CoreMetricsState,
+    window: int | Sequence[int] = 3,
+) -> pd.DataFrame:
+    """M14 derived from state."""
+
+    return YearSeries.from_aggregates(state.aggregates["year"], books="rows").rolling_frame(window)
@@ -0,0 +1,44 @@
+"""Dictionary-encoded group keys for the core metrics.
+
+The string columns the metrics group on (author, publisher, language, page
+length bucket) are factorized once per dataset into categoricals whose
+categories are the sorted labels: one shared dictionary per column plus
+small integer codes per row. Groupbys on those columns (``observed=True``)
+run on the codes without re-hashing the strings, and still emit groups in
+the same order as the raw labels with missing values last, so every output
+stays row-for-row identical. Frames derived with ``loc``/``merge``/``concat``
+(the canonical rollup, for instance) keep the encoding for free;
+:func:`decode_keys` turns the few result rows back into plain labels.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import pandas as pd
+
+__all__ = ["GROUP_KEY_COLUMNS", "decode_keys", "encode_keys"]
+
+GROUP_KEY_COLUMNS = ("author_name", "publisher", "language_code", "page_length_bucket")
+
+
+def encode_keys(df: pd.DataFrame, columns: Iterable[str] = GROUP_KEY_COLUMNS) -> pd.DataFrame:
+    """Return ``df`` with the present ``columns`` dictionary-encoded (no-op if already encoded)."""
+
+    encoded: dict[str, pd.Categorical] = {}
+    for column in columns:
+        if column not in df.columns or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        codes, labels = pd.factorize(df[column], sort=True)
+        encoded[column] = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(labels))
+    return df.assign(**encoded) if encoded else df
+
+
+def decode_keys(df: pd.DataFrame, columns: Iterable[str] = GROUP_KEY_COLUMNS) -> pd.DataFrame:
+    """Turn encoded ``columns`` of a (small) result frame back into their labels."""
+
+    decoded = {
+        column: df[column].astype(df[column].cat.categories.dtype)
+        for column in columns
+        if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**decoded) if decoded else df
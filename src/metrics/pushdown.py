@@ -0,0 +1,358 @@
+"""Pushdown backend: run the core metric aggregations inside PostgreSQL.
+
+Every ``pushdown_*`` helper sends one parameterized query against the tables
+written by ``src.load_books_clean_to_postgres`` (``books_clean``, the
+``authors`` dimension and the ``book_authors`` bridge) and returns only the aggregated rows, with the same
+columns, filters and ordering as the matching ``compute_*`` function in
+:mod:`src.metrics.core_metrics`. Callers normally reach them through
+``compute_*(..., engine=engine)`` rather than directly.
+
+The canonical metrics reuse the rollup rules of ``canonical_rollup``: one
+representative row per ``canonical_book_id`` (non-duplicates first, then the
+lowest ``book_id``) carrying the maximum engagement counts of the group.
+Medians and percentiles use ``percentile_cont``, which interpolates like
+pandas' default ``quantile``, so the pushdown tables are always exact.
+String ties are broken with ``COLLATE "C"`` to match Python's code point
+order.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.metrics.timeseries import YearSeries
+
+__all__ = [
+    "BOOKS_TABLE",
+    "AUTHORS_TABLE",
+    "BOOK_AUTHORS_TABLE",
+    "pushdown_top_authors_by_weighted_rating",
+    "pushdown_top_books_by_ratings_count",
+    "pushdown_top_books_by_text_reviews",
+    "pushdown_median_rating_by_page_bucket",
+    "pushdown_average_rating_by_publication_year",
+    "pushdown_median_ratings_count_by_publication_year",
+    "pushdown_language_rating_summary",
+    "pushdown_duplicate_share",
+    "pushdown_author_engagement_index",
+    "pushdown_publisher_engagement",
+    "pushdown_page_length_engagement_delta",
+    "pushdown_engagement_uplift_canonical",
+    "pushdown_publisher_language_rankings",
+    "pushdown_publication_year_rolling_stats",
+]
+
+BOOKS_TABLE = "books_clean"
+AUTHORS_TABLE = "authors"
+BOOK_AUTHORS_TABLE = "book_authors"
+
+# One representative row per canonical book with the group's max engagement,
+# mirroring ``canonical_rollup``. ``orphaned`` marks groups whose canonical row
+# is absent; they sort behind the others, by representative book id.
+CANONICAL_CTE = f"""
+canonical AS (
+    SELECT *
+    FROM (
+        SELECT
+            canonical_book_id,
+            book_id AS representative_book_id,
+            COALESCE(is_duplicate, FALSE) AS orphaned,
+            title,
+            language_code,
+            page_length_bucket,
+            publication_year,
+            average_rating::float8 AS average_rating,
+            MAX(ratings_count) OVER w AS ratings_count,
+            MAX(ratings_count_capped) OVER w AS ratings_count_capped,
+            MAX(text_reviews_count) OVER w AS text_reviews_count,
+            MAX(text_reviews_count_capped) OVER w AS text_reviews_count_capped,
+            ROW_NUMBER() OVER (w ORDER BY COALESCE(is_duplicate, FALSE), book_id) AS canonical_rank
+        FROM {BOOKS_TABLE}
+        WINDOW w AS (PARTITION BY canonical_book_id)
+    ) AS ranked
+    WHERE canonical_rank = 1
+)"""
+CANONICAL_ORDER = "orphaned, CASE WHEN orphaned THEN representative_book_id ELSE canonical_book_id END"
+
+TOP_AUTHORS_SQL = f"""
+WITH author_totals AS (
+    SELECT
+        ba.author_id,
+        SUM(b.average_rating::float8 * b.ratings_count) AS weighted_rating_sum,
+        SUM(b.ratings_count) AS total_ratings,
+        COUNT(DISTINCT b.canonical_book_id) AS book_count
+    FROM {BOOK_AUTHORS_TABLE} AS ba
+    JOIN {BOOKS_TABLE} AS b ON b.book_id = ba.book_id
+    WHERE b.average_rating IS NOT NULL
+      AND b.ratings_count IS NOT NULL
+    GROUP BY ba.author_id
+)
+SELECT
+    a.author_name,
+    t.weighted_rating_sum / NULLIF(t.total_ratings, 0) AS weighted_average_rating,
+    t.total_ratings,
+    t.book_count
+FROM author_totals AS t
+JOIN {AUTHORS_TABLE} AS a ON a.author_id = t.author_id
+WHERE t.total_ratings >= :min_ratings
+ORDER BY weighted_average_rating DESC NULLS LAST, t.total_ratings DESC, a.author_name COLLATE "C"
+LIMIT :top_n
+"""
+
+TOP_BOOKS_SQL = f"""
+WITH {CANONICAL_CTE}
+SELECT canonical_book_id, title, average_rating, {{count}}, {{count}}_capped, language_code
+FROM canonical
+ORDER BY {{count}}_capped DESC NULLS LAST, {{count}} DESC NULLS LAST, {CANONICAL_ORDER}
+LIMIT :top_n
+"""
+
+PAGE_BUCKET_SQL = f"""
+WITH {CANONICAL_CTE}
+SELECT
+    page_length_bucket,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY average_rating) AS median_rating,
+    COUNT(DISTINCT canonical_book_id) AS book_count
+FROM canonical
+GROUP BY page_length_bucket
+ORDER BY median_rating DESC NULLS LAST, page_length_bucket COLLATE "C"
+"""
+
+YEARLY_SQL = f"""
+WITH {CANONICAL_CTE}
+SELECT
+    publication_year,
+    {{measures}},
+    COUNT(DISTINCT canonical_book_id) AS {{books}}
+FROM canonical
+WHERE publication_year IS NOT NULL
+  AND (CAST(:min_year AS integer) IS NULL OR publication_year >= :min_year)
+GROUP BY publication_year
+ORDER BY publication_year
+"""
+
+LANGUAGE_SQL = f"""
+WITH {CANONICAL_CTE}
+SELECT
+    language_code,
+    COUNT(DISTINCT canonical_book_id) AS book_count,
+    AVG(average_rating) AS average_rating,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY ratings_count_capped) AS median_ratings_count_capped
+FROM canonical
+WHERE language_code IS NOT NULL
+GROUP BY language_code
+HAVING COUNT(DISTINCT canonical_book_id) >= :min_books
+ORDER BY average_rating DESC NULLS LAST, book_count DESC, language_code COLLATE "C"
+"""
+
+DUPLICATE_SHARE_SQL = f"""
+SELECT
+    COUNT(*) AS total_rows,
+    COUNT(*) FILTER (WHERE is_duplicate) AS duplicate_rows
+FROM {BOOKS_TABLE}
+"""
+
+AUTHOR_ENGAGEMENT_SQL = f"""
+WITH author_totals AS (
+    SELECT
+        a.author_name,
+        COALESCE(SUM(b.ratings_count_capped), 0) AS ratings_count_capped,
+        COALESCE(SUM(b.text_reviews_count_capped), 0) AS text_reviews_count_capped,
+        COUNT(DISTINCT b.canonical_book_id) AS book_count
+    FROM {BOOK_AUTHORS_TABLE} AS ba
+    LEFT JOIN {BOOKS_TABLE} AS b ON b.book_id = ba.book_id
+    JOIN {AUTHORS_TABLE} AS a ON a.author_id = ba.author_id
+    GROUP BY ba.author_id, a.author_name
+),
+scored AS (
+    SELECT
+        *,
+        (ratings_count_capped - AVG(ratings_count_capped) OVER ())
+            / COALESCE(NULLIF(STDDEV_POP(ratings_count_capped) OVER (), 0), 1) AS z_ratings,
+        (text_reviews_count_capped - AVG(text_reviews_count_capped) OVER ())
+            / COALESCE(NULLIF(STDDEV_POP(text_reviews_count_capped) OVER (), 0), 1) AS z_text_reviews
+    FROM author_totals
+)
+SELECT
+    author_name,
+    ((z_ratings + z_text_reviews) / 2)::float8 AS engagement_index,
+    ratings_count_capped,
+    text_reviews_count_capped,
+    book_count
+FROM scored
+ORDER BY engagement_index DESC, author_name COLLATE "C"
+"""
+
+PUBLISHER_SQL = f"""
+SELECT
+    publisher,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY ratings_count_capped) AS median_ratings_count_capped,
+    COUNT(DISTINCT canonical_book_id) AS book_count
+FROM {BOOKS_TABLE}
+WHERE publisher IS NOT NULL
+GROUP BY publisher
+ORDER BY median_ratings_count_capped DESC NULLS LAST, publisher COLLATE "C"
+"""
+
+PAGE_ENGAGEMENT_SQL = f"""
+WITH {CANONICAL_CTE}
+SELECT
+    page_length_bucket,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY ratings_count_capped) AS median_ratings_count_capped,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY text_reviews_count_capped) AS median_text_reviews_capped,
+    COUNT(DISTINCT canonical_book_id) AS book_count
+FROM canonical
+GROUP BY page_length_bucket
+ORDER BY page_length_bucket COLLATE "C"
+"""
+
+EDITION_UPLIFT_SQL = f"""
+SELECT
+    CASE WHEN is_duplicate THEN 'duplicate' WHEN NOT is_duplicate THEN 'canonical' END AS edition_type,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY ratings_count_capped) AS median_ratings_count,
+    COUNT(DISTINCT canonical_book_id) AS book_count
+FROM {BOOKS_TABLE}
+GROUP BY 1
+ORDER BY 1
+"""
+
+PUBLISHER_LANGUAGE_SQL = f"""
+SELECT
+    publisher,
+    language_code,
+    AVG(average_rating::float8) AS average_rating,
+    percentile_cont(0.75) WITHIN GROUP (ORDER BY ratings_count_capped) AS p75_ratings_count,
+    COUNT(DISTINCT canonical_book_id) AS book_count
+FROM {BOOKS_TABLE}
+WHERE publisher IS NOT NULL
+  AND language_code IS NOT NULL
+GROUP BY publisher, language_code
+ORDER BY
+    average_rating DESC NULLS LAST,
+    p75_ratings_count DESC NULLS LAST,
+    publisher COLLATE "C",
+    language_code COLLATE "C"
+"""
+
+
+def read_pushdown(engine: Engine, sql: str, **params: object) -> pd.DataFrame:
+    """Execute one pushdown query and return its (small) result set."""
+
+    with engine.connect() as connection:
+        return pd.read_sql_query(text(sql), connection, params=params)
+
+
+def pushdown_top_authors_by_weighted_rating(
+    engine: Engine,
+    *,
+    min_ratings: int = 5_000,
+    top_n: int = 15,
+) -> pd.DataFrame:
+    """M1 aggregated in PostgreSQL over the ``book_authors`` bridge."""
+
+    return read_pushdown(engine, TOP_AUTHORS_SQL, min_ratings=min_ratings, top_n=top_n)
+
+
+def pushdown_top_books_by_ratings_count(engine: Engine, *, top_n: int = 20) -> pd.DataFrame:
+    """M3 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, TOP_BOOKS_SQL.format(count="ratings_count"), top_n=top_n)
+
+
+def pushdown_top_books_by_text_reviews(engine: Engine, *, top_n: int = 20) -> pd.DataFrame:
+    """M4 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, TOP_BOOKS_SQL.format(count="text_reviews_count"), top_n=top_n)
+
+
+def pushdown_median_rating_by_page_bucket(engine: Engine) -> pd.DataFrame:
+    """M5 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, PAGE_BUCKET_SQL)
+
+
+def _yearly(engine: Engine, measures: Sequence[str], min_year: int | None, books: str = "book_count") -> pd.DataFrame:
+    sql = YEARLY_SQL.format(measures=",\n    ".join(measures), books=books)
+    return read_pushdown(engine, sql, min_year=min_year)
+
+
+def pushdown_average_rating_by_publication_year(engine: Engine, *, min_year: int | None = None) -> pd.DataFrame:
+    """M7 aggregated in PostgreSQL."""
+
+    return _yearly(engine, ["AVG(average_rating) AS average_rating"], min_year)
+
+
+def pushdown_median_ratings_count_by_publication_year(
+    engine: Engine,
+    *,
+    min_year: int | None = None,
+) -> pd.DataFrame:
+    """M8 aggregated in PostgreSQL."""
+
+    measures = ["percentile_cont(0.5) WITHIN GROUP (ORDER BY ratings_count_capped) AS median_ratings_count_capped"]
+    return _yearly(engine, measures, min_year)
+
+
+def pushdown_language_rating_summary(engine: Engine, *, min_books: int = 50) -> pd.DataFrame:
+    """M9 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, LANGUAGE_SQL, min_books=min_books)
+
+
+def pushdown_duplicate_share(engine: Engine) -> pd.DataFrame:
+    """M11 counted in PostgreSQL; the share is rounded like ``compute_duplicate_share``."""
+
+    counts = read_pushdown(engine, DUPLICATE_SHARE_SQL)
+    total_rows = int(counts.at[0, "total_rows"])
+    duplicate_rows = int(counts.at[0, "duplicate_rows"])
+    share = duplicate_rows / total_rows if total_rows else 0.0
+    return pd.DataFrame(
+        {
+            "total_rows": [total_rows],
+            "duplicate_rows": [duplicate_rows],
+            "duplicate_share_pct": [round(share * 100, 4)],
+        }
+    )
+
+
+def pushdown_author_engagement_index(engine: Engine) -> pd.DataFrame:
+    """M2 aggregated in PostgreSQL (population z-scores via window functions)."""
+
+    return read_pushdown(engine, AUTHOR_ENGAGEMENT_SQL)
+
+
+def pushdown_publisher_engagement(engine: Engine) -> pd.DataFrame:
+    """M10 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, PUBLISHER_SQL)
+
+
+def pushdown_page_length_engagement_delta(engine: Engine) -> pd.DataFrame:
+    """M6 aggregated in PostgreSQL."""
+
+    res = read_pushdown(engine, PAGE_ENGAGEMENT_SQL)
+    res["engagement_delta"] = res["median_ratings_count_capped"] - res["median_text_reviews_capped"]
+    return res
+
+
+def pushdown_engagement_uplift_canonical(engine: Engine) -> pd.DataFrame:
+    """M12 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, EDITION_UPLIFT_SQL)
+
+
+def pushdown_publisher_language_rankings(engine: Engine) -> pd.DataFrame:
+    """M13 aggregated in PostgreSQL."""
+
+    return read_pushdown(engine, PUBLISHER_LANGUAGE_SQL)
+
+
+def pushdown_publication_year_rolling_stats(engine: Engine, window: int | Sequence[int] = 3) -> pd.DataFrame:
+    """M14: yearly sums come from PostgreSQL, the windows from :class:`YearSeries`."""
+
+    measures = ["SUM(average_rating) AS rating_sum", "COUNT(average_rating) AS rating_count"]
+    cells = _yearly(engine, measures, None, books="books").set_index("publication_year")
+    return YearSeries.from_aggregates(cells).rolling_frame(window)
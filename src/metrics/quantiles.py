@@ -0,0 +1,190 @@
+"""Grouped quantile helpers shared by the core metrics.
+
+``grouped_quantile`` computes exact per-group quantiles with one sort by
+(group code, value) and positional indexing, so no Python callback runs per
+group. ``histogram_quantile`` turns ``(group..., value) -> count`` tables
+into the same linear-interpolated quantiles pandas reports. The sketch
+helpers bucket values on a logarithmic grid (DDSketch-style), so per-group
+summaries stay small, merge by adding counts, and can be built chunk by
+chunk or per partition before being combined.
+
+Error bound: with relative accuracy ``alpha`` every order statistic read from
+a sketch lies within ``alpha * |x|`` of the exact value ``x`` (zeros are kept
+exactly). Medians and p75 interpolate between two neighbouring order
+statistics of the same sign, so they inherit the same ``alpha`` relative
+bound. The default ``alpha = 0.01`` needs at most ~115 buckets per decade of
+magnitude per group, however many rows are summarised.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "DEFAULT_RELATIVE_ACCURACY",
+    "QUANTILE_MODES",
+    "grouped_quantile",
+    "histogram_quantile",
+    "sketch_buckets",
+    "bucket_values",
+    "build_sketch",
+    "merge_sketches",
+    "sketch_quantile",
+]
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+QUANTILE_MODES = ("exact", "approx")
+
+# Magnitudes below this are folded into the exact zero bucket.
+_MIN_MAGNITUDE = 1e-9
+# Shifts bucket indexes so positive values get positive codes and negatives
+# mirror them below zero, keeping codes in value order.
+_BUCKET_OFFSET = 1 << 20
+
+
+def _interpolate(low: np.ndarray, high: np.ndarray, fraction: np.ndarray, q: float) -> np.ndarray:
+    if q == 0.5:
+        # Match pandas' median, which averages the two middle values.
+        return np.where(fraction > 0, (low + high) / 2, low)
+    # Same lerp as numpy.quantile (and therefore Series.quantile).
+    diff = high - low
+    return np.where(fraction >= 0.5, high - diff * (1 - fraction), low + diff * fraction)
+
+
+def _positions(sizes: np.ndarray, q: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    position = (sizes - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    return lower, upper, position - lower
+
+
+def grouped_quantile(
+    frame: pd.DataFrame,
+    keys: str | Sequence[str],
+    value: str,
+    q: float,
+    *,
+    dropna: bool = True,
+) -> pd.Series:
+    """Exact ``frame.groupby(keys)[value].quantile(q)`` (``median`` for 0.5), vectorized.
+
+    Missing values are skipped; groups without any value come back as NaN.
+    """
+
+    grouper = frame.groupby(keys, dropna=dropna, sort=True, observed=True)
+    index = grouper.size().index
+    codes = grouper.ngroup().to_numpy()
+    values = frame[value].to_numpy(dtype="float64", na_value=np.nan)
+
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    values = values[np.lexsort((values, codes))]
+
+    sizes = np.bincount(codes, minlength=len(index))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    filled = sizes > 0
+    lower, upper, fraction = _positions(sizes[filled], q)
+
+    result = np.full(len(index), np.nan)
+    result[filled] = _interpolate(
+        values[starts[filled] + lower], values[starts[filled] + upper], fraction, q
+    )
+    return pd.Series(result, index=index, name=value)
+
+
+def histogram_quantile(hist: pd.DataFrame, q: float, *, count_column: str = "count") -> pd.Series:
+    """Linear-interpolated quantile per group from ``(group..., value) -> count`` rows.
+
+    Matches ``Series.quantile`` (and ``median`` for ``q=0.5``) on the expanded
+    values. The last index level holds the values; the others are group keys.
+    """
+
+    key_levels = list(range(hist.index.nlevels - 1))
+    if hist.empty:
+        return pd.Series(dtype="float64", index=hist.index.droplevel(-1).unique())
+
+    hist = hist.sort_index()
+    counts = hist[count_column].to_numpy(dtype=np.int64)
+    values = hist.index.get_level_values(-1).to_numpy(dtype="float64")
+    ends = np.cumsum(counts)
+
+    totals = hist[count_column].groupby(level=key_levels, dropna=False, observed=True).sum()
+    sizes = totals.to_numpy(dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    lower, upper, fraction = _positions(sizes, q)
+    low_values = values[np.searchsorted(ends, starts + lower, side="right")]
+    high_values = values[np.searchsorted(ends, starts + upper, side="right")]
+    return pd.Series(_interpolate(low_values, high_values, fraction, q), index=totals.index)
+
+
+def _log_gamma(relative_accuracy: float) -> float:
+    if not 0 < relative_accuracy < 1:
+        raise ValueError(f"relative_accuracy must be in (0, 1); got {relative_accuracy}")
+    return float(np.log((1 + relative_accuracy) / (1 - relative_accuracy)))
+
+
+def sketch_buckets(values: Sequence[float] | np.ndarray, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> np.ndarray:
+    """Map values to ordered integer bucket codes for the given accuracy."""
+
+    log_gamma = _log_gamma(relative_accuracy)
+    x = np.asarray(values, dtype="float64")
+    magnitude = np.abs(x)
+    codes = np.zeros(x.shape, dtype=np.int64)
+    nonzero = magnitude >= _MIN_MAGNITUDE
+    index = np.ceil(np.log(magnitude[nonzero]) / log_gamma).astype(np.int64) + _BUCKET_OFFSET
+    codes[nonzero] = np.where(x[nonzero] > 0, index, -index)
+    return codes
+
+
+def bucket_values(codes: Sequence[int] | np.ndarray, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> np.ndarray:
+    """Representative value of each bucket code (inverse of ``sketch_buckets``)."""
+
+    gamma = float(np.exp(_log_gamma(relative_accuracy)))
+    codes = np.asarray(codes, dtype=np.int64)
+    index = np.abs(codes) - _BUCKET_OFFSET
+    representative = 2 * np.power(gamma, index.astype("float64")) / (gamma + 1)
+    return np.where(codes == 0, 0.0, np.sign(codes) * representative)
+
+
+def build_sketch(
+    frame: pd.DataFrame,
+    keys: Sequence[str],
+    value: str,
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    *,
+    dropna: bool = True,
+) -> pd.DataFrame:
+    """Per-group sketch of ``value`` as ``(keys..., bucket) -> count`` rows."""
+
+    data = frame.dropna(subset=[value])
+    buckets = sketch_buckets(data[value].to_numpy(dtype="float64"), relative_accuracy)
+    return (
+        data.loc[:, list(keys)]
+        .assign(bucket=buckets)
+        .groupby([*keys, "bucket"], dropna=dropna, observed=True)
+        .size()
+        .to_frame("count")
+    )
+
+
+def merge_sketches(sketches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Combine sketches built with the same accuracy (e.g. one per chunk)."""
+
+    stacked = pd.concat(list(sketches))
+    return stacked.groupby(level=list(range(stacked.index.nlevels)), dropna=False, observed=True).sum()
+
+
+def sketch_quantile(
+    sketch: pd.DataFrame,
+    q: float,
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+) -> pd.Series:
+    """Approximate quantile per group within ``relative_accuracy`` of the exact value."""
+
+    levels = [sketch.index.get_level_values(i) for i in range(sketch.index.nlevels - 1)]
+    values = bucket_values(sketch.index.get_level_values(-1), relative_accuracy)
+    index = pd.MultiIndex.from_arrays([*levels, values], names=[*sketch.index.names[:-1], "value"])
+    return histogram_quantile(sketch.set_axis(index), q)
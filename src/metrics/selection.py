@@ -0,0 +1,45 @@
+"""Top-N row selection shared by the leaderboards, plots, and comparisons.
+
+``top_n_rows`` returns exactly what ``frame.sort_values(columns,
+ascending=..., kind="stable").head(n)`` would, without sorting the whole
+frame: ``np.argpartition`` finds the cut-off on the leading key in O(n), and
+only the rows that can still make the cut (the leaders plus any ties at the
+boundary) are sorted. Ties keep input order, and missing leading keys sort
+last, as with ``sort_values``.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["top_n_rows"]
+
+
+def top_n_rows(
+    frame: pd.DataFrame,
+    columns: str | Sequence[str],
+    n: int,
+    *,
+    ascending: bool | Sequence[bool] = False,
+) -> pd.DataFrame:
+    """Return the first ``n`` rows of ``frame`` ordered by ``columns`` (largest first by default)."""
+
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    orders = [ascending] * len(columns) if isinstance(ascending, bool) else list(ascending)
+    if len(orders) != len(columns):
+        raise ValueError("ascending must match the number of sort columns")
+    if n <= 0:
+        return frame.iloc[0:0]
+
+    leading = frame[columns[0]]
+    candidates = frame
+    if len(frame) > n and pd.api.types.is_numeric_dtype(leading):
+        # Rank on one "smaller is better" key with missing values last.
+        key = leading.to_numpy(dtype="float64", na_value=np.nan)
+        key = np.where(np.isnan(key), np.inf, key if orders[0] else -key)
+        cutoff = key[np.argpartition(key, n - 1)[n - 1]]
+        candidates = frame[key <= cutoff]
+
+    return candidates.sort_values(columns, ascending=orders, kind="stable").head(n)
@@ -0,0 +1,127 @@
+"""Year-level rating engine for the publication-year trends (M14).
+
+The per-year canonical aggregates (rating sum, rated-book count, book count)
+are grouped once. Rolling windows are summed per window with pandas'
+compensated rolling sums, so a window's total carries no cancellation error
+from the rest of the series; one pass over the years then yields as many
+window sizes as needed and a properly weighted rolling mean (ratings summed
+over the window rather than a mean of yearly means). Cumulative sums answer
+the aggregate of an arbitrary year span with two lookups,
+``prefix[end] - prefix[start]``.
+
+Rolling windows count observed years and behave like
+``Series.rolling(window, min_periods=1)``: the first rows use whatever years
+are available and years without ratings are skipped.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.typing import Rolling
+
+__all__ = ["YearSeries", "year_series"]
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    return np.concatenate([[0.0], np.cumsum(values, dtype="float64")])
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+@dataclass(frozen=True)
+class YearSeries:
+    """Year-indexed rating aggregates with prefix sums for O(1) span queries."""
+
+    years: np.ndarray
+    average_rating: np.ndarray
+    book_count: np.ndarray
+    rating_sum: np.ndarray
+    rating_count: np.ndarray
+    rating_sum_prefix: np.ndarray
+    rating_count_prefix: np.ndarray
+
+    @classmethod
+    def from_aggregates(cls, cells: pd.DataFrame, *, books: str = "books") -> "YearSeries":
+        """Build from a frame indexed by ``publication_year`` with rating sums and counts."""
+
+        cells = cells.sort_index()
+        rating_sum = cells["rating_sum"].to_numpy(dtype="float64")
+        rating_count = cells["rating_count"].to_numpy(dtype="float64")
+        return cls(
+            years=cells.index.to_numpy(),
+            average_rating=_ratio(rating_sum, rating_count),
+            book_count=cells[books].to_numpy(),
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating_sum_prefix=_prefix(rating_sum),
+            rating_count_prefix=_prefix(rating_count),
+        )
+
+    @staticmethod
+    def _rolling(values: np.ndarray, window: int) -> Rolling:
+        if isinstance(window, bool) or not isinstance(window, (int, np.integer)) or window < 1:
+            raise ValueError(f"Rolling windows must be positive integers; got {window!r}")
+        return pd.Series(values).rolling(window, min_periods=1)
+
+    def rolling_average(self, window: int) -> np.ndarray:
+        """Mean of the yearly average ratings over the last ``window`` observed years."""
+
+        return self._rolling(self.average_rating, window).mean().to_numpy()
+
+    def rolling_weighted_average(self, window: int) -> np.ndarray:
+        """Average rating of every rated book in the last ``window`` observed years."""
+
+        return _ratio(
+            self._rolling(self.rating_sum, window).sum().to_numpy(),
+            self._rolling(self.rating_count, window).sum().to_numpy(),
+        )
+
+    def span_average(self, first_year: float, last_year: float) -> float:
+        """Weighted average rating of the books published in ``[first_year, last_year]``."""
+
+        start = np.searchsorted(self.years, first_year, side="left")
+        end = np.searchsorted(self.years, last_year, side="right")
+        count = self.rating_count_prefix[end] - self.rating_count_prefix[start]
+        return float(_ratio(self.rating_sum_prefix[end] - self.rating_sum_prefix[start], count))
+
+    def rolling_frame(self, window: int | Sequence[int] = 3) -> pd.DataFrame:
+        """Yearly averages plus rolling columns for one window or several.
+
+        A single ``window`` yields ``rolling_average_rating`` and
+        ``rolling_weighted_rating``; a sequence yields one suffixed pair per
+        size (``rolling_average_rating_5``, ...).
+        """
+
+        windows = {"": window} if isinstance(window, (int, np.integer)) else {f"_{size}": size for size in window}
+        ts = pd.DataFrame(
+            {
+                "publication_year": self.years,
+                "average_rating": self.average_rating,
+                "book_count": self.book_count,
+            }
+        )
+        for suffix, size in windows.items():
+            ts[f"rolling_average_rating{suffix}"] = self.rolling_average(size)
+            ts[f"rolling_weighted_rating{suffix}"] = self.rolling_weighted_average(size)
+        return ts
+
+
+def year_series(canonical: pd.DataFrame) -> YearSeries:
+    """Group a canonical rollup by publication year once and wrap it in a :class:`YearSeries`."""
+
+    cells = (
+        canonical.dropna(subset=["publication_year"])
+        .groupby("publication_year")
+        .agg(
+            rating_sum=("average_rating", "sum"),
+            rating_count=("average_rating", "count"),
+            books=("canonical_book_id", "nunique"),
+        )
+    )
+    return YearSeries.from_aggregates(cells)
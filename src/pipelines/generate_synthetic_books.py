@@ -0,0 +1,345 @@
+"""Generate synthetic Goodreads-like ``books.csv`` files at 10×, 100×, 1000× scale.
+
+The raw export is profiled once: every repaired row becomes a template, and
+the duplicate-edition rate is taken from the duplicate→canonical mapping.
+Output rows are then streamed chunk by chunk, so files larger than RAM are
+fine. Each chunk is seeded from ``(seed, chunk index)``, so the same seed and
+chunk size always produce byte-identical files.
+
+How the source distributions carry over:
+
+* Rows are bootstrapped from the templates in *replicas* of the source size.
+  Replica ``k > 0`` tags every author and publisher with `` #k``, so author
+  co-occurrence (who writes with whom, how many authors per book) and the
+  per-author and per-publisher book counts keep their shape while the
+  author and publisher cardinalities grow with the scale. Language codes
+  stay as they are: that cardinality does not grow with the catalogue.
+* ``publication_date`` strings are copied verbatim from the templates, which
+  preserves the date-format mix and the rate of impossible dates (e.g.
+  ``11/31/2000``).
+* Templates whose authors contain a comma are written unquoted like in the
+  source, so malformed author-comma rows appear at the source rate and still
+  go through ``raw_ingestion``'s repair path.
+* Duplicate editions are drawn at the source rate. Each one copies the title
+  and authors of an earlier row in its chunk and is recorded in a companion
+  ``duplicate_bookid_mapping`` CSV that ``run_cleaning --mapping-csv`` accepts.
+* ``bookID`` values are sequential. ISBN-10/13 values are derived from them,
+  with valid check digits. Ratings and review counts get mild log-normal
+  noise.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.raw_ingestion import AUTHORS_COLUMN_INDEX, COLUMN_NAMES, _repair_row
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_BOOKS_CSV = Path("data/books.csv")
+DEFAULT_MAPPING_CSV = Path("data/derived/duplicate_bookid_mapping.csv")
+DEFAULT_OUTPUT_DIR = Path("data/synthetic")
+DEFAULT_SCALES = (10, 100, 1000)
+DEFAULT_CHUNK_ROWS = 50_000
+DEFAULT_SEED = 20240601
+MAPPING_COLUMNS = ["duplicate_bookID", "canonical_bookID", "title", "authors", "publication_date"]
+COUNT_NOISE_SIGMA = 0.1
+# ISBN payloads start here so synthetic identifiers stay clear of the source ones.
+ISBN_BASE = 900_000_000
+
+
+@dataclass
+class BooksProfile:
+    """Row templates and rates measured from a raw export."""
+
+    templates: pd.DataFrame
+    duplicate_share: float
+
+    @property
+    def malformed_share(self) -> float:
+        return float(self.templates["authors"].str.contains(",", regex=False).mean())
+
+
+@dataclass
+class SyntheticStats:
+    rows: int
+    duplicate_rows: int
+    malformed_rows: int
+    seconds: float
+
+
+def profile_books(books_csv: Path, mapping_csv: Optional[Path] = None) -> BooksProfile:
+    """Read ``books_csv`` (and the optional mapping) into a :class:`BooksProfile`."""
+
+    with Path(books_csv).open("r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        if next(reader) != COLUMN_NAMES:
+            raise ValueError("Unexpected header format in books CSV.")
+        rows = [_repair_row(row)[0] for row in reader]
+    if not rows:
+        raise ValueError(f"No rows to profile in {books_csv}")
+
+    templates = pd.DataFrame(rows, columns=COLUMN_NAMES, dtype="str")
+    duplicates = 0
+    if mapping_csv is not None and Path(mapping_csv).exists():
+        duplicates = len(pd.read_csv(mapping_csv))
+    return BooksProfile(templates=templates, duplicate_share=duplicates / len(templates))
+
+
+def _check_digits(payload: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ISBN-10 and ISBN-13 check characters for 9-digit payloads."""
+
+    digits = (payload[:, None] // 10 ** np.arange(8, -1, -1)) % 10
+    isbn10 = (11 - (digits * np.arange(10, 1, -1)).sum(axis=1) % 11) % 11
+    isbn10_chars = np.where(isbn10 == 10, "X", isbn10.astype(str))
+    prefixed = np.concatenate([np.tile([9, 7, 8], (len(payload), 1)), digits], axis=1)
+    isbn13 = (10 - (prefixed * np.tile([1, 3], 6)).sum(axis=1) % 10) % 10
+    return isbn10_chars, isbn13.astype(str)
+
+
+def _tag(values: pd.Series, replicas: np.ndarray, *, separator: str | None = None) -> pd.Series:
+    """Append `` #k`` to each name (each ``separator``-delimited name) for replica ``k > 0``."""
+
+    suffix = pd.Series(np.where(replicas > 0, " #" + replicas.astype(str), ""), index=values.index)
+    tagged = values + suffix
+    if separator is not None:
+        # Tag every co-author, not just the last one, by tagging before each separator.
+        for replica in np.unique(replicas[replicas > 0]):
+            mask = replicas == replica
+            tagged[mask] = tagged[mask].str.replace(separator, f" #{replica}{separator}", regex=False)
+    return tagged
+
+
+def _noisy_counts(values: pd.Series, rng: np.random.Generator) -> pd.Series:
+    counts = pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype="float64")
+    noisy = np.rint(counts * rng.lognormal(0.0, COUNT_NOISE_SIGMA, len(counts))).astype(np.int64)
+    return pd.Series(noisy.astype(str), index=values.index)
+
+
+def synthetic_chunk(
+    profile: BooksProfile,
+    start: int,
+    rows: int,
+    *,
+    seed: int,
+    chunk_index: int,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Rows ``start .. start + rows - 1`` (0-based) plus their duplicate mapping."""
+
+    rng = np.random.default_rng([seed, chunk_index])
+    templates = profile.templates
+    positions = np.arange(start, start + rows)
+    replicas = positions // len(templates)
+    chunk = templates.iloc[rng.integers(0, len(templates), rows)].reset_index(drop=True)
+
+    book_ids = positions + 1
+    isbn10_check, isbn13_check = _check_digits(ISBN_BASE + book_ids)
+    payload = pd.Series((ISBN_BASE + book_ids).astype(str))
+    chunk["bookID"] = book_ids.astype(str)
+    chunk["isbn"] = payload + isbn10_check
+    chunk["isbn13"] = "978" + payload + isbn13_check
+    chunk["authors"] = _tag(chunk["authors"], replicas, separator="/")
+    chunk["publisher"] = _tag(chunk["publisher"], replicas)
+    chunk["ratings_count"] = _noisy_counts(chunk["ratings_count"], rng)
+    chunk["text_reviews_count"] = _noisy_counts(chunk["text_reviews_count"], rng)
+
+    duplicates = int(rng.binomial(rows - 1, profile.duplicate_share)) if rows > 1 else 0
+    pairs: list[tuple[int, int]] = []
+    if duplicates:
+        root = np.arange(rows)
+        for position in np.sort(rng.choice(np.arange(1, rows), duplicates, replace=False)):
+            # Point at the canonical row of an earlier edition so chains never form.
+            canonical = root[rng.integers(0, position)]
+            root[position] = canonical
+            pairs.append((position, canonical))
+        duplicate_at, canonical_at = map(list, zip(*pairs))
+        chunk.loc[duplicate_at, ["title", "authors"]] = chunk.loc[canonical_at, ["title", "authors"]].to_numpy()
+
+    mapping = pd.DataFrame(
+        {
+            "duplicate_bookID": chunk["bookID"].iloc[[p for p, _ in pairs]].to_numpy(),
+            "canonical_bookID": chunk["bookID"].iloc[[c for _, c in pairs]].to_numpy(),
+            "title": chunk["title"].iloc[[p for p, _ in pairs]].to_numpy(),
+            "authors": chunk["authors"].iloc[[p for p, _ in pairs]].to_numpy(),
+            "publication_date": chunk["publication_date"].iloc[[p for p, _ in pairs]].to_numpy(),
+        },
+        columns=MAPPING_COLUMNS,
+    )
+    return chunk, mapping
+
+
+def iter_synthetic_chunks(
+    profile: BooksProfile,
+    total_rows: int,
+    *,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[tuple[pd.DataFrame, pd.DataFrame]]:
+    """Yield ``(rows, duplicate mapping)`` chunks covering ``total_rows`` rows."""
+
+    for chunk_index, start in enumerate(range(0, total_rows, chunk_rows)):
+        yield synthetic_chunk(
+            profile,
+            start,
+            min(chunk_rows, total_rows - start),
+            seed=seed,
+            chunk_index=chunk_index,
+        )
+
+
+def _raw_lines(chunk: pd.DataFrame) -> str:
+    # Joined without quoting, exactly like the source export, so author commas
+    # become the extra fields ``raw_ingestion`` knows how to repair.
+    columns = [chunk[column] for column in COLUMN_NAMES]
+    return "\n".join(columns[0].str.cat(columns[1:], sep=",")) + "\n"
+
+
+def write_synthetic_books(
+    profile: BooksProfile,
+    output_csv: Path,
+    *,
+    scale: int,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    mapping_csv: Optional[Path] = None,
+) -> SyntheticStats:
+    """Stream ``scale`` × the source row count to ``output_csv`` (and the mapping CSV)."""
+
+    if scale < 1 or chunk_rows < 1:
+        raise ValueError(f"scale and chunk_rows must be positive; got {scale} and {chunk_rows}")
+    output_csv = Path(output_csv)
+    output_csv.parent.mkdir(parents=True, exist_ok=True)
+    mapping_csv = Path(mapping_csv) if mapping_csv else output_csv.with_name(f"{output_csv.stem}_duplicate_mapping.csv")
+
+    started = time.perf_counter()
+    total_rows = scale * len(profile.templates)
+    written = duplicates = malformed = 0
+    with output_csv.open("w", encoding="utf-8", newline="") as books, mapping_csv.open(
+        "w", encoding="utf-8", newline=""
+    ) as pairs:
+        books.write(",".join(COLUMN_NAMES) + "\n")
+        mapping_writer = csv.writer(pairs, lineterminator="\n")
+        mapping_writer.writerow(MAPPING_COLUMNS)
+        for chunk, mapping in iter_synthetic_chunks(profile, total_rows, seed=seed, chunk_rows=chunk_rows):
+            books.write(_raw_lines(chunk))
+            mapping_writer.writerows(mapping.itertuples(index=False, name=None))
+            written += len(chunk)
+            duplicates += len(mapping)
+            malformed += int(chunk.iloc[:, AUTHORS_COLUMN_INDEX].str.contains(",", regex=False).sum())
+            LOGGER.debug("Wrote %s / %s rows", f"{written:,}", f"{total_rows:,}")
+
+    stats = SyntheticStats(written, duplicates, malformed, time.perf_counter() - started)
+    LOGGER.info(
+        "Wrote %s rows (%s duplicate editions, %s malformed author rows) to %s in %.1fs (%s rows/s)",
+        f"{stats.rows:,}",
+        f"{stats.duplicate_rows:,}",
+        f"{stats.malformed_rows:,}",
+        output_csv,
+        stats.seconds,
+        f"{stats.rows / max(stats.seconds, 1e-9):,.0f}",
+    )
+    return stats
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write synthetic Goodreads-like books.csv files at larger scales.",
+    )
+    parser.add_argument(
+        "--books-csv",
+        default=str(DEFAULT_BOOKS_CSV),
+        help="Raw books CSV whose distributions are reproduced (default: data/books.csv)",
+    )
+    parser.add_argument(
+        "--mapping-csv",
+        default=str(DEFAULT_MAPPING_CSV),
+        help="Duplicate→canonical mapping used for the duplicate-edition rate "
+        "(default: data/derived/duplicate_bookid_mapping.csv)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=str(DEFAULT_OUTPUT_DIR),
+        help="Directory for books_x<scale>.csv and its mapping (default: data/synthetic)",
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SCALES),
+        help="Multiples of the source row count to generate (default: 10 100 1000)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Random seed; equal seeds and chunk sizes give identical files (default: {DEFAULT_SEED})",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help=f"Rows generated and written per chunk (default: {DEFAULT_CHUNK_ROWS})",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Python logging level (default: INFO)",
+    )
+    return parser.parse_args(argv)
+
+
+def configure_logging(level: str) -> None:
+    logging.basicConfig(
+        level=getattr(logging, level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+
+
+def generate(
+    books_csv: Path,
+    output_dir: Path,
+    scales: Sequence[int],
+    *,
+    mapping_csv: Optional[Path] = None,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> dict[int, Path]:
+    """Write one ``books_x<scale>.csv`` per scale; return the paths by scale."""
+
+    profile = profile_books(books_csv, mapping_csv)
+    LOGGER.info(
+        "Profiled %s rows from %s (duplicate share %.4f%%, malformed author share %.4f%%)",
+        f"{len(profile.templates):,}",
+        books_csv,
+        profile.duplicate_share * 100,
+        profile.malformed_share * 100,
+    )
+    outputs: dict[int, Path] = {}
+    for scale in scales:
+        outputs[scale] = Path(output_dir) / f"books_x{scale}.csv"
+        write_synthetic_books(profile, outputs[scale], scale=scale, seed=seed, chunk_rows=chunk_rows)
+    return outputs
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    configure_logging(args.log_level)
+    generate(
+        Path(args.books_csv),
+        Path(args.output_dir),
+        args.scales,
+        mapping_csv=Path(args.mapping_csv),
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,552 @@
+"""Benchmark ingestion, cleaning, metrics, and loading across dataset scales.
+
+Every case records wall time (its best over ``--repeat`` passes through the
+whole suite, so a transient slowdown of the machine hits one pass rather than
+every run of a case), the peak resident
+set size sampled while it ran, and throughput in input rows per second; the
+``load_books_clean_to_postgres`` cases also record the WAL they wrote
+(``wal_mb``). The results are written as JSON and compared against a
+committed baseline, and the command exits non-zero when a case got slower
+than the baseline by more than ``--threshold``. Timings are machine-specific: refresh the committed
+baseline with ``--update-baseline`` on the reference machine.
+
+Scale 1 is ``data/books.csv`` itself. Larger scales are synthetic files from
+``generate_synthetic_books``, created on first use under ``--work-dir``. The
+loader cases run against a throwaway SQLite database, which skips the
+Postgres-only ``load_books_clean_to_postgres`` (schema/index DDL). Pass
+``--database-url`` to benchmark them on PostgreSQL instead; ``DATABASE_URL``
+is deliberately ignored, because the loaders replace the ``authors`` and
+``book_authors`` tables and must only ever run against a scratch database.
+
+Cases (``--stages`` selects groups):
+
+* ``ingestion``: ``raw_ingestion.load_books_csv``
+* ``cleaning``: each ``CLEANING_STEPS`` function plus ``apply_canonical_mapping``
+* ``authors``: ``explode_authors`` and ``AuthorIncidence.from_books``
+* ``metrics``: ``canonical_rollup`` and every ``compute_*`` metric
+* ``loaders``: ``load_books_csv_to_postgres``, ``load_author_tables`` and
+  ``load_books_clean_to_postgres`` (COPY, plus an ``[insert]`` case for
+  comparison and a ``[swap]`` case through the unlogged staging tables)
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from src import load_books_clean_to_postgres as clean_loader
+from src import load_books_to_postgres as raw_loader
+from src.author_tables import load_author_tables
+from src.bulk_load import LOAD_METHODS
+from src.cleaning import CLEANING_STEPS, apply_canonical_mapping, explode_authors
+from src.db_config import dispose_engines, get_engine
+from src.metrics import core_metrics
+from src.metrics.incidence import AuthorIncidence
+from src.pipelines import generate_synthetic_books as synthetic
+from src.pipelines.run_cleaning import load_duplicate_mapping_frame
+from src.raw_ingestion import load_books_csv
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_BOOKS_CSV = Path("data/books.csv")
+DEFAULT_MAPPING_CSV = Path("data/derived/duplicate_bookid_mapping.csv")
+DEFAULT_WORK_DIR = Path("data/synthetic")
+DEFAULT_OUTPUT_JSON = Path("outputs/benchmarks/results.json")
+DEFAULT_BASELINE_JSON = Path("outputs/benchmarks/baseline.json")
+DEFAULT_SCALES = (1, 10)
+DEFAULT_THRESHOLD = 0.25
+# Best of three passes: a single run of a sub-second case swings by more than the threshold.
+DEFAULT_REPEAT = 3
+# Cases faster than this are dominated by timer and scheduler noise.
+DEFAULT_MIN_SECONDS = 0.25
+STAGES = ("ingestion", "cleaning", "authors", "metrics", "loaders")
+RSS_SAMPLE_INTERVAL = 0.005
+BENCHMARK_TABLE_PREFIX = "bench_"
+
+
+@dataclass
+class BenchmarkResult:
+    case: str
+    stage: str
+    scale: int
+    rows: int
+    seconds: float
+    rows_per_second: float
+    peak_rss_mb: float
+    wal_mb: Optional[float] = None
+
+
+@dataclass
+class Regression:
+    case: str
+    scale: int
+    baseline_seconds: float
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.seconds / self.baseline_seconds
+
+
+def _current_rss() -> int:
+    """Resident set size in bytes (falls back to the lifetime peak off Linux)."""
+
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakRss:
+    """Sample the process RSS on a background thread while the block runs."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss())
+
+    def __enter__(self) -> "PeakRss":
+        self.peak = _current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+class BenchmarkRunner:
+    """Time cases, keep their results, and hand each case's output to the next."""
+
+    def __init__(self, scale: int, repeat: int = 1) -> None:
+        self.scale = scale
+        self.repeat = repeat
+        self.results: list[BenchmarkResult] = []
+
+    def measure(
+        self,
+        stage: str,
+        case: str,
+        rows: int,
+        func: Callable[[], object],
+        *,
+        wal_position: Optional[Callable[[], int]] = None,
+    ) -> object:
+        best = float("inf")
+        peak = 0
+        wal: Optional[int] = None
+        output: object = None
+        for _ in range(self.repeat):
+            wal_before = wal_position() if wal_position else 0
+            with PeakRss() as rss:
+                started = time.perf_counter()
+                output = func()
+                elapsed = time.perf_counter() - started
+            if wal_position:
+                written = wal_position() - wal_before
+                wal = written if wal is None else min(wal, written)
+            best = min(best, elapsed)
+            peak = max(peak, rss.peak)
+        result = BenchmarkResult(
+            case=case,
+            stage=stage,
+            scale=self.scale,
+            rows=rows,
+            seconds=round(best, 6),
+            rows_per_second=round(rows / best, 1) if best > 0 else float("inf"),
+            peak_rss_mb=round(peak / 2**20, 1),
+            wal_mb=None if wal is None else round(wal / 2**20, 1),
+        )
+        LOGGER.info(
+            "x%-5d %-48s %9.3fs %14s rows/s %8.1f MB%s",
+            self.scale,
+            case,
+            result.seconds,
+            f"{result.rows_per_second:,.0f}",
+            result.peak_rss_mb,
+            "" if result.wal_mb is None else f" {result.wal_mb:8.1f} MB WAL",
+        )
+        self.results.append(result)
+        return output
+
+
+@contextlib.contextmanager
+def _database_url(url: str) -> Iterator[None]:
+    # The loaders build their engine from DATABASE_URL.
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = url
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous
+
+
+def dataset_for_scale(
+    scale: int,
+    books_csv: Path,
+    mapping_csv: Path,
+    work_dir: Path,
+    *,
+    seed: int = synthetic.DEFAULT_SEED,
+) -> tuple[Path, Optional[Path]]:
+    """Return ``(books csv, mapping csv)`` for ``scale``, generating it if needed."""
+
+    if scale == 1:
+        return books_csv, mapping_csv if mapping_csv.exists() else None
+    output = work_dir / f"books_x{scale}.csv"
+    mapping = output.with_name(f"{output.stem}_duplicate_mapping.csv")
+    if not (output.exists() and mapping.exists()):
+        LOGGER.info("Generating synthetic dataset %s", output)
+        profile = synthetic.profile_books(books_csv, mapping_csv)
+        synthetic.write_synthetic_books(profile, output, scale=scale, seed=seed)
+    return output, mapping
+
+
+def run_scale(
+    runner: BenchmarkRunner,
+    books_csv: Path,
+    mapping_csv: Optional[Path],
+    *,
+    stages: Sequence[str] = STAGES,
+    database_url: Optional[str] = None,
+    work_dir: Path = DEFAULT_WORK_DIR,
+) -> None:
+    """Run the selected ``stages`` for one dataset; results land on ``runner``."""
+
+    raw, _ = load_books_csv(str(books_csv))
+    rows = len(raw)
+    if "ingestion" in stages:
+        runner.measure("ingestion", "load_books_csv", rows, lambda: load_books_csv(str(books_csv)))
+
+    # Later stages need the cleaned frame even when cleaning is not timed.
+    mapping = load_duplicate_mapping_frame(mapping_csv) if mapping_csv else None
+    df = raw.copy()
+    for step in CLEANING_STEPS:
+        if "cleaning" in stages:
+            df = runner.measure("cleaning", f"clean_books.{step.__name__}", rows, lambda: step(df))
+        else:
+            df = step(df)
+    if "cleaning" in stages:
+        df = runner.measure(
+            "cleaning",
+            "clean_books.apply_canonical_mapping",
+            rows,
+            lambda: apply_canonical_mapping(df, mapping),
+        )
+    else:
+        df = apply_canonical_mapping(df, mapping)
+
+    if "authors" in stages:
+        runner.measure(
+            "authors",
+            "explode_authors",
+            len(df),
+            lambda: explode_authors(df[["book_id", "authors_clean", "authors_raw"]]),
+        )
+        runner.measure("authors", "AuthorIncidence.from_books", len(df), lambda: AuthorIncidence.from_books(df))
+
+    if "metrics" in stages:
+        runner.measure("metrics", "canonical_rollup", len(df), lambda: core_metrics.canonical_rollup(df))
+        for name in core_metrics.__all__:
+            if name.startswith("compute_"):
+                runner.measure("metrics", name, len(df), lambda func=getattr(core_metrics, name): func(df))
+
+    if "loaders" in stages:
+        _run_loaders(runner, books_csv, df, rows, database_url=database_url, work_dir=work_dir)
+
+
+def _wal_position(engine) -> Callable[[], int]:
+    """Bytes of WAL written so far; differences give a case's WAL volume."""
+
+    def position() -> int:
+        with engine.connect() as conn:
+            return int(conn.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')")).scalar_one())
+
+    return position
+
+
+def _run_loaders(
+    runner: BenchmarkRunner,
+    books_csv: Path,
+    df: pd.DataFrame,
+    rows: int,
+    *,
+    database_url: Optional[str],
+    work_dir: Path,
+) -> None:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if database_url is None:
+        stand_in = work_dir / f"benchmark_x{runner.scale}.sqlite"
+        # Pooled connections would keep writing to the unlinked file.
+        dispose_engines()
+        stand_in.unlink(missing_ok=True)
+        database_url = f"sqlite:///{stand_in}"
+        LOGGER.info("No database configured; using SQLite stand-in %s for loader cases", stand_in)
+    engine = get_engine(database_url)
+    table = f"{BENCHMARK_TABLE_PREFIX}books"
+
+    with _database_url(database_url):
+        runner.measure(
+            "loaders",
+            "load_books_csv_to_postgres",
+            rows,
+            lambda: raw_loader.load_books_csv_to_postgres(str(books_csv), table),
+        )
+        clean_csv = _write_clean_csv(df, work_dir, runner.scale)
+        typed = clean_loader.read_books_clean(clean_csv)
+        runner.measure("loaders", "load_author_tables", len(df), lambda: load_author_tables(typed, engine))
+        if engine.dialect.name != "postgresql":
+            LOGGER.info("Skipping load_books_clean_to_postgres (needs PostgreSQL, got %s)", engine.dialect.name)
+            return
+        wal_position = _wal_position(engine)
+        # COPY is the default path; the INSERT case keeps the comparison in every report,
+        # and the swap case shows what staging through an unlogged table costs in WAL.
+        variants = [(method, "replace") for method in LOAD_METHODS] + [("copy", "swap")]
+        for method, if_exists in variants:
+            suffix = method if if_exists == "replace" else if_exists
+            runner.measure(
+                "loaders",
+                "load_books_clean_to_postgres" if suffix == "copy" else f"load_books_clean_to_postgres[{suffix}]",
+                len(df),
+                lambda method=method, if_exists=if_exists: clean_loader.load_books_clean_to_postgres(
+                    clean_csv,
+                    f"{table}_clean",
+                    if_exists,
+                    method=method,
+                ),
+                wal_position=wal_position,
+            )
+
+
+def _write_clean_csv(df: pd.DataFrame, work_dir: Path, scale: int) -> Path:
+    path = work_dir / f"books_clean_x{scale}.csv"
+    if not path.exists():
+        df.to_csv(path, index=False)
+    return path
+
+
+def fastest_results(passes: Sequence[Sequence[BenchmarkResult]]) -> list[BenchmarkResult]:
+    """Each case's fastest run across ``passes``, with the largest peak RSS and the least WAL seen."""
+
+    merged: dict[tuple[str, int], BenchmarkResult] = {}
+    for result in (result for results in passes for result in results):
+        kept = merged.get((result.case, result.scale))
+        if kept is None:
+            merged[(result.case, result.scale)] = result
+            continue
+        wal = [value for value in (kept.wal_mb, result.wal_mb) if value is not None]
+        merged[(result.case, result.scale)] = replace(
+            result if result.seconds < kept.seconds else kept,
+            peak_rss_mb=max(kept.peak_rss_mb, result.peak_rss_mb),
+            wal_mb=min(wal) if wal else None,
+        )
+    return list(merged.values())
+
+
+def compare_to_baseline(
+    results: Sequence[BenchmarkResult],
+    baseline: Sequence[dict],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> list[Regression]:
+    """Cases slower than ``(1 + threshold)`` × their baseline time.
+
+    Cases under ``min_seconds`` in both runs, or missing from the baseline,
+    are never flagged.
+    """
+
+    reference = {(entry["case"], entry["scale"]): entry["seconds"] for entry in baseline}
+    regressions = []
+    for result in results:
+        previous = reference.get((result.case, result.scale))
+        if previous is None or max(previous, result.seconds) < min_seconds:
+            continue
+        if result.seconds > previous * (1 + threshold):
+            regressions.append(Regression(result.case, result.scale, previous, result.seconds))
+    return regressions
+
+
+def build_report(results: Sequence[BenchmarkResult]) -> dict:
+    return {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def write_report(report: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    LOGGER.info("Wrote %d benchmark results to %s", len(report["results"]), path)
+    return path
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Goodreads pipeline across dataset scales.")
+    parser.add_argument(
+        "--books-csv",
+        default=str(DEFAULT_BOOKS_CSV),
+        help="Raw books CSV used as scale 1 (default: data/books.csv)",
+    )
+    parser.add_argument(
+        "--mapping-csv",
+        default=str(DEFAULT_MAPPING_CSV),
+        help="Duplicate mapping for scale 1 (default: data/derived/duplicate_bookid_mapping.csv)",
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SCALES),
+        help="Dataset scales to benchmark (default: 1 10)",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES,
+        default=list(STAGES),
+        help="Case groups to run (default: all)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Passes through the suite; each case keeps its fastest run (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--work-dir",
+        default=str(DEFAULT_WORK_DIR),
+        help="Directory for synthetic datasets and the SQLite stand-in (default: data/synthetic)",
+    )
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help=(
+            "Scratch database for the loader cases; its authors/book_authors tables are replaced "
+            "(default: a SQLite stand-in; DATABASE_URL is never used)"
+        ),
+    )
+    parser.add_argument(
+        "--output-json",
+        default=str(DEFAULT_OUTPUT_JSON),
+        help="Where to write this run's results (default: outputs/benchmarks/results.json)",
+    )
+    parser.add_argument(
+        "--baseline-json",
+        default=str(DEFAULT_BASELINE_JSON),
+        help="Baseline to compare against (default: outputs/benchmarks/baseline.json)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed slowdown before a case counts as a regression (default: {DEFAULT_THRESHOLD} = +25%%)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help=f"Ignore cases faster than this in both runs (default: {DEFAULT_MIN_SECONDS})",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Also write the results to --baseline-json instead of comparing",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Python logging level (default: INFO)",
+    )
+    return parser.parse_args(argv)
+
+
+def configure_logging(level: str) -> None:
+    logging.basicConfig(
+        level=getattr(logging, level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    """Run the benchmarks; return the number of regressions found."""
+
+    configure_logging(args.log_level)
+    work_dir = Path(args.work_dir)
+    results: list[BenchmarkResult] = []
+    for scale in args.scales:
+        books_csv, mapping_csv = dataset_for_scale(scale, Path(args.books_csv), Path(args.mapping_csv), work_dir)
+        passes = []
+        for number in range(1, args.repeat + 1):
+            LOGGER.info("Scale x%d, pass %d of %d", scale, number, args.repeat)
+            runner = BenchmarkRunner(scale)
+            run_scale(
+                runner,
+                books_csv,
+                mapping_csv,
+                stages=args.stages,
+                database_url=args.database_url,
+                work_dir=work_dir,
+            )
+            passes.append(runner.results)
+        results.extend(fastest_results(passes))
+
+    report = build_report(results)
+    write_report(report, Path(args.output_json))
+    baseline_path = Path(args.baseline_json)
+    if args.update_baseline:
+        write_report(report, baseline_path)
+        return 0
+    if not baseline_path.exists():
+        LOGGER.warning("No baseline at %s; run with --update-baseline to create one", baseline_path)
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    regressions = compare_to_baseline(results, baseline, threshold=args.threshold, min_seconds=args.min_seconds)
+    for regression in regressions:
+        LOGGER.error(
+            "Regression: x%d %s took %.3fs vs %.3fs baseline (%.2fx)",
+            regression.scale,
+            regression.case,
+            regression.seconds,
+            regression.baseline_seconds,
+            regression.ratio,
+        )
+    if not regressions:
+        LOGGER.info("No regressions beyond +%.0f%% against %s", args.threshold * 100, baseline_path)
+    return len(regressions)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    sys.exit(1 if run(parse_args(argv)) else 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
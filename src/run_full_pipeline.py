@@ -4,7 +4,8 @@ Typical stages:
 - Load raw ``books.csv`` into pandas.
 - Clean data using ``clean_books``.
 - Save cleaned data to ``data/derived/books_clean.csv``.
-- (Optional) Load cleaned data into PostgreSQL.
+- (Optional) Load the saved CSV into PostgreSQL with ``load_books_clean_to_postgres``,
+  which also rebuilds the author tables and any installed materialized views.
 
 Usage (from project root):
 
@@ -20,25 +21,9 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
-
 from .cleaning import clean_books
-from .db_config import build_database_url_from_env
+from .load_books_clean_to_postgres import load_books_clean_to_postgres
 from .raw_ingestion import load_books_csv
-from .schema import ensure_books_clean_schema
-
-
-def get_engine_from_env() -> Engine:
-    """Create a SQLAlchemy Engine using env vars.
-
-    Usa ``DATABASE_URL`` si está definido. En caso contrario,
-    construye la URL a partir de las variables de entorno
-    relacionadas con PostgreSQL (POSTGRES_DB, POSTGRES_USER, etc.).
-    """
-
-    database_url = build_database_url_from_env()
-    return create_engine(database_url)
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -91,9 +76,9 @@ def run_pipeline(
 
     if load_to_postgres:
         print("[pipeline] Loading cleaned data into PostgreSQL ...")
-        engine = get_engine_from_env()
-        df_clean.to_sql(postgres_table, engine, if_exists="replace", index=False)
-        ensure_books_clean_schema(engine, postgres_table)
+        # The staged swap publishes books_clean with authors/book_authors and rebuilds
+        # the views over them; a plain to_sql DROP fails once the views are installed.
+        load_books_clean_to_postgres(output_path, postgres_table, if_exists="replace")
         print(f"[pipeline] Loaded cleaned data into table '{postgres_table}'.")
 
     print("[pipeline] Done.")
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Tuple
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Tuple
 
-from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
 
 _IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+PARTITION_SPAN_YEARS = 10
 
 
 def _validate_identifier(value: str) -> str:
@@ -17,7 +19,7 @@ def _validate_identifier(value: str) -> str:
     return value
 
 
-def _ensure_primary_key(engine: Engine, table: str) -> None:
+def _ensure_primary_key(engine: Engine, table: str, columns: str = "book_id") -> None:
     query = text(
         f"""
         SELECT COUNT(*)
@@ -26,7 +28,7 @@ def _ensure_primary_key(engine: Engine, table: str) -> None:
           AND contype = 'p'
         """
     )
-    alter = text(f'ALTER TABLE "{table}" ADD PRIMARY KEY (book_id)')
+    alter = text(f'ALTER TABLE "{table}" ADD PRIMARY KEY ({columns})')
 
     with engine.begin() as conn:
         has_pk = conn.execute(query).scalar_one()
@@ -34,24 +36,303 @@ def _ensure_primary_key(engine: Engine, table: str) -> None:
             conn.execute(alter)
 
 
-def _ensure_indexes(engine: Engine, table: str, specs: Iterable[Tuple[str, str]]) -> None:
+@dataclass(frozen=True)
+class IndexSpec:
+    """One entry of a table's index plan, named ``idx_<table>_<name>`` (``uq_`` if unique)."""
+
+    name: str
+    columns: Tuple[str, ...]
+    using: str = "btree"
+    include: Tuple[str, ...] = ()
+    unique: bool = False
+
+    def index_name(self, table: str) -> str:
+        return f"{'uq' if self.unique else 'idx'}_{table}_{self.name}"
+
+    def create_sql(self, table: str, *, concurrently: bool = False) -> str:
+        unique = "UNIQUE " if self.unique else ""
+        mode = "CONCURRENTLY " if concurrently else ""
+        include = f" INCLUDE ({', '.join(self.include)})" if self.include else ""
+        return (
+            f'CREATE {unique}INDEX {mode}IF NOT EXISTS "{self.index_name(table)}" '
+            f'ON "{table}" USING {self.using} ({", ".join(self.columns)}){include}'
+        )
+
+
+# Every sql/analysis query and pushdown metric filters, groups or joins on
+# these columns. ``canonical_rank`` matches the canonical window
+# (PARTITION BY canonical_book_id ORDER BY is_duplicate, book_id), covers
+# the engagement rollup and serves plain canonical_book_id lookups; ``author_leaderboard`` covers the book side of the
+# author joins. The BRIN index on publication_year stays a few pages in
+# size and prunes year ranges as far as the rows' physical order allows.
+BOOKS_CLEAN_INDEX_PLAN: Tuple[IndexSpec, ...] = (
+    IndexSpec("publication_date", ("publication_date",)),
+    IndexSpec("average_rating", ("average_rating",)),
+    IndexSpec("authors", ("authors",)),
+    IndexSpec("language_code", ("language_code",)),
+    IndexSpec("publisher", ("publisher",)),
+    IndexSpec("publication_year_brin", ("publication_year",), using="brin"),
+    IndexSpec(
+        "canonical_rank",
+        ("canonical_book_id", "is_duplicate", "book_id"),
+        include=("ratings_count", "text_reviews_count"),
+    ),
+    IndexSpec(
+        "author_leaderboard",
+        ("book_id",),
+        include=("canonical_book_id", "average_rating", "ratings_count"),
+    ),
+)
+AUTHORS_INDEX_PLAN: Tuple[IndexSpec, ...] = (IndexSpec("author_name", ("author_name",), unique=True),)
+BOOK_AUTHORS_INDEX_PLAN: Tuple[IndexSpec, ...] = (IndexSpec("author_id", ("author_id",), include=("book_id",)),)
+
+
+def _drop_invalid_indexes(conn, table: str) -> None:
+    # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+    # IF NOT EXISTS would otherwise keep forever.
+    query = text(
+        """
+        SELECT c.relname
+        FROM pg_index AS i
+        JOIN pg_class AS c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(:table)
+          AND NOT i.indisvalid
+        """
+    )
+    for index_name in conn.execute(query, {"table": f'"{table}"'}).scalars().all():
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+
+
+def build_indexes(
+    engine: Engine,
+    table_name: str,
+    plan: Iterable[IndexSpec],
+    *,
+    concurrently: bool = False,
+    analyze: bool = True,
+) -> None:
+    """Create the indexes of ``plan`` missing on ``table_name``, then ANALYZE it.
+
+    Run it after the bulk load so rows are not indexed one at a time.
+    ``concurrently=True`` builds with ``CREATE INDEX CONCURRENTLY`` (outside a
+    transaction) so a live table keeps accepting writes meanwhile.
+    """
+
+    table = _validate_identifier(table_name)
+    with engine.connect() as conn:
+        available = {column["name"] for column in inspect(conn).get_columns(table)}
+    # Tables loaded from other extracts may lack some columns; skip those indexes.
+    specs = [spec for spec in plan if available.issuperset((*spec.columns, *spec.include))]
+    if concurrently:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            _drop_invalid_indexes(conn, table)
+            for spec in specs:
+                conn.execute(text(spec.create_sql(table, concurrently=True)))
+            if analyze:
+                conn.execute(text(f'ANALYZE "{table}"'))
+        return
+
+    with engine.begin() as conn:
+        for spec in specs:
+            conn.execute(text(spec.create_sql(table)))
+        if analyze:
+            conn.execute(text(f'ANALYZE "{table}"'))
+
+
+def ensure_books_clean_schema(
+    engine: Engine,
+    table_name: str = "books_clean",
+    *,
+    concurrently: bool = False,
+    analyze: bool = True,
+) -> None:
+    """Ensure the books_clean table has a primary key and the indexes of ``BOOKS_CLEAN_INDEX_PLAN``.
+
+    A table partitioned by ``publication_year`` gets no primary key (it would
+    have to include the nullable partition key) and its indexes are built on
+    the parent, which PostgreSQL cannot do concurrently.
+    """
+
+    table = _validate_identifier(table_name)
+    partitioned = is_partitioned(engine, table)
+    if not partitioned:
+        _ensure_primary_key(engine, table)
+    build_indexes(
+        engine,
+        table,
+        BOOKS_CLEAN_INDEX_PLAN,
+        concurrently=concurrently and not partitioned,
+        analyze=analyze,
+    )
+
+
+def ensure_authors_schema(
+    engine: Engine,
+    table_name: str = "authors",
+    *,
+    concurrently: bool = False,
+    analyze: bool = True,
+) -> None:
+    """Ensure the authors dimension is keyed by ``author_id`` with unique names."""
+
+    table = _validate_identifier(table_name)
+    _ensure_primary_key(engine, table, "author_id")
+    build_indexes(engine, table, AUTHORS_INDEX_PLAN, concurrently=concurrently, analyze=analyze)
+
+
+def ensure_book_authors_schema(
+    engine: Engine,
+    table_name: str = "book_authors",
+    *,
+    concurrently: bool = False,
+    analyze: bool = True,
+) -> None:
+    """Ensure the book/author bridge is keyed by book and position and indexed by author."""
+
+    table = _validate_identifier(table_name)
+    _ensure_primary_key(engine, table, "book_id, author_order")
+    build_indexes(engine, table, BOOK_AUTHORS_INDEX_PLAN, concurrently=concurrently, analyze=analyze)
+
+
+def is_partitioned(engine: Engine, table_name: str) -> bool:
+    """Whether ``table_name`` is a declaratively partitioned PostgreSQL table."""
+
+    table = _validate_identifier(table_name)
+    query = text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)")
+    with engine.connect() as conn:
+        return bool(conn.execute(query, {"table": f'"{table}"'}).scalar())
+
+
+def year_partition_bounds(years: Iterable[int], span: int = PARTITION_SPAN_YEARS) -> list[Tuple[int, int]]:
+    """``[start, end)`` ranges of ``span`` years (aligned to multiples of ``span``) covering ``years``."""
+
+    present = sorted({int(year) // span * span for year in years})
+    return [(start, start + span) for start in present]
+
+
+def create_year_partitioned_table(
+    engine: Engine,
+    table_name: str,
+    create_sql: str,
+    years: Iterable[int],
+    *,
+    span: int = PARTITION_SPAN_YEARS,
+) -> list[str]:
+    """(Re)create ``table_name`` range-partitioned on ``publication_year``.
+
+    ``create_sql`` is the plain ``CREATE TABLE`` statement for the columns
+    (e.g. from ``pandas.io.sql.get_schema``). One partition is created per
+    ``span``-year range holding any of ``years``, plus a DEFAULT partition for
+    NULL years and years outside every range. Returns the partition names.
+    """
+
+    table = _validate_identifier(table_name)
     statements = [
-        text(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({column})')
-        for index_name, column in specs
+        f'DROP TABLE IF EXISTS "{table}"',
+        f"{create_sql.strip().rstrip(';')} PARTITION BY RANGE (publication_year)",
     ]
+    partitions = []
+    for start, end in year_partition_bounds(years, span):
+        partition = _validate_identifier(f"{table}_y{start}")
+        statements.append(f'CREATE TABLE "{partition}" PARTITION OF "{table}" FOR VALUES FROM ({start}) TO ({end})')
+        partitions.append(partition)
+    default = _validate_identifier(f"{table}_default")
+    statements.append(f'CREATE TABLE "{default}" PARTITION OF "{table}" DEFAULT')
+    partitions.append(default)
+
     with engine.begin() as conn:
         for statement in statements:
-            conn.execute(statement)
+            conn.execute(text(statement))
+    return partitions
 
 
-def ensure_books_clean_schema(engine: Engine, table_name: str = "books_clean") -> None:
-    """Ensure the books_clean table has a primary key and helpful indexes."""
+def staging_table_name(table_name: str) -> str:
+    """Name of the unlogged table a swap load writes before publishing ``table_name``."""
+
+    return _validate_identifier(f"{table_name}_staging")
+
+
+def create_unlogged_staging_table(engine: Engine, table_name: str) -> None:
+    """Turn the freshly created (still empty) staging table into an UNLOGGED table.
+
+    Rows written afterwards skip the WAL, and no index exists yet to maintain
+    during the bulk insert.
+    """
 
     table = _validate_identifier(table_name)
-    _ensure_primary_key(engine, table)
-    index_specs = [
-        (f"idx_{table}_publication_date", "publication_date"),
-        (f"idx_{table}_average_rating", "average_rating"),
-        (f"idx_{table}_authors", "authors"),
-    ]
-    _ensure_indexes(engine, table, index_specs)
+    with engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{table}" SET UNLOGGED'))
+
+
+def seal_staging_table(engine: Engine, table_name: str, *, analyze: bool = True) -> None:
+    """Make a loaded staging table crash-safe again (``SET LOGGED``) and analyze it.
+
+    ``SET LOGGED`` rewrites the table and, unless ``wal_level`` is
+    ``minimal``, writes every page to the WAL once, and it rebuilds any
+    existing index. The heap therefore reaches the WAL as whole pages in one
+    sequential pass instead of as per-row COPY records, but the WAL volume
+    is not removed. Seal before building indexes so they are built only
+    once; the benchmark's ``[swap]`` loader case reports the WAL it wrote.
+    """
+
+    staging = _validate_identifier(table_name)
+    with engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{staging}" SET LOGGED'))
+        if analyze:
+            conn.execute(text(f'ANALYZE "{staging}"'))
+
+
+def publish_staging_tables(connection: Connection, tables: Mapping[str, str]) -> None:
+    """Swap several sealed staging tables (``{staging_name: table_name}``) in at once.
+
+    Inside the caller's transaction, drop each live table, rename its staging
+    table (and, for a partitioned staging table, its partitions) and rename
+    the staging indexes (and the primary key constraint with them) to the
+    names ``ensure_books_clean_schema`` would have given them. Readers keep
+    seeing the previous tables until that transaction commits, so tables
+    loaded together are never observed out of step. Views that depend on the
+    live tables must be dropped first, e.g. with
+    ``materialized_views.rebuilt_views`` in the same transaction.
+    """
+
+    pairs = [(_validate_identifier(staging), _validate_identifier(table)) for staging, table in tables.items()]
+    partitions_query = text(
+        """
+        SELECT c.relname
+        FROM pg_inherits AS i
+        JOIN pg_class AS c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+        """
+    )
+    index_query = text(
+        """
+        SELECT indexname
+        FROM pg_indexes
+        WHERE schemaname = current_schema()
+          AND tablename = ANY(:tables)
+        """
+    )
+    for staging, table in pairs:
+        partitions = connection.execute(partitions_query, {"table": f'"{staging}"'}).scalars().all()
+        relations = [staging, *partitions]
+        indexes = connection.execute(index_query, {"tables": relations}).scalars().all()
+        connection.execute(text(f'DROP TABLE IF EXISTS "{table}"'))
+        for relation in relations:
+            if staging in relation:
+                renamed = relation.replace(staging, table, 1)
+                connection.execute(text(f'ALTER TABLE "{relation}" RENAME TO "{renamed}"'))
+        for index_name in indexes:
+            if staging in index_name:
+                renamed = index_name.replace(staging, table, 1)
+                connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{renamed}"'))
+
+
+def ensure_unique_index(engine: Engine, table_name: str, column: str) -> None:
+    """Ensure ``column`` is unique on ``table_name`` so it can serve as an upsert key."""
+
+    table = _validate_identifier(table_name)
+    key = _validate_identifier(column)
+    statement = text(f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{table}_{key.lower()}" ON "{table}" ("{key}")')
+    with engine.begin() as conn:
+        conn.execute(statement)
@@ -0,0 +1,111 @@
+"""Chunked readers for SQL query results.
+
+``pd.read_sql_query`` over a regular cursor makes psycopg2 fetch the whole
+result into client memory before pandas builds a second copy of it.
+:func:`iter_query` instead reads through a named server-side cursor
+(SQLAlchemy's ``stream_results``) and yields DataFrames of ``chunksize`` rows,
+so only one chunk is buffered at a time. :func:`read_query` concatenates the
+chunks: it still returns the full result, but skips the driver's copy.
+
+:func:`export_query_csv` writes the chunks to a CSV file one by one, so an
+export stays memory-bounded and is formatted by pandas on every database.
+``copy=True`` streams ``COPY (query) TO STDOUT`` straight into the file on
+PostgreSQL instead, which is faster but writes PostgreSQL's text forms
+(``t``/``f`` booleans, ``numeric`` scale, timestamp offsets).
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+import pandas as pd
+from sqlalchemy import TextClause, text
+from sqlalchemy.engine import Engine
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_CHUNK_ROWS = 10_000
+
+
+def _statement(query: str | TextClause) -> TextClause:
+    return text(query) if isinstance(query, str) else query
+
+
+def iter_query(
+    engine: Engine,
+    query: str | TextClause,
+    params: Mapping[str, Any] | None = None,
+    *,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Yield the result of ``query`` as DataFrames of at most ``chunksize`` rows.
+
+    An empty result still yields one empty frame carrying the column names.
+    The generator holds a pooled connection until it is exhausted or closed;
+    wrap it in ``contextlib.closing`` when the caller may stop early.
+    """
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        yield from pd.read_sql_query(_statement(query), conn, params=params, chunksize=chunksize)
+
+
+def read_query(
+    engine: Engine,
+    query: str | TextClause,
+    params: Mapping[str, Any] | None = None,
+    *,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """``pd.read_sql_query`` through a server-side cursor.
+
+    The driver buffers one chunk at a time, but the returned frame holds the
+    whole result; use :func:`iter_query` to keep memory bounded.
+    """
+
+    with closing(iter_query(engine, query, params, chunksize=chunksize)) as frames:
+        chunks = list(frames)
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+def render_query(engine: Engine, query: str | TextClause, params: Mapping[str, Any] | None = None) -> str:
+    """Inline ``params`` into ``query`` as literals (COPY takes no bind parameters)."""
+
+    statement = _statement(query)
+    if params:
+        statement = statement.bindparams(**params)
+    return str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def export_query_csv(
+    engine: Engine,
+    query: str | TextClause,
+    path: Path,
+    params: Mapping[str, Any] | None = None,
+    *,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    copy: bool = False,
+) -> int:
+    """Write the result of ``query`` to ``path`` as CSV with a header row; returns the row count.
+
+    ``copy=True`` uses ``COPY ... TO STDOUT`` on PostgreSQL, which writes
+    values in PostgreSQL's text format rather than pandas'.
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if copy and engine.dialect.name == "postgresql":
+        copy_sql = f"COPY ({render_query(engine, query, params)}) TO STDOUT WITH (FORMAT csv, HEADER)"
+        with engine.connect() as conn, path.open("w", encoding="utf-8", newline="") as handle:
+            with conn.connection.cursor() as cursor:
+                cursor.copy_expert(copy_sql, handle)
+                rows = cursor.rowcount
+    else:
+        rows = 0
+        chunks = closing(iter_query(engine, query, params, chunksize=chunksize))
+        with chunks as frames, path.open("w", encoding="utf-8", newline="") as handle:
+            for index, chunk in enumerate(frames):
+                chunk.to_csv(handle, index=False, header=index == 0)
+                rows += len(chunk)
+    LOGGER.info("Exported %s rows to %s", f"{rows:,}", path)
+    return rows
@@ -0,0 +1,35 @@
+"""Shared fixtures for the test suite."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def cleaned_books() -> pd.DataFrame:
+    """Small cleaned-books sample with duplicates and one orphaned canonical group."""
+
+    return pd.DataFrame(
+        {
+            "book_id": [1, 2, 3, 4, 5, 6, 7],
+            "canonical_book_id": [1, 1, 3, 4, 4, 9, 9],
+            "is_duplicate": [False, True, False, False, True, True, True],
+            "title": ["A", "A (alt)", "B", "C", "C (alt)", "D (alt 1)", "D (alt 2)"],
+            "authors": ["Ann / Bob", "Ann / Bob", "Cy", "Dee", "Dee", "Ann", "Ann"],
+            "authors_clean": ["Ann / Bob", "Ann / Bob", "Cy", "Dee", "Dee", "Ann", "Ann"],
+            "authors_raw": ["Ann/Bob", "Ann/Bob", "Cy", "Dee", "Dee", "Ann", "Ann"],
+            "language_code": ["eng", "eng", "spa", "eng", "eng", "fre", "fre"],
+            "publisher": ["North", "North", "South", "North", "West", "South", "South"],
+            "page_length_bucket": ["short_reference", None, "multi_volume", None, None, None, None],
+            "media_type_hint": [None] * 7,
+            "publication_year": [2001.0, 2003.0, 1999.0, 2001.0, None, 2010.0, 2011.0],
+            "average_rating": [4.5, 4.4, 3.9, 4.1, 4.0, 3.5, 3.6],
+            "num_pages": [5.0, 320.0, 2500.0, 410.0, 415.0, 220.0, 230.0],
+            "num_pages_capped": [5.0, 320.0, 2000.0, 410.0, 415.0, 220.0, 230.0],
+            "ratings_count": [1_000, 3_000, 200, 7_000, 50, 900, 1_200],
+            "ratings_count_capped": [1_000, 3_000, 200, 7_000, 50, 900, 1_200],
+            "text_reviews_count": [40, 10, 5, 300, 2, 60, 70],
+            "text_reviews_count_capped": [40, 10, 5, 300, 2, 60, 70],
+        }
+    )
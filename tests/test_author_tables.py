@@ -0,0 +1,88 @@
+"""Tests for the normalized ``authors`` / ``book_authors`` tables."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.author_tables import (
+    LINK_COLUMNS,
+    author_links,
+    build_author_tables,
+    load_author_tables,
+    refresh_book_author_links,
+)
+
+
+def _books() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "book_id": [1, 2, None, 4],
+            "authors_clean": ["Cy/Ann", "Ann", "Bob", "Bob/Cy"],
+            "authors_raw": ["Cy/Ann", "Ann", "Bob", "Bob/Cy"],
+        }
+    )
+
+
+def test_links_become_integer_keys_into_a_sorted_dimension() -> None:
+    tables = build_author_tables(author_links(_books()))
+
+    assert tables.authors.to_dict("list") == {"author_id": [1, 2, 3], "author_name": ["Ann", "Bob", "Cy"]}
+    assert tables.book_authors.to_dict("list") == {
+        "book_id": [1, 1, 2, 4, 4],
+        "author_id": [3, 1, 1, 2, 3],
+        "author_order": [1, 2, 1, 1, 2],
+    }
+
+
+def test_known_authors_keep_their_ids() -> None:
+    known = pd.DataFrame({"author_id": [7], "author_name": ["Cy"]})
+
+    tables = build_author_tables(author_links(_books().iloc[[0]]), known, first_id=10)
+
+    assert tables.authors.to_dict("list") == {"author_id": [10], "author_name": ["Ann"]}
+    assert tables.book_authors["author_id"].tolist() == [7, 10]
+
+
+def test_books_without_authors_still_yield_both_tables(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'authors.sqlite'}")
+
+    assert author_links(_books().iloc[[2]]).columns.tolist() == LINK_COLUMNS
+    load_author_tables(_books().iloc[[2]], engine)
+
+    assert pd.read_sql_table("authors", engine).empty
+    assert pd.read_sql_table("book_authors", engine).columns.tolist() == ["book_id", "author_id", "author_order"]
+
+
+def test_refreshed_links_drop_orphaned_authors() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping author refresh test.")
+    schema = "author_refresh_test"
+    admin = create_engine(url)
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    books = _books().dropna(subset=["book_id"])
+    # Book 4 holds the only loaded link to Bob, so relinking it without Bob leaves an orphan.
+    changed = books.assign(authors_clean=["Cy/Ann", "Ann", "Cy"], authors_raw=["Cy/Ann", "Ann", "Cy"])
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        load_author_tables(books, engine)
+        with engine.begin() as conn:
+            refresh_book_author_links(changed, [4], conn)
+        authors = pd.read_sql_query(text("SELECT author_name FROM authors ORDER BY author_name"), engine)
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    finally:
+        engine.dispose()
+        with contextlib.suppress(OperationalError), admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        admin.dispose()
+
+    assert authors["author_name"].tolist() == ["Ann", "Cy"]
@@ -0,0 +1,92 @@
+"""Tests for the pipeline benchmark harness."""
+
+from __future__ import annotations
+
+import json
+
+from src.pipelines import run_benchmarks as bench
+from src.raw_ingestion import COLUMN_NAMES
+
+SOURCE_ROWS = [
+    ["1", "Alpha", "Ann/Bob", "4.10", "0000000001", "9780000000001", "eng", "100", "10", "2", "1/1/2001", "North"],
+    ["2", "Beta", "Ann", "3.90", "0000000002", "9780000000002", "spa", "200", "20", "4", "5/3/2000", "South"],
+    ["3", "Gamma", "Cy, Jr./Dee", "4.50", "0000000003", "9780000000003", "eng", "300", "30", "6", "12/25/1999", "North"],
+]
+
+
+def _result(case: str, seconds: float) -> bench.BenchmarkResult:
+    return bench.BenchmarkResult(case, "metrics", 1, 100, seconds, 100 / seconds, 50.0)
+
+
+def test_compare_flags_only_meaningful_slowdowns() -> None:
+    baseline = [
+        {"case": "slower", "scale": 1, "seconds": 1.0},
+        {"case": "within", "scale": 1, "seconds": 1.0},
+        {"case": "tiny", "scale": 1, "seconds": 0.001},
+    ]
+    results = [_result("slower", 1.5), _result("within", 1.2), _result("tiny", 0.004), _result("new", 9.0)]
+
+    regressions = bench.compare_to_baseline(results, baseline, threshold=0.25, min_seconds=0.05)
+
+    assert [(r.case, round(r.ratio, 2)) for r in regressions] == [("slower", 1.5)]
+
+
+def test_run_writes_results_and_compares_to_baseline(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(bench.raw_loader, "LOG_DIR", tmp_path / "logs")
+    books = tmp_path / "books.csv"
+    books.write_text("\n".join([",".join(COLUMN_NAMES), *(",".join(row) for row in SOURCE_ROWS)]), encoding="utf-8")
+    argv = [
+        "--books-csv", str(books),
+        "--mapping-csv", str(tmp_path / "missing.csv"),
+        "--scales", "1", "2",
+        "--work-dir", str(tmp_path / "work"),
+        "--repeat", "1",
+        "--database-url", f"sqlite:///{tmp_path / 'bench.sqlite'}",
+        "--output-json", str(tmp_path / "results.json"),
+        "--baseline-json", str(tmp_path / "baseline.json"),
+        "--log-level", "WARNING",
+    ]
+
+    assert bench.run(bench.parse_args([*argv, "--update-baseline"])) == 0
+    report = json.loads((tmp_path / "results.json").read_text(encoding="utf-8"))
+    cases = {(entry["case"], entry["scale"]) for entry in report["results"]}
+
+    assert {("load_books_csv", 2), ("clean_books.parse_publication_date", 1), ("explode_authors", 2)} <= cases
+    assert {("compute_top_books_by_ratings_count", 1), ("load_author_tables", 1)} <= cases
+    assert all(entry["rows"] == 3 * entry["scale"] for entry in report["results"])
+    assert all(entry["peak_rss_mb"] > 0 for entry in report["results"])
+    assert bench.run(bench.parse_args([*argv, "--threshold", "100"])) == 0
+
+
+def test_each_case_keeps_its_fastest_pass() -> None:
+    first = [
+        bench.BenchmarkResult("load_books_csv", "ingestion", 1, 10, 0.9, 11.1, 50.0),
+        bench.BenchmarkResult("explode_authors", "authors", 1, 10, 0.2, 50.0, 70.0),
+    ]
+    second = [
+        bench.BenchmarkResult("load_books_csv", "ingestion", 1, 10, 0.5, 20.0, 40.0),
+        bench.BenchmarkResult("explode_authors", "authors", 1, 10, 0.4, 25.0, 60.0),
+    ]
+
+    merged = bench.fastest_results([first, second])
+
+    assert [(result.case, result.seconds, result.peak_rss_mb) for result in merged] == [
+        ("load_books_csv", 0.5, 50.0),
+        ("explode_authors", 0.2, 70.0),
+    ]
+
+
+def test_loader_cases_never_default_to_the_analysis_database(monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", "postgresql://analysis@localhost/goodreads")
+
+    assert bench.parse_args([]).database_url is None
+
+
+def test_measure_records_the_wal_a_case_wrote() -> None:
+    position = iter([0, 3 * 2**20, 10 * 2**20, 12 * 2**20])
+    runner = bench.BenchmarkRunner(scale=1, repeat=2)
+
+    runner.measure("loaders", "case", 10, lambda: None, wal_position=lambda: next(position))
+    runner.measure("metrics", "plain", 10, lambda: None)
+
+    assert [result.wal_mb for result in runner.results] == [2.0, None]
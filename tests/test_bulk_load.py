@@ -0,0 +1,150 @@
+"""Tests for the COPY-based bulk loader."""
+
+from __future__ import annotations
+
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.bulk_load import copy_frame_into, copy_rows, merge_frame, write_frame, write_frame_via_swap
+from src.schema import ensure_books_clean_schema, staging_table_name
+
+
+class _RecordingCursor:
+    def __init__(self, calls: list[tuple[str, str]]) -> None:
+        self.calls = calls
+
+    def __enter__(self) -> "_RecordingCursor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def copy_expert(self, sql: str, file) -> None:
+        self.calls.append((sql, file.read()))
+
+
+def test_copy_rows_streams_quoted_csv_with_unquoted_nulls() -> None:
+    calls: list[tuple[str, str]] = []
+    connection = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: _RecordingCursor(calls)))
+    table = SimpleNamespace(schema=None, name="books_clean")
+
+    rows = copy_rows(table, connection, ["book_id", "title"], iter([(1, 'Say "hi", Bob'), (2, ""), (3, None)]))
+
+    assert rows == 3
+    sql, payload = calls[0]
+    assert sql == 'COPY "books_clean" ("book_id", "title") FROM STDIN WITH (FORMAT csv)'
+    assert payload == '"1","Say ""hi"", Bob"\n"2",""\n"3",\n'
+
+
+def test_copy_frame_into_chunks_and_nulls_missing_values() -> None:
+    calls: list[tuple[str, str]] = []
+    connection = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: _RecordingCursor(calls)))
+    frame = pd.DataFrame({"book_id": pd.array([1, 2, None], dtype="Int64"), "rating": [4.5, None, 3.0]})
+
+    assert copy_frame_into(frame, "books_clean_merge", connection, chunk_rows=2) == 3
+    assert [payload for _, payload in calls] == ['"1","4.5"\n"2",\n', ',"3.0"\n']
+
+
+def test_write_frame_falls_back_to_inserts_off_postgres(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.sqlite'}")
+    frame = pd.DataFrame({"book_id": range(5), "title": list("abcde")})
+
+    with engine.begin() as connection:
+        stats = write_frame(frame, "books", connection, chunk_rows=2)
+
+    assert (stats.rows, stats.method) == (5, "insert")
+    assert stats.rows_per_second > 0
+    assert pd.read_sql_table("books", engine)["title"].tolist() == list("abcde")
+    with pytest.raises(ValueError):
+        with engine.begin() as connection:
+            write_frame(frame, "books", connection, method="bcp")
+
+
+def test_swap_loads_need_postgres_and_valid_names(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'swap.sqlite'}")
+
+    with pytest.raises(ValueError):
+        write_frame_via_swap(pd.DataFrame({"book_id": [1]}), "books_clean", engine)
+    assert staging_table_name("books_clean") == "books_clean_staging"
+    with pytest.raises(ValueError):
+        staging_table_name("books; DROP TABLE x")
+
+
+def test_swap_publishes_indexed_table() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping swap load test.")
+    engine = create_engine(url)
+    frame = pd.DataFrame(
+        {
+            "book_id": [1, 2],
+            "publication_date": pd.to_datetime(["2001-01-01", "2002-02-02"]),
+            "average_rating": [4.1, 3.9],
+            "authors": ["Ann", "Bob"],
+        }
+    )
+    try:
+        for rating in (4.1, 4.5):
+            write_frame_via_swap(frame.assign(average_rating=rating), "bulk_swap_test", engine, prepare=ensure_books_clean_schema)
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+
+    with engine.begin() as conn:
+        indexes = set(conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'bulk_swap_test'")).scalars())
+        ratings = conn.execute(text("SELECT DISTINCT average_rating FROM bulk_swap_test")).scalars().all()
+        conn.execute(text("DROP TABLE bulk_swap_test"))
+    engine.dispose()
+
+    assert ratings == [4.5]
+    assert {"bulk_swap_test_pkey", "idx_bulk_swap_test_average_rating"} <= indexes
+
+
+def test_merge_writes_only_changed_and_vanished_keys() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping merge test.")
+    engine = create_engine(url)
+    first = pd.DataFrame({"book_id": [1, 2, 3], "title": ["A", "B", "C"]})
+    second = pd.DataFrame({"book_id": [1, 2, 4], "title": ["A", "B2", "D"]})
+    try:
+        with engine.begin() as conn:
+            write_frame(first, "bulk_merge_test", conn)
+            conn.execute(text('ALTER TABLE "bulk_merge_test" ADD PRIMARY KEY (book_id)'))
+            stats = merge_frame(second, "bulk_merge_test", conn, key="book_id")
+            stored = pd.read_sql_query(text('SELECT * FROM "bulk_merge_test" ORDER BY book_id'), conn)
+            conn.execute(text('DROP TABLE "bulk_merge_test"'))
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    engine.dispose()
+
+    assert sorted(stats.upserted) == [2, 4]
+    assert stats.deleted == [3]
+    pd.testing.assert_frame_equal(stored, second, check_dtype=False)
+
+
+def test_delta_merge_ships_only_the_changed_rows() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping merge test.")
+    engine = create_engine(url)
+    first = pd.DataFrame({"book_id": [1, 2, 3], "title": ["A", "B", "C"]})
+    delta = pd.DataFrame({"book_id": [2, 4], "title": ["B2", "D"]})
+    try:
+        with engine.begin() as conn:
+            write_frame(first, "bulk_merge_test", conn)
+            conn.execute(text('ALTER TABLE "bulk_merge_test" ADD PRIMARY KEY (book_id)'))
+            stats = merge_frame(delta, "bulk_merge_test", conn, key="book_id", deleted_keys=[3])
+            stored = pd.read_sql_query(text('SELECT * FROM "bulk_merge_test" ORDER BY book_id'), conn)
+            conn.execute(text('DROP TABLE "bulk_merge_test"'))
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    engine.dispose()
+
+    assert sorted(stats.upserted) == [2, 4]
+    assert stats.deleted == [3]
+    assert stored.values.tolist() == [[1, "A"], [2, "B2"], [4, "D"]]
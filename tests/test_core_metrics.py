@@ -0,0 +1,88 @@
+"""Tests for the Phase 04 core metric helpers."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from src.metrics import core_metrics as cm
+from src.metrics.core_metrics import canonical_rollup
+from src.metrics.keys import encode_keys
+
+
+def _sorted_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """Reference sort + merge implementation the rollup must keep matching."""
+
+    text_cols = [
+        "title",
+        "authors_clean",
+        "language_code",
+        "page_length_bucket",
+        "media_type_hint",
+        "publication_year",
+        "average_rating",
+        "num_pages",
+        "num_pages_capped",
+    ]
+    numeric_cols = [
+        "ratings_count",
+        "ratings_count_capped",
+        "text_reviews_count",
+        "text_reviews_count_capped",
+    ]
+    textual = (
+        df.sort_values(["is_duplicate", "book_id"])
+        .drop_duplicates("canonical_book_id", keep="first")
+        .loc[:, ["canonical_book_id", *text_cols]]
+    )
+    aggregated = df.groupby("canonical_book_id", dropna=False).agg(
+        {column: "max" for column in numeric_cols}
+    )
+    return textual.merge(aggregated.reset_index(), on="canonical_book_id", how="left")
+
+
+def test_canonical_rollup_matches_sorted_reference(cleaned_books: pd.DataFrame) -> None:
+    df = cleaned_books
+
+    rollup = canonical_rollup(df)
+
+    pd.testing.assert_frame_equal(rollup, _sorted_rollup(df))
+    assert rollup["canonical_book_id"].tolist() == [1, 3, 4, 9]
+    assert rollup.loc[rollup["canonical_book_id"] == 9, "title"].item() == "D (alt 1)"
+    assert rollup.loc[rollup["canonical_book_id"] == 1, "ratings_count"].item() == 3_000
+
+
+def test_canonical_rollup_handles_shuffled_input(cleaned_books: pd.DataFrame) -> None:
+    df = cleaned_books.sample(frac=1, random_state=7)
+
+    pd.testing.assert_frame_equal(canonical_rollup(df), _sorted_rollup(df))
+
+
+def test_canonical_rollup_ignores_duplicate_index_labels(cleaned_books: pd.DataFrame) -> None:
+    halves = [cleaned_books.iloc[: len(cleaned_books) // 2], cleaned_books.iloc[len(cleaned_books) // 2 :]]
+    df = pd.concat([half.reset_index(drop=True) for half in halves])
+
+    assert not df.index.is_unique
+    pd.testing.assert_frame_equal(canonical_rollup(df), canonical_rollup(cleaned_books))
+
+
+def test_metrics_on_encoded_keys_match_raw_labels(cleaned_books: pd.DataFrame) -> None:
+    encoded = encode_keys(cleaned_books)
+    authors = encode_keys(cm.explode_book_authors(encoded))
+    canonical = canonical_rollup(encoded)
+
+    assert isinstance(canonical["language_code"].dtype, pd.CategoricalDtype)
+    pairs = [
+        (cm.compute_top_authors_by_weighted_rating(cleaned_books, min_ratings=0),
+         cm.compute_top_authors_by_weighted_rating(encoded, min_ratings=0, authors=authors)),
+        (cm.compute_author_engagement_index(cleaned_books), cm.compute_author_engagement_index(encoded, authors=authors)),
+        (cm.compute_median_rating_by_page_bucket(cleaned_books),
+         cm.compute_median_rating_by_page_bucket(encoded, canonical=canonical)),
+        (cm.compute_language_rating_summary(cleaned_books, min_books=1),
+         cm.compute_language_rating_summary(encoded, min_books=1, canonical=canonical)),
+        (cm.compute_publisher_engagement(cleaned_books), cm.compute_publisher_engagement(encoded)),
+        (cm.compute_publisher_language_rankings(cleaned_books), cm.compute_publisher_language_rankings(encoded)),
+        (cm.compute_top_books_by_ratings_count(cleaned_books),
+         cm.compute_top_books_by_ratings_count(encoded, canonical=canonical)),
+    ]
+    for expected, actual in pairs:
+        pd.testing.assert_frame_equal(actual, expected)
@@ -0,0 +1,146 @@
+"""Tests for the Phase 04 core metrics CLI orchestration."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from src.analyses.portfolio import p03_core_metrics_suite as suite
+
+
+def _args(*extra: str):
+    return suite.parse_args(["--author-min-ratings", "0", "--language-min-books", "1", *extra])
+
+
+def test_metrics_flag_selects_nodes_in_suite_order() -> None:
+    args = _args("--metrics", "m9,M1")
+
+    nodes = suite.select_metric_nodes(args.metrics)
+
+    assert [node.metric_id for node in nodes] == ["M1", "M9"]
+
+
+def test_metrics_flag_rejects_unknown_ids() -> None:
+    with pytest.raises(SystemExit):
+        _args("--metrics", "M1,M99")
+
+
+def test_iter_metric_tables_builds_each_intermediate_once(monkeypatch, cleaned_books: pd.DataFrame) -> None:
+    calls: Counter[str] = Counter()
+
+    def counting(name, func):
+        def wrapper(df: pd.DataFrame) -> pd.DataFrame:
+            calls[name] += 1
+            return func(df)
+
+        return wrapper
+
+    monkeypatch.setattr(
+        suite,
+        "PREREQUISITES",
+        {name: counting(name, func) for name, func in suite.PREREQUISITES.items()},
+    )
+    nodes = suite.select_metric_nodes(["M3", "M4", "M9", "M11"])
+
+    tables = dict(suite.iter_metric_tables(cleaned_books, _args(), nodes))
+
+    assert list(tables) == [node.name for node in nodes]
+    assert calls == Counter({"canonical": 1})
+    assert tables["M3_top_books_by_ratings_count"]["canonical_book_id"].tolist()[0] == 4
+
+
+def test_parallel_run_matches_serial_outputs(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    args = _args()
+    nodes = suite.select_metric_nodes()
+
+    serial = suite.run_metric_nodes(cleaned_books, args, nodes, tmp_path / "serial")
+    parallel = suite.run_metric_nodes(cleaned_books, args, nodes, tmp_path / "parallel", workers=4)
+
+    assert serial == parallel
+    serial_files = sorted(path.name for path in (tmp_path / "serial").glob("*.csv"))
+    assert serial_files == sorted(path.name for path in (tmp_path / "parallel").glob("*.csv"))
+    for name in serial_files:
+        assert (tmp_path / "serial" / name).read_text() == (tmp_path / "parallel" / name).read_text()
+
+
+def test_cube_mode_builds_once_and_serves_sliceable_metrics(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    books_csv = tmp_path / "books_clean.csv"
+    cleaned_books.to_csv(books_csv, index=False)
+    cube_path = tmp_path / "cube.npz"
+    args = _args(
+        "--books-csv", str(books_csv), "--cube", str(cube_path), "--metrics", "M5,M10",
+        "--output-dir", str(tmp_path / "out"),
+    )
+
+    suite.run(args)
+    books_csv.unlink()
+    suite.run(args)
+
+    assert cube_path.exists()
+    assert sorted(path.name for path in (tmp_path / "out").glob("*.csv")) == [
+        "M10_publisher_engagement.csv",
+        "M5_median_rating_by_page_length.csv",
+    ]
+
+
+def test_cube_is_rebuilt_for_other_quantile_settings(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    books_csv = tmp_path / "books_clean.csv"
+    cleaned_books.to_csv(books_csv, index=False)
+    cube_path = tmp_path / "cube.npz"
+    common = ("--books-csv", str(books_csv), "--cube", str(cube_path), "--metrics", "M5,M6")
+    suite.run(_args(*common, "--output-dir", str(tmp_path / "exact")))
+
+    approx = ("--quantiles", "approx", "--relative-accuracy", "0.2")
+    suite.run(_args(*common, *approx, "--output-dir", str(tmp_path / "approx")))
+
+    assert suite.metrics_cube.cube_metadata(cube_path)["relative_accuracy"] == 0.2
+    books_csv.unlink()
+    with pytest.raises(FileNotFoundError, match="exact|approx"):
+        suite.run(_args(*common, "--output-dir", str(tmp_path / "again")))
+
+
+def test_state_mode_rejects_other_quantile_settings(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    books_csv = tmp_path / "books_clean.csv"
+    cleaned_books.to_csv(books_csv, index=False)
+    common = ("--books-csv", str(books_csv), "--state", str(tmp_path / "state.pkl"), "--metrics", "M5")
+    suite.run(_args(*common, "--output-dir", str(tmp_path / "exact")))
+
+    with pytest.raises(ValueError, match="exact quantiles"):
+        suite.run(_args(*common, "--quantiles", "approx", "--output-dir", str(tmp_path / "approx")))
+
+
+def test_state_mode_removes_books_by_id(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    books_csv = tmp_path / "books_clean.csv"
+    cleaned_books.to_csv(books_csv, index=False)
+    state_path = tmp_path / "state.pkl"
+    common = ("--books-csv", str(books_csv), "--state", str(state_path), "--metrics", "M11")
+    suite.run(_args(*common, "--output-dir", str(tmp_path / "before")))
+
+    suite.run(_args(*common, "--delta-removed-ids", "2,5", "--output-dir", str(tmp_path / "after")))
+
+    assert suite.incremental.load_state(state_path).books["book_id"].tolist() == [1, 3, 4, 6, 7]
+    share = pd.read_csv(tmp_path / "after" / "M11_duplicate_share.csv")
+    assert share[["total_rows", "duplicate_rows"]].values.tolist() == [[5, 2]]
+
+
+def test_cached_run_skips_loading_the_books(monkeypatch, tmp_path, cleaned_books: pd.DataFrame) -> None:
+    books_csv = tmp_path / "books_clean.csv"
+    cleaned_books.to_csv(books_csv, index=False)
+    args = _args(
+        "--books-csv", str(books_csv), "--cache-dir", str(tmp_path / "cache"),
+        "--output-dir", str(tmp_path / "out"), "--metrics", "M3,M9",
+    )
+    suite.run(args)
+    first = {path.name: path.read_text() for path in (tmp_path / "out").glob("*.csv")}
+
+    def fail(path):
+        raise AssertionError("books_clean.csv should not be read on a cache hit")
+
+    monkeypatch.setattr(suite, "load_cleaned_books", fail)
+    for path in (tmp_path / "out").glob("*.csv"):
+        path.unlink()
+    suite.run(args)
+
+    assert {path.name: path.read_text() for path in (tmp_path / "out").glob("*.csv")} == first
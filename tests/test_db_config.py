@@ -0,0 +1,42 @@
+"""Tests for the shared engine factory in src.db_config."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from src import db_config
+
+
+@pytest.fixture(autouse=True)
+def _fresh_engines():
+    db_config.dispose_engines()
+    yield
+    db_config.dispose_engines()
+
+
+def test_engines_are_shared_per_url_and_options(tmp_path, monkeypatch) -> None:
+    url = f"sqlite:///{tmp_path / 'shared.sqlite'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+
+    assert db_config.get_engine() is db_config.get_engine(url)
+    assert db_config.get_engine(url, pool_pre_ping=False) is not db_config.get_engine(url)
+
+
+def test_postgres_engines_get_pool_and_timeout_settings(monkeypatch) -> None:
+    created: list[tuple[str, dict]] = []
+    engine = SimpleNamespace(dispose=lambda: None)
+    monkeypatch.setattr(db_config, "create_engine", lambda url, **kwargs: created.append((url, kwargs)) or engine)
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "1500")
+
+    db_config.get_engine("postgresql+psycopg2://user@localhost/goodreads", pool_size=2)
+    db_config.get_engine("sqlite://")
+
+    assert created[0][1] == {
+        "pool_pre_ping": True,
+        "pool_size": 2,
+        "max_overflow": db_config.DEFAULT_MAX_OVERFLOW,
+        "connect_args": {"options": "-c statement_timeout=1500"},
+    }
+    assert created[1][1] == {"pool_pre_ping": True}
@@ -0,0 +1,61 @@
+"""Tests for the sparse book × author incidence behind M1 and M2."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics import core_metrics as cm
+from src.metrics.incidence import AuthorIncidence
+
+
+def _merged(cleaned_books: pd.DataFrame) -> pd.DataFrame:
+    links = cm.explode_book_authors(cleaned_books)
+    return links.merge(cleaned_books, on="book_id", how="left")
+
+
+def test_sparse_products_match_exploded_groupby(cleaned_books: pd.DataFrame) -> None:
+    incidence = AuthorIncidence.from_books(cleaned_books)
+    reference = _merged(cleaned_books).groupby("author_name").agg(
+        ratings=("ratings_count", "sum"),
+        books=("canonical_book_id", "nunique"),
+        links=("book_id", "size"),
+    )
+
+    assert incidence.authors.tolist() == reference.index.tolist()
+    assert incidence.nnz == reference["links"].sum()
+    np.testing.assert_array_equal(incidence.author_sums(cleaned_books["ratings_count"]), reference["ratings"])
+    np.testing.assert_array_equal(incidence.distinct_counts(cleaned_books["canonical_book_id"]), reference["books"])
+
+
+def test_links_and_author_strings_build_the_same_matrix(cleaned_books: pd.DataFrame) -> None:
+    shuffled = cleaned_books.sample(frac=1, random_state=3).reset_index(drop=True)
+    from_books = AuthorIncidence.from_books(shuffled)
+    from_links = AuthorIncidence.from_links(cm.explode_book_authors(cleaned_books), shuffled["book_id"])
+
+    np.testing.assert_array_equal(from_books.indptr, from_links.indptr)
+    np.testing.assert_array_equal(np.sort(from_books.indices), np.sort(from_links.indices))
+    assert from_books.authors.equals(from_links.authors)
+
+
+def test_books_without_ids_or_authors_have_no_links() -> None:
+    df = pd.DataFrame(
+        {
+            "book_id": [1, None, 3, 4],
+            "authors_clean": ["Ann/Bob", "Ann", None, "Bob/Ann/Bob"],
+        }
+    )
+
+    incidence = AuthorIncidence.from_books(df)
+
+    assert incidence.indptr.tolist() == [0, 2, 2, 2, 4]
+    assert incidence.authors[incidence.indices].tolist() == ["Ann", "Bob", "Bob", "Ann"]
+    assert incidence.author_sums(pd.Series([1.5, 9.0, 9.0, None])).tolist() == [1.5, 1.5]
+
+
+def test_author_metrics_reject_an_incidence_for_another_frame(cleaned_books: pd.DataFrame) -> None:
+    incidence = AuthorIncidence.from_books(cleaned_books.iloc[:2])
+
+    with pytest.raises(ValueError):
+        cm.compute_author_engagement_index(cleaned_books, authors=incidence)
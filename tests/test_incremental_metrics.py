@@ -0,0 +1,150 @@
+"""Incremental metric state must match a full recompute after deltas."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+from src.metrics import core_metrics as cm
+from src.metrics import incremental as inc
+
+MetricPair = tuple[Callable[[pd.DataFrame], pd.DataFrame], Callable[[inc.CoreMetricsState], pd.DataFrame], list[str]]
+
+METRIC_PAIRS: dict[str, MetricPair] = {
+    "M1": (
+        lambda df: cm.compute_top_authors_by_weighted_rating(df, min_ratings=0),
+        lambda state: inc.state_top_authors_by_weighted_rating(state, min_ratings=0),
+        ["author_name"],
+    ),
+    "M2": (cm.compute_author_engagement_index, inc.state_author_engagement_index, ["author_name"]),
+    "M3": (cm.compute_top_books_by_ratings_count, inc.state_top_books_by_ratings_count, ["canonical_book_id"]),
+    "M4": (cm.compute_top_books_by_text_reviews, inc.state_top_books_by_text_reviews, ["canonical_book_id"]),
+    "M5": (cm.compute_median_rating_by_page_bucket, inc.state_median_rating_by_page_bucket, ["page_length_bucket"]),
+    "M6": (
+        cm.compute_page_length_engagement_delta,
+        inc.state_page_length_engagement_delta,
+        ["page_length_bucket"],
+    ),
+    "M7": (
+        cm.compute_average_rating_by_publication_year,
+        inc.state_average_rating_by_publication_year,
+        ["publication_year"],
+    ),
+    "M8": (
+        cm.compute_median_ratings_count_by_publication_year,
+        inc.state_median_ratings_count_by_publication_year,
+        ["publication_year"],
+    ),
+    "M9": (
+        lambda df: cm.compute_language_rating_summary(df, min_books=1),
+        lambda state: inc.state_language_rating_summary(state, min_books=1),
+        ["language_code"],
+    ),
+    "M10": (cm.compute_publisher_engagement, inc.state_publisher_engagement, ["publisher"]),
+    "M11": (cm.compute_duplicate_share, inc.state_duplicate_share, ["total_rows"]),
+    "M12": (cm.compute_engagement_uplift_canonical, inc.state_engagement_uplift_canonical, ["edition_type"]),
+    "M13": (
+        cm.compute_publisher_language_rankings,
+        inc.state_publisher_language_rankings,
+        ["publisher", "language_code"],
+    ),
+    "M14": (
+        cm.compute_publication_year_rolling_stats,
+        inc.state_publication_year_rolling_stats,
+        ["publication_year"],
+    ),
+}
+
+
+def _assert_matches_full_recompute(state: inc.CoreMetricsState, full: pd.DataFrame) -> None:
+    # Retract/add cycles can move float sums by a few ulps, so rows are aligned
+    # on their keys (ties may reorder) and values compared with a tolerance.
+    for metric_id, (compute, derive, keys) in METRIC_PAIRS.items():
+        expected = compute(full).sort_values(keys).reset_index(drop=True)
+        actual = derive(state).sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            actual, expected, check_dtype=False, check_exact=False, rtol=1e-9, obj=metric_id
+        )
+
+
+def _changed_rows(df: pd.DataFrame) -> pd.DataFrame:
+    changed = df[df["book_id"].isin([1, 4, 6])].copy()
+    changed["ratings_count"] = changed["ratings_count"] * 3
+    changed["ratings_count_capped"] = changed["ratings_count"]
+    changed["average_rating"] = changed["average_rating"] - 0.25
+    changed.loc[changed["book_id"] == 4, "publisher"] = "East"
+    changed.loc[changed["book_id"] == 6, "page_length_bucket"] = "short_reference"
+    return changed
+
+
+def test_build_state_matches_full_recompute_exactly(cleaned_books: pd.DataFrame) -> None:
+    state = inc.build_state(cleaned_books)
+
+    for metric_id, (compute, derive, _) in METRIC_PAIRS.items():
+        pd.testing.assert_frame_equal(
+            derive(state).reset_index(drop=True),
+            compute(cleaned_books).reset_index(drop=True),
+            check_dtype=False,
+            obj=metric_id,
+        )
+
+
+def test_apply_delta_inserts_new_books(cleaned_books: pd.DataFrame) -> None:
+    base = cleaned_books[~cleaned_books["book_id"].isin([2, 5, 7])]
+    delta = cleaned_books[cleaned_books["book_id"].isin([2, 5, 7])]
+
+    state = inc.apply_delta(inc.build_state(base), delta)
+
+    _assert_matches_full_recompute(state, pd.concat([base, delta], ignore_index=True))
+
+
+def test_apply_delta_updates_and_removes_books(cleaned_books: pd.DataFrame) -> None:
+    changed = _changed_rows(cleaned_books)
+    removed = [3, 7]
+
+    state = inc.apply_delta(inc.build_state(cleaned_books), changed, removed_book_ids=removed)
+
+    untouched = cleaned_books[~cleaned_books["book_id"].isin([*changed["book_id"], *removed])]
+    _assert_matches_full_recompute(state, pd.concat([untouched, changed], ignore_index=True))
+
+
+def test_apply_delta_keeps_the_rollup_ordered(cleaned_books: pd.DataFrame) -> None:
+    changed = _changed_rows(cleaned_books)
+    removed = [3, 7]
+
+    state = inc.apply_delta(inc.build_state(cleaned_books), changed, removed_book_ids=removed)
+
+    untouched = cleaned_books[~cleaned_books["book_id"].isin([*changed["book_id"], *removed])]
+    expected = inc.build_state(pd.concat([untouched, changed], ignore_index=True)).canonical
+    pd.testing.assert_frame_equal(state.canonical, expected, check_dtype=False)
+
+
+def test_state_round_trips_through_disk(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    path = inc.save_state(inc.build_state(cleaned_books), tmp_path / "state.pkl")
+
+    _assert_matches_full_recompute(inc.load_state(path), cleaned_books)
+
+
+def test_load_state_rejects_missing_file(tmp_path) -> None:
+    with pytest.raises(FileNotFoundError):
+        inc.load_state(tmp_path / "missing.pkl")
+
+
+def test_sketch_state_stays_within_relative_accuracy(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    changed = _changed_rows(cleaned_books)
+    state = inc.build_state(cleaned_books, relative_accuracy=0.01)
+    state = inc.load_state(inc.save_state(inc.apply_delta(state, changed), tmp_path / "state.pkl"))
+
+    assert state.relative_accuracy == 0.01
+    expected = pd.concat([cleaned_books[~cleaned_books["book_id"].isin(changed["book_id"])], changed])
+    for metric_id, (compute, derive, keys) in METRIC_PAIRS.items():
+        pd.testing.assert_frame_equal(
+            derive(state).sort_values(keys).reset_index(drop=True),
+            compute(expected).sort_values(keys).reset_index(drop=True),
+            check_dtype=False,
+            check_exact=False,
+            rtol=0.01 + 1e-9,
+            obj=metric_id,
+        )
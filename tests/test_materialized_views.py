@@ -0,0 +1,178 @@
+"""Tests for the materialized views over the sql/analysis queries."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from src import db_config
+from src.materialized_views import (
+    ANALYSIS_VIEWS,
+    VIEWS_BY_NAME,
+    drop_views,
+    install_views,
+    installed_views,
+    maintained_views,
+    rebuilt_views,
+    refresh_views,
+    view_for_sql_file,
+)
+from src.raw_ingestion import COLUMN_NAMES
+from src.run_full_pipeline import run_pipeline
+
+
+def test_every_view_wraps_an_analysis_query_with_its_keys() -> None:
+    assert len({view.sql_file for view in ANALYSIS_VIEWS}) == len(ANALYSIS_VIEWS) == 8
+    for view in ANALYSIS_VIEWS:
+        query = view.query()
+        assert not query.endswith(";")
+        for column in view.key_columns:
+            assert re.search(rf"\b{column}\b", query), (view.name, column)
+        assert view_for_sql_file(view.sql_file) is view
+    assert view_for_sql_file(Path("sql/analysis/00_sanity_checks.sql")) is None
+
+
+def test_view_keys_never_use_tie_prone_ranks() -> None:
+    rank_alias = re.compile(r"(?<![_\w])RANK\(\)\s+OVER\s*\((?:[^()]|\([^()]*\))*\)\s+AS\s+(\w+)", re.IGNORECASE)
+    for view in ANALYSIS_VIEWS:
+        assert not set(rank_alias.findall(view.query())) & set(view.key_columns), view.name
+    assert VIEWS_BY_NAME["mv_language_publisher_rankings"].select_sql().endswith(
+        "ORDER BY language_code, language_rank, publisher"
+    )
+
+
+def test_views_are_left_alone_off_postgres(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'views.sqlite'}")
+
+    with maintained_views(engine, ["books_clean"], rebuild=True):
+        pd.DataFrame({"book_id": [1]}).to_sql("books_clean", engine)
+    with engine.begin() as conn, rebuilt_views(conn, ["books_clean"]):
+        pd.DataFrame({"book_id": [2]}).to_sql("books_clean", conn, if_exists="replace")
+
+    assert installed_views(engine) == []
+
+
+def test_views_refresh_concurrently() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping materialized view test.")
+    engine = create_engine(url)
+    view = VIEWS_BY_NAME["mv_duplicate_share"]
+    try:
+        install_views(engine, [view])
+        refresh_views(engine, [view])
+        with engine.connect() as conn:
+            stored = pd.read_sql_query(text(view.select_sql()), conn)
+            fresh = pd.read_sql_query(text(view.query()), conn)
+    except (OperationalError, ProgrammingError) as exc:
+        pytest.skip(f"Cannot build the view on this database: {exc}")
+    finally:
+        drop_views(engine, [view])
+        engine.dispose()
+
+    pd.testing.assert_frame_equal(stored, fresh)
+
+
+def test_failed_rebuild_keeps_the_views() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping materialized view test.")
+    engine = create_engine(url)
+    view = VIEWS_BY_NAME["mv_duplicate_share"]
+    try:
+        install_views(engine, [view])
+        with pytest.raises(RuntimeError):
+            with engine.begin() as conn, rebuilt_views(conn, ["books_clean"]):
+                conn.execute(text("DROP TABLE books_clean"))
+                raise RuntimeError("load failed")
+        still_installed = installed_views(engine)
+    except (OperationalError, ProgrammingError) as exc:
+        pytest.skip(f"Cannot build the view on this database: {exc}")
+    finally:
+        drop_views(engine, [view])
+        engine.dispose()
+
+    assert view in still_installed
+
+
+def test_tied_publisher_ranks_still_refresh_concurrently() -> None:  # pragma: no cover - depends on env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping materialized view test.")
+    schema = "mv_tie_test"
+    admin = create_engine(url)
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    view = VIEWS_BY_NAME["mv_language_publisher_rankings"]
+    # Two publishers with identical books tie on every ranking column.
+    books = pd.DataFrame(
+        {
+            "book_id": range(1, 41),
+            "title": [f"Book {i}" for i in range(1, 41)],
+            "average_rating": 4.0,
+            "language_code": "eng",
+            "publisher": ["North"] * 20 + ["South"] * 20,
+            "ratings_count": 100,
+        }
+    )
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        books.to_sql("books", engine, index=False)
+        mapping = pd.DataFrame({"canonical_bookID": [1], "duplicate_bookID": [0]})
+        mapping.to_sql("bookid_canonical_map", engine, index=False)
+        install_views(engine, [view])
+        refresh_views(engine, [view])
+        stored = pd.read_sql_query(text(view.select_sql()), engine)
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    finally:
+        engine.dispose()
+        with contextlib.suppress(OperationalError), admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        admin.dispose()
+
+    assert stored[["publisher", "language_rank"]].values.tolist() == [["North", 1], ["South", 1]]
+
+
+def test_full_pipeline_reloads_under_installed_views(monkeypatch, tmp_path) -> None:  # pragma: no cover - env
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping materialized view test.")
+    schema = "mv_pipeline_test"
+    admin = create_engine(url)
+    raw_csv = tmp_path / "books.csv"
+    fields = ["Ann / Bob", "4.0", "1234567890", "9781234567897", "eng", "100", "10", "2", "1/1/2020", "North"]
+    rows = [[str(i), f"Book {i}", *fields] for i in range(1, 6)]
+    raw_csv.write_text("\n".join([",".join(COLUMN_NAMES)] + [",".join(row) for row in rows]), encoding="utf-8")
+    view = VIEWS_BY_NAME["mv_duplicate_share"]
+    monkeypatch.setenv("DATABASE_URL", f"{url}{'&' if '?' in url else '?'}options=-csearch_path%3D{schema}")
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        run_pipeline(str(raw_csv), str(tmp_path / "books_clean.csv"), load_to_postgres=True)
+        engine = db_config.get_engine()
+        install_views(engine, [view])
+        # A second load must swap books_clean under the installed view, not DROP it.
+        run_pipeline(str(raw_csv), str(tmp_path / "books_clean.csv"), load_to_postgres=True)
+        still_installed = installed_views(engine)
+        with engine.connect() as conn:
+            linked = conn.execute(text("SELECT count(*) FROM book_authors")).scalar_one()
+    except OperationalError as exc:
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    finally:
+        db_config.dispose_engines()
+        with contextlib.suppress(OperationalError), admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        admin.dispose()
+
+    assert view in still_installed
+    assert linked == 10
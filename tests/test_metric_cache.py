@@ -0,0 +1,65 @@
+"""Tests for the on-disk metric result cache."""
+
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+from src.metrics.cache import MetricCache, file_fingerprint, frame_fingerprint
+
+
+def test_key_changes_with_data_params_and_code() -> None:
+    base = MetricCache.key("M3", {"books_top_n": 20}, "data", "code")
+
+    assert base == MetricCache.key("M3", {"books_top_n": 20}, "data", "code")
+    assert base != MetricCache.key("M3", {"books_top_n": 10}, "data", "code")
+    assert base != MetricCache.key("M3", {"books_top_n": 20}, "other", "code")
+    assert base != MetricCache.key("M3", {"books_top_n": 20}, "data", "edited")
+    assert base != MetricCache.key("M4", {"books_top_n": 20}, "data", "code")
+
+
+def test_fingerprints_follow_content(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    cleaned_books.to_csv(first, index=False)
+    cleaned_books.to_csv(second, index=False)
+
+    assert file_fingerprint(first) == file_fingerprint(second)
+    assert frame_fingerprint(cleaned_books) == frame_fingerprint(cleaned_books.copy())
+    changed = cleaned_books.assign(ratings_count=cleaned_books["ratings_count"] + 1)
+    assert frame_fingerprint(changed) != frame_fingerprint(cleaned_books)
+
+
+def test_get_or_compute_reuses_results_until_forced(tmp_path) -> None:
+    calls: list[int] = []
+
+    def compute() -> pd.DataFrame:
+        calls.append(1)
+        return pd.DataFrame({"value": [len(calls)]})
+
+    cache = MetricCache(tmp_path)
+    first = cache.get_or_compute("M1", {}, "data", "code", compute)
+    second = cache.get_or_compute("M1", {}, "data", "code", compute)
+    forced = MetricCache(tmp_path, force=True).get_or_compute("M1", {}, "data", "code", compute)
+
+    assert len(calls) == 2
+    pd.testing.assert_frame_equal(first, second)
+    assert forced["value"].item() == 2
+    assert cache.get_or_compute("M1", {}, "data", "code", compute)["value"].item() == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path) -> None:
+    cache = MetricCache(tmp_path, max_entries=2)
+    keys = [cache.key(name, {}, "data", "code") for name in ("a", "b", "c")]
+
+    cache.put(keys[0], "a")
+    cache.put(keys[1], "b")
+    # Make "a" older than "b", then read it so it becomes the most recent.
+    os.utime(tmp_path / f"{keys[0]}.pkl", (1, 1))
+    os.utime(tmp_path / f"{keys[1]}.pkl", (2, 2))
+    assert cache.get(keys[0]) == "a"
+    cache.put(keys[2], "c")
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a"
+    assert cache.get(keys[2]) == "c"
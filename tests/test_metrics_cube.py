@@ -0,0 +1,120 @@
+"""Metrics sliced from the cube must match the direct computations."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+from src.metrics import core_metrics as cm
+from src.metrics import cube as mc
+
+CubePair = tuple[Callable[[pd.DataFrame], pd.DataFrame], Callable[[mc.MetricsCube], pd.DataFrame], list[str]]
+
+CUBE_PAIRS: dict[str, CubePair] = {
+    "M5": (cm.compute_median_rating_by_page_bucket, mc.cube_median_rating_by_page_bucket, ["page_length_bucket"]),
+    "M7": (
+        lambda df: cm.compute_average_rating_by_publication_year(df, min_year=2000),
+        lambda cube: mc.cube_average_rating_by_publication_year(cube, min_year=2000),
+        ["publication_year"],
+    ),
+    "M8": (
+        lambda df: cm.compute_median_ratings_count_by_publication_year(df, min_year=2000),
+        lambda cube: mc.cube_median_ratings_count_by_publication_year(cube, min_year=2000),
+        ["publication_year"],
+    ),
+    "M9": (
+        lambda df: cm.compute_language_rating_summary(df, min_books=1),
+        lambda cube: mc.cube_language_rating_summary(cube, min_books=1),
+        ["language_code"],
+    ),
+    "M10": (cm.compute_publisher_engagement, mc.cube_publisher_engagement, ["publisher"]),
+    "M13": (
+        cm.compute_publisher_language_rankings,
+        mc.cube_publisher_language_rankings,
+        ["publisher", "language_code"],
+    ),
+    "M14": (
+        cm.compute_publication_year_rolling_stats,
+        mc.cube_publication_year_rolling_stats,
+        ["publication_year"],
+    ),
+}
+
+
+def _assert_cube_matches(cube: mc.MetricsCube, df: pd.DataFrame, rtol: float) -> None:
+    # Cell sums are re-added per slice, so float means may differ by a few ulps
+    # and ties can reorder; rows are aligned on their keys.
+    for metric_id, (compute, derive, keys) in CUBE_PAIRS.items():
+        pd.testing.assert_frame_equal(
+            derive(cube).sort_values(keys).reset_index(drop=True),
+            compute(df).sort_values(keys).reset_index(drop=True),
+            check_dtype=False,
+            check_exact=False,
+            rtol=rtol,
+            obj=metric_id,
+        )
+
+
+def test_cube_slices_match_direct_metrics(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    cube = mc.build_cube(cleaned_books)
+
+    _assert_cube_matches(cube, cleaned_books, rtol=1e-12)
+    _assert_cube_matches(mc.load_cube(mc.save_cube(cube, tmp_path / "cube.npz")), cleaned_books, rtol=1e-12)
+
+
+def test_cube_ranks_tied_publisher_languages_like_the_direct_metric(cleaned_books: pd.DataFrame) -> None:
+    # "Alpha" mirrors every North book, so each of its pairs ties with North's on every ranking column.
+    mirror = cleaned_books.loc[cleaned_books["publisher"] == "North"].assign(
+        publisher="Alpha",
+        book_id=lambda frame: frame["book_id"] + 100,
+        canonical_book_id=lambda frame: frame["canonical_book_id"] + 100,
+    )
+    books = pd.concat([cleaned_books, mirror], ignore_index=True)
+    keys = ["publisher", "language_code"]
+
+    direct = cm.compute_publisher_language_rankings(books)[keys].reset_index(drop=True)
+    sliced = mc.cube_publisher_language_rankings(mc.build_cube(books))[keys].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(sliced, direct, check_dtype=False)
+    assert direct["publisher"].tolist().index("Alpha") < direct["publisher"].tolist().index("North")
+
+
+def test_last_bit_differences_in_the_mean_rank_as_ties() -> None:
+    res = pd.DataFrame(
+        {
+            "publisher": ["B", "A"],
+            "language_code": ["eng", "eng"],
+            "average_rating": [0.1 + 0.2 + 0.3, 0.3 + 0.2 + 0.1],
+            "p75_ratings_count": [5.0, 5.0],
+        }
+    )
+
+    assert cm.rank_publisher_languages(res)["publisher"].tolist() == ["A", "B"]
+
+
+def test_cube_counts_each_canonical_book_once_per_publisher(cleaned_books: pd.DataFrame) -> None:
+    table = mc.cube_publisher_engagement(mc.build_cube(cleaned_books)).set_index("publisher")
+
+    # North holds books 1, 2 (canonical 1) and 4 (canonical 4).
+    assert table.loc["North", "book_count"] == 2
+    assert table.loc["South", "book_count"] == 2
+
+
+def test_sketch_cube_stays_within_relative_accuracy(tmp_path, cleaned_books: pd.DataFrame) -> None:
+    cube = mc.load_cube(mc.save_cube(mc.build_cube(cleaned_books, relative_accuracy=0.01), tmp_path / "c.npz"))
+
+    assert cube.relative_accuracy == 0.01
+    assert mc.cube_metadata(tmp_path / "c.npz") == {
+        "format": mc.CUBE_FORMAT,
+        "version": mc.CUBE_VERSION,
+        "quantile_mode": "approx",
+        "relative_accuracy": 0.01,
+    }
+    _assert_cube_matches(cube, cleaned_books, rtol=0.01 + 1e-9)
+
+
+def test_load_cube_rejects_missing_file(tmp_path) -> None:
+    with pytest.raises(FileNotFoundError):
+        mc.load_cube(tmp_path / "missing.npz")
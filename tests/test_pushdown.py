@@ -0,0 +1,107 @@
+"""Tests for the PostgreSQL pushdown backend of the core metrics."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from src.db_config import build_database_url_from_env
+from src.metrics import core_metrics as cm
+from src.metrics import pushdown
+
+
+def _bind_names(sql: str) -> set[str]:
+    return set(text(sql).compile(dialect=postgresql.dialect()).params)
+
+
+def test_queries_bind_their_parameters() -> None:
+    assert _bind_names(pushdown.TOP_AUTHORS_SQL) == {"min_ratings", "top_n"}
+    assert _bind_names(pushdown.TOP_BOOKS_SQL.format(count="ratings_count")) == {"top_n"}
+    assert _bind_names(pushdown.LANGUAGE_SQL) == {"min_books"}
+    assert _bind_names(pushdown.YEARLY_SQL.format(measures="1 AS x", books="books")) == {"min_year"}
+    for sql in (pushdown.PAGE_BUCKET_SQL, pushdown.PUBLISHER_SQL, pushdown.PUBLISHER_LANGUAGE_SQL):
+        assert _bind_names(sql) == set()
+
+
+def test_engine_routes_to_sql_without_touching_a_frame(monkeypatch, cleaned_books: pd.DataFrame) -> None:
+    canonical = cm.canonical_rollup(cleaned_books)
+    yearly = (
+        canonical.dropna(subset=["publication_year"])
+        .groupby("publication_year")
+        .agg(
+            rating_sum=("average_rating", "sum"),
+            rating_count=("average_rating", "count"),
+            books=("canonical_book_id", "nunique"),
+        )
+        .reset_index()
+    )
+    calls: list[dict[str, object]] = []
+
+    def fake_read(engine, sql, **params):
+        calls.append(params)
+        if "duplicate_rows" in sql:
+            return pd.DataFrame({"total_rows": [len(cleaned_books)], "duplicate_rows": [cleaned_books["is_duplicate"].sum()]})
+        return yearly
+
+    monkeypatch.setattr(pushdown, "read_pushdown", fake_read)
+    engine = object()
+
+    rolling = cm.compute_publication_year_rolling_stats(None, [2, 3], engine=engine)
+    share = cm.compute_duplicate_share(None, engine=engine)
+
+    expected = cm.compute_publication_year_rolling_stats(cleaned_books, [2, 3])
+    pd.testing.assert_frame_equal(rolling, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(share, cm.compute_duplicate_share(cleaned_books))
+    assert calls == [{"min_year": None}, {}]
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        try:
+            url = build_database_url_from_env()
+        except RuntimeError:
+            url = None
+    if not url:
+        pytest.skip("DATABASE_URL is not defined; skipping pushdown parity tests.")
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1 FROM books_clean LIMIT 1"))
+    except OperationalError as exc:  # pragma: no cover - depends on env
+        pytest.skip(f"Cannot connect to Postgres: {exc}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "compute",
+    [
+        cm.compute_top_books_by_ratings_count,
+        cm.compute_median_rating_by_page_bucket,
+        cm.compute_average_rating_by_publication_year,
+        cm.compute_language_rating_summary,
+        cm.compute_duplicate_share,
+        cm.compute_publication_year_rolling_stats,
+    ],
+)
+def test_pushdown_matches_pandas(pg_engine, compute) -> None:  # pragma: no cover - depends on env
+    books = pd.read_sql_table("books_clean", pg_engine)
+    books["average_rating"] = books["average_rating"].astype(float)
+
+    expected = compute(books).reset_index(drop=True)
+    result = compute(None, engine=pg_engine)
+
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        if pd.api.types.is_numeric_dtype(expected[column]):
+            np.testing.assert_allclose(result[column].astype(float), expected[column].astype(float), rtol=1e-9)
+        else:
+            assert result[column].tolist() == expected[column].tolist()
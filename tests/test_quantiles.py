@@ -0,0 +1,108 @@
+"""Tests for the shared grouped-quantile helpers and sketches."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics import core_metrics as cm
+from src.metrics.quantiles import (
+    build_sketch,
+    grouped_quantile,
+    histogram_quantile,
+    merge_sketches,
+    sketch_quantile,
+)
+
+ALPHA = 0.01
+# Float noise on top of the documented relative bound.
+BOUND = ALPHA * (1 + 1e-9)
+
+
+@pytest.fixture()
+def engagement() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    values = np.floor(rng.lognormal(mean=6, sigma=2.5, size=5_000))
+    values[rng.random(values.size) < 0.05] = 0
+    return pd.DataFrame({"group": rng.choice(list("abcdefg"), size=values.size), "value": values})
+
+
+def _relative_error(actual: pd.Series, expected: pd.Series) -> float:
+    actual = actual.reindex(expected.index)
+    scale = expected.abs().where(expected != 0, 1)
+    return float(((actual - expected).abs() / scale).max())
+
+
+@pytest.mark.parametrize("q", [0.5, 0.75])
+def test_histogram_quantile_matches_pandas(engagement: pd.DataFrame, q: float) -> None:
+    hist = engagement.groupby(["group", "value"]).size().to_frame("count")
+
+    expected = engagement.groupby("group")["value"].quantile(q)
+
+    pd.testing.assert_series_equal(histogram_quantile(hist, q), expected, check_names=False)
+
+
+@pytest.mark.parametrize("q", [0.5, 0.75])
+def test_sketch_quantile_stays_within_relative_accuracy(engagement: pd.DataFrame, q: float) -> None:
+    sketch = build_sketch(engagement, ["group"], "value", ALPHA)
+
+    expected = engagement.groupby("group")["value"].quantile(q)
+
+    assert _relative_error(sketch_quantile(sketch, q, ALPHA), expected) <= BOUND
+    assert len(sketch) < len(engagement.drop_duplicates())
+
+
+def test_chunk_sketches_merge_into_the_full_sketch(engagement: pd.DataFrame) -> None:
+    chunks = [engagement.iloc[start : start + 1_250] for start in range(0, len(engagement), 1_250)]
+
+    merged = merge_sketches(build_sketch(chunk, ["group"], "value", ALPHA) for chunk in chunks)
+
+    pd.testing.assert_frame_equal(merged, build_sketch(engagement, ["group"], "value", ALPHA))
+
+
+def test_approximate_metrics_stay_within_bound(cleaned_books: pd.DataFrame) -> None:
+    cases = {
+        cm.compute_median_rating_by_page_bucket: (["page_length_bucket"], ["median_rating"]),
+        cm.compute_median_ratings_count_by_publication_year: (
+            ["publication_year"],
+            ["median_ratings_count_capped"],
+        ),
+        cm.compute_publisher_engagement: (["publisher"], ["median_ratings_count_capped"]),
+        cm.compute_page_length_engagement_delta: (
+            ["page_length_bucket"],
+            ["median_ratings_count_capped", "median_text_reviews_capped"],
+        ),
+        cm.compute_engagement_uplift_canonical: (["edition_type"], ["median_ratings_count"]),
+        cm.compute_publisher_language_rankings: (["publisher", "language_code"], ["p75_ratings_count"]),
+    }
+    for compute, (keys, columns) in cases.items():
+        exact = compute(cleaned_books).set_index(keys)
+        approx = compute(cleaned_books, quantile_mode="approx", relative_accuracy=ALPHA).set_index(keys)
+        assert list(approx.columns) == list(exact.columns)
+        for column in columns:
+            assert _relative_error(approx[column], exact[column]) <= BOUND, (compute.__name__, column)
+
+
+def test_unknown_quantile_mode_is_rejected(cleaned_books: pd.DataFrame) -> None:
+    with pytest.raises(ValueError, match="quantile_mode"):
+        cm.compute_publisher_engagement(cleaned_books, quantile_mode="tdigest")
+
+
+@pytest.mark.parametrize("q", [0.25, 0.5, 0.75, 0.9])
+def test_grouped_quantile_matches_groupby_quantile(q: float) -> None:
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame(
+        {
+            "publisher": rng.choice(["North", "South", "East", None], size=2_000),
+            "language_code": rng.choice(["eng", "spa"], size=2_000),
+            "value": rng.gamma(0.7, 300, size=2_000),
+        }
+    )
+    frame.loc[rng.random(len(frame)) < 0.1, "value"] = np.nan
+    keys = ["publisher", "language_code"]
+
+    grouped = frame.groupby(keys, dropna=False)["value"]
+    expected = grouped.median() if q == 0.5 else grouped.agg(lambda s: s.quantile(q))
+
+    pd.testing.assert_series_equal(grouped_quantile(frame, keys, "value", q, dropna=False), expected)
@@ -0,0 +1,60 @@
+"""Tests for the declarative index plans in src.schema."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from src.db_config import dispose_engines, get_engine
+from src.load_books_clean_to_postgres import DTYPE_MAP, load_books_clean_to_postgres
+from src.schema import BOOKS_CLEAN_INDEX_PLAN, IndexSpec, year_partition_bounds
+
+
+def test_index_specs_render_concurrent_covering_and_brin_ddl() -> None:
+    covering = IndexSpec("leaderboard", ("book_id",), include=("ratings_count",))
+    brin = IndexSpec("year_brin", ("publication_year",), using="brin")
+
+    assert covering.create_sql("books_clean", concurrently=True) == (
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_books_clean_leaderboard" '
+        'ON "books_clean" USING btree (book_id) INCLUDE (ratings_count)'
+    )
+    assert brin.create_sql("books_clean") == (
+        'CREATE INDEX IF NOT EXISTS "idx_books_clean_year_brin" ON "books_clean" USING brin (publication_year)'
+    )
+    assert IndexSpec("author_name", ("author_name",), unique=True).index_name("authors") == "uq_authors_author_name"
+
+
+def test_books_clean_plan_only_uses_loaded_columns() -> None:
+    names = [spec.name for spec in BOOKS_CLEAN_INDEX_PLAN]
+
+    assert len(names) == len(set(names))
+    for spec in BOOKS_CLEAN_INDEX_PLAN:
+        assert set(spec.columns) | set(spec.include) <= set(DTYPE_MAP)
+
+
+def test_year_partitions_cover_each_populated_decade() -> None:
+    assert year_partition_bounds([1999, 2001, 2008, 1850]) == [(1850, 1860), (1990, 2000), (2000, 2010)]
+    assert year_partition_bounds([2023], span=5) == [(2020, 2025)]
+    assert year_partition_bounds([]) == []
+
+
+def test_partitioning_is_only_offered_for_replace_loads(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        load_books_clean_to_postgres(tmp_path / "books_clean.csv", "books_clean", "merge", partition_by_year=True)
+
+
+def test_fail_load_refuses_before_touching_the_author_tables(monkeypatch, tmp_path) -> None:
+    csv_path = tmp_path / "books_clean.csv"
+    books = {"book_id": [1], "publication_date": ["2001-01-01"], "authors_clean": ["Ann"], "authors_raw": ["Ann"]}
+    pd.DataFrame(books).to_csv(csv_path, index=False)
+    url = f"sqlite:///{tmp_path / 'books.sqlite'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    engine = get_engine(url)
+    pd.DataFrame({"book_id": [7]}).to_sql("books_clean", engine, index=False)
+    try:
+        with pytest.raises(ValueError, match="already exists"):
+            load_books_clean_to_postgres(csv_path, "books_clean", "fail")
+        assert inspect(engine).get_table_names() == ["books_clean"]
+    finally:
+        dispose_engines()
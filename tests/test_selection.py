@@ -0,0 +1,40 @@
+"""Tests for the shared top-N selection helper."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics.selection import top_n_rows
+
+
+@pytest.fixture()
+def leaderboard() -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    frame = pd.DataFrame(
+        {
+            "capped": rng.integers(0, 40, size=500).astype("float64"),
+            "raw": rng.integers(0, 5, size=500),
+            "label": rng.choice(list("xyz"), size=500),
+        }
+    )
+    frame.loc[rng.random(len(frame)) < 0.05, "capped"] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("n", [1, 7, 20, 499, 600])
+@pytest.mark.parametrize("ascending", [False, True, [False, True]])
+def test_top_n_rows_matches_stable_sort(leaderboard: pd.DataFrame, n: int, ascending) -> None:
+    columns = ["capped", "raw"]
+    orders = ascending if isinstance(ascending, list) else [ascending] * 2
+
+    expected = leaderboard.sort_values(columns, ascending=orders, kind="stable").head(n)
+
+    pd.testing.assert_frame_equal(top_n_rows(leaderboard, columns, n, ascending=ascending), expected)
+
+
+def test_top_n_rows_falls_back_to_sort_for_text_keys(leaderboard: pd.DataFrame) -> None:
+    expected = leaderboard.sort_values(["label", "raw"], ascending=False, kind="stable").head(5)
+
+    pd.testing.assert_frame_equal(top_n_rows(leaderboard, ["label", "raw"], 5), expected)
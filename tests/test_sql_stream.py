@@ -0,0 +1,75 @@
+"""Tests for the chunked SQL result readers."""
+
+from __future__ import annotations
+
+from contextlib import closing
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from src.sql_stream import export_query_csv, iter_query, read_query, render_query
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stream.sqlite'}")
+    pd.DataFrame({"book_id": range(1, 26), "title": [f"t{i}" for i in range(1, 26)]}).to_sql(
+        "books", engine, index=False
+    )
+    return engine
+
+
+def test_results_arrive_in_bounded_chunks(tmp_path) -> None:
+    engine = _engine(tmp_path)
+    query = "SELECT * FROM books WHERE book_id <= :last ORDER BY book_id"
+
+    sizes = [len(chunk) for chunk in iter_query(engine, query, {"last": 23}, chunksize=10)]
+    streamed = read_query(engine, query, {"last": 23}, chunksize=10)
+
+    assert sizes == [10, 10, 3]
+    pd.testing.assert_frame_equal(streamed, pd.read_sql_query(query.replace(":last", "23"), engine))
+
+
+def test_empty_result_keeps_its_columns(tmp_path) -> None:
+    result = read_query(_engine(tmp_path), "SELECT book_id, title FROM books WHERE book_id < 0")
+
+    assert result.empty
+    assert result.columns.tolist() == ["book_id", "title"]
+
+
+def test_export_writes_one_header_across_chunks(tmp_path) -> None:
+    engine = _engine(tmp_path)
+    path = tmp_path / "out" / "books.csv"
+
+    rows = export_query_csv(engine, "SELECT * FROM books ORDER BY book_id", path, chunksize=7)
+
+    assert rows == 25
+    pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_sql_table("books", engine))
+
+
+def test_export_keeps_pandas_formatting(tmp_path) -> None:
+    engine = _engine(tmp_path)
+    frame = pd.DataFrame({"is_duplicate": [True, False], "average_rating": [4.5, 3.25]})
+    frame.to_sql("flags", engine, index=False)
+    path = tmp_path / "flags.csv"
+
+    export_query_csv(engine, "SELECT * FROM flags", path, chunksize=1)
+
+    assert path.read_text() == read_query(engine, "SELECT * FROM flags").to_csv(index=False)
+
+
+def test_closing_a_partly_read_stream_returns_its_connection(tmp_path) -> None:
+    engine = _engine(tmp_path)
+
+    with closing(iter_query(engine, "SELECT * FROM books", chunksize=5)) as chunks:
+        next(chunks)
+        assert engine.pool.checkedout() == 1
+
+    assert engine.pool.checkedout() == 0
+
+
+def test_copy_query_inlines_parameters() -> None:
+    engine = create_engine("postgresql+psycopg2://user@localhost/db")
+
+    sql = render_query(engine, "SELECT * FROM books WHERE title = :title LIMIT :limit", {"title": "O'Neil", "limit": 5})
+
+    assert sql == "SELECT * FROM books WHERE title = 'O''Neil' LIMIT 5"
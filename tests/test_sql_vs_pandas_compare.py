@@ -0,0 +1,45 @@
+"""Tests for the SQL vs pandas comparison CLI."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from src.analyses.portfolio.p04_sql_vs_pandas_compare import (
+    COMPARISON_CASES,
+    _plan_relations,
+    apply_case_adjustments,
+)
+
+
+def test_plan_relations_cover_every_scanned_relation() -> None:
+    plan = {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Schema": "public", "Relation Name": "books_clean"},
+            {
+                "Node Type": "Hash",
+                "Plans": [
+                    {"Node Type": "Index Scan", "Schema": "public", "Relation Name": "book_authors"},
+                    {"Node Type": "Seq Scan", "Schema": "public", "Relation Name": "books_clean"},
+                ],
+            },
+        ],
+    }
+
+    assert _plan_relations(plan) == {("public", "books_clean"), ("public", "book_authors")}
+
+
+def test_pandas_leaderboard_is_cut_to_the_sql_top_n() -> None:
+    case = next(case for case in COMPARISON_CASES if case.name == "M3_top_books_by_ratings_count")
+    sql = pd.DataFrame({"metric": ["ratings_count"] * 2, "canonical_book_id": [7, 3]})
+    pandas = pd.DataFrame(
+        {
+            "canonical_book_id": [3, 9, 7, 1],
+            "ratings_count": [500, 90, 800, 10],
+            "ratings_count_capped": [500, 90, 500, 10],
+        }
+    )
+
+    _, trimmed = apply_case_adjustments(case, sql, pandas)
+
+    assert trimmed["canonical_book_id"].tolist() == [7, 3]
@@ -0,0 +1,75 @@
+"""Tests for the synthetic scale-up generator."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from src.pipelines import generate_synthetic_books as synth
+from src.raw_ingestion import COLUMN_NAMES, load_books_csv
+
+SOURCE_ROWS = [
+    ["1", "Alpha", "Ann/Bob", "4.10", "0000000001", "9780000000001", "eng", "100", "10", "2", "1/1/2001", "North"],
+    ["2", "Beta", "Ann", "3.90", "0000000002", "9780000000002", "spa", "200", "20", "4", "11/31/2000", "South"],
+    ["3", "Gamma", "Cy, Jr./Dee", "4.50", "0000000003", "9780000000003", "eng", "300", "30", "6", "12/25/1999", "North"],
+    ["4", "Delta", "Eve", "3.50", "0000000004", "9780000000004", "fre", "400", "40", "8", "6/9/2010", "West"],
+]
+
+
+def _profile(tmp_path: Path) -> synth.BooksProfile:
+    books = tmp_path / "books.csv"
+    books.write_text("\n".join([",".join(COLUMN_NAMES), *(",".join(row) for row in SOURCE_ROWS)]), encoding="utf-8")
+    mapping = tmp_path / "mapping.csv"
+    mapping.write_text("duplicate_bookID,canonical_bookID\n2,1\n", encoding="utf-8")
+    return synth.profile_books(books, mapping)
+
+
+def test_generation_is_seeded_and_streams_in_chunks(tmp_path) -> None:
+    profile = _profile(tmp_path)
+
+    first = tmp_path / "a.csv"
+    second = tmp_path / "b.csv"
+    synth.write_synthetic_books(profile, first, scale=25, seed=7, chunk_rows=16)
+    synth.write_synthetic_books(profile, second, scale=25, seed=7, chunk_rows=16)
+    other = tmp_path / "c.csv"
+    synth.write_synthetic_books(profile, other, scale=25, seed=8, chunk_rows=16)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+    assert first.read_text(encoding="utf-8").splitlines()[0] == ",".join(COLUMN_NAMES)
+
+
+def test_output_round_trips_through_raw_ingestion(tmp_path) -> None:
+    profile = _profile(tmp_path)
+    output = tmp_path / "books_x50.csv"
+
+    stats = synth.write_synthetic_books(profile, output, scale=50, seed=1, chunk_rows=64)
+    df, load_stats = load_books_csv(str(output))
+
+    assert len(df) == stats.rows == 50 * len(SOURCE_ROWS)
+    assert load_stats.repaired_rows == stats.malformed_rows > 0
+    assert df["bookID"].is_unique
+    assert set(df["language_code"]) <= {"eng", "spa", "fre"}
+    assert df["publication_date"].astype(str).str.fullmatch(r"\d{1,2}/\d{1,2}/\d{4}").all()
+    # Replica tags keep co-authors together while multiplying author identities.
+    pairs = df.loc[df["authors"].str.contains("/", regex=False), "authors"].str.split("/")
+    tags = pairs.map(lambda names: {name.partition(" #")[2] for name in names})
+    assert (tags.map(len) == 1).all()
+    assert 1 < tags.map(min).nunique() <= 50
+
+
+def test_duplicate_editions_are_mapped_to_earlier_rows(tmp_path) -> None:
+    profile = _profile(tmp_path)
+    output = tmp_path / "books.csv"
+
+    stats = synth.write_synthetic_books(profile, output, scale=100, seed=3, chunk_rows=50)
+    mapping = pd.read_csv(output.with_name("books_duplicate_mapping.csv"))
+    books, _ = load_books_csv(str(output))
+    books = books.set_index("bookID")
+
+    assert len(mapping) == stats.duplicate_rows > 0
+    assert (mapping["canonical_bookID"] < mapping["duplicate_bookID"]).all()
+    assert not mapping["canonical_bookID"].isin(mapping["duplicate_bookID"]).any()
+    canonical = books.loc[mapping["canonical_bookID"], ["title", "authors"]].to_numpy()
+    assert (books.loc[mapping["duplicate_bookID"], ["title", "authors"]].to_numpy() == canonical).all()
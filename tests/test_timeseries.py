@@ -0,0 +1,69 @@
+"""Tests for the publication-year engine behind M14."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics.core_metrics import canonical_rollup, compute_publication_year_rolling_stats
+from src.metrics.timeseries import YearSeries, year_series
+
+
+def _yearly(cleaned_books: pd.DataFrame) -> pd.DataFrame:
+    canonical = canonical_rollup(cleaned_books).dropna(subset=["publication_year"])
+    return canonical.groupby("publication_year")["average_rating"].agg(["mean", "sum", "count"])
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 10])
+def test_rolling_columns_match_windowed_reference(cleaned_books: pd.DataFrame, window: int) -> None:
+    yearly = _yearly(cleaned_books)
+    series = year_series(canonical_rollup(cleaned_books))
+
+    expected_mean = yearly["mean"].rolling(window, min_periods=1).mean().to_numpy()
+    rolled = yearly[["sum", "count"]].rolling(window, min_periods=1).sum()
+    expected_weighted = (rolled["sum"] / rolled["count"]).to_numpy()
+
+    np.testing.assert_array_equal(series.rolling_average(window), expected_mean)
+    np.testing.assert_array_equal(series.rolling_weighted_average(window), expected_weighted)
+
+
+def test_several_windows_come_from_one_grouping(cleaned_books: pd.DataFrame) -> None:
+    multi = compute_publication_year_rolling_stats(cleaned_books, [2, 3])
+    single = compute_publication_year_rolling_stats(cleaned_books, 3)
+
+    assert list(multi.columns) == [
+        "publication_year",
+        "average_rating",
+        "book_count",
+        "rolling_average_rating_2",
+        "rolling_weighted_rating_2",
+        "rolling_average_rating_3",
+        "rolling_weighted_rating_3",
+    ]
+    np.testing.assert_array_equal(multi["rolling_average_rating_3"], single["rolling_average_rating"])
+    np.testing.assert_array_equal(multi["rolling_weighted_rating_3"], single["rolling_weighted_rating"])
+
+
+def test_span_average_weights_every_rated_book(cleaned_books: pd.DataFrame) -> None:
+    canonical = canonical_rollup(cleaned_books)
+    series = year_series(canonical)
+    in_span = canonical[canonical["publication_year"].between(2000, 2010)]
+
+    assert series.span_average(2000, 2010) == pytest.approx(in_span["average_rating"].mean())
+    assert np.isnan(series.span_average(1800, 1850))
+
+
+def test_rejects_non_positive_windows(cleaned_books: pd.DataFrame) -> None:
+    with pytest.raises(ValueError):
+        year_series(canonical_rollup(cleaned_books)).rolling_average(0)
+
+
+def test_long_series_windows_carry_no_cancellation_error() -> None:
+    years = np.arange(1800, 2020)
+    ratings = np.resize([4.415, 3.9575, 1e6, 2.5], len(years))
+    cells = pd.DataFrame({"rating_sum": ratings, "rating_count": 1.0, "books": 1}, index=years)
+    series = YearSeries.from_aggregates(cells)
+
+    np.testing.assert_array_equal(series.rolling_average(1), ratings)
+    np.testing.assert_array_equal(series.rolling_weighted_average(1), ratings)